@@ -1,38 +1,21 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
-import requests
+
+from app.components.DebugPanel import debug_panel
+from app.styles.chat_styles import apply_chat_styles, create_footer
+from app.utils.hedging import get_latency_registry
+from app.utils.single_flight import get_single_flight
 
 # Initialize session state for LLM selection
 if 'selected_llm' not in st.session_state:
     st.session_state.selected_llm = 'gemini'
 
-st.markdown("""
-<style>
-@import url('https://fonts.googleapis.com/css2?family=Archivo:ital,wght@0,100..900;1,100..900&family=Karla:ital,wght@0,200..800;1,200..800&family=Raleway:ital,wght@0,100..900;1,100..900&family=Sofia+Sans:ital,wght@0,1..1000;1,1..1000&display=swap');
-
-html, body, [class*="css"] {
-    font-family: "Raleway", sans-serif;
-    font-family: "Karla", sans-serif;
-    font-family: "Archivo", sans-serif;
-    font-family: "Sofia Sans", sans-serif;
-}
-
-.stApp {
-    font-family: "Raleway", sans-serif;
-    font-family: "Karla", sans-serif;
-    font-family: "Archivo", sans-serif;
-    font-family: "Sofia Sans", sans-serif;
-}
+# Initialize session state for hedged requests
+if 'hedging_enabled' not in st.session_state:
+    st.session_state.hedging_enabled = False
 
-h1, h2, h3, h4, h5, h6 {
-    font-family: "Raleway", sans-serif !important;
-    font-family: "Karla", sans-serif !important;
-    font-family: "Archivo", sans-serif !important;
-    font-family: "Sofia Sans", sans-serif !important;
-}
-</style>
-""", unsafe_allow_html=True)
+# Shared theme, sent to the browser once per session
+apply_chat_styles()
+debug_panel()
 
 
 # Application Title
@@ -62,12 +45,6 @@ def gradient_div(content, bg, page_link):
         ">
             {content}
         </a>
-        <style> 
-            a:hover {{
-                transform: translateY(-3px);
-                box-shadow: 0px 12px 24px rgba(0,0,0,0.15);
-            }}
-        </style>
     """
     return features_section
 
@@ -205,6 +182,16 @@ with col2:
         unsafe_allow_html=True
     )
 
+with col1:
+    st.markdown(
+        gradient_div(
+            "Run All Tools",
+            "linear-gradient(to right, #4776E6, #38ef7d)",
+            "/Run_All_Tools"
+        ),
+        unsafe_allow_html=True
+    )
+
 # Fifth row has been removed as Document Summarizer page was deleted
 
 # Sidebar
@@ -219,7 +206,8 @@ pages = [
     "Speaking_Assistant", 
     "Plagiarism_Checker",
     "Image_watermark_checking",
-    "Writing_Challenge"
+    "Writing_Challenge",
+    "Run_All_Tools"
 ]
 
 # API Methods section
@@ -247,6 +235,31 @@ if api_method == 'Freemium':
     
     st.sidebar.write(f"Current model: {st.session_state.selected_llm}")
 
+    # Race a second model when the selected one is slower than its usual p95
+    st.session_state.hedging_enabled = st.sidebar.checkbox(
+        "Hedge slow requests",
+        value=st.session_state.hedging_enabled,
+        help="If the selected model takes longer than usual, the same request is also "
+             "sent to another model and the first good answer is used."
+    )
+    if st.session_state.hedging_enabled:
+        latencies = get_latency_registry().summary()
+        if latencies:
+            st.sidebar.dataframe(
+                [{"endpoint": endpoint, "model": model, **stats} for (endpoint, model), stats in latencies.items()],
+                use_container_width=True,
+                hide_index=True
+            )
+
+    # Identical grammar and paraphrase requests shared between sessions
+    collapsed = get_single_flight().stats()
+    if any(stats["collapsed"] for stats in collapsed.values()):
+        st.sidebar.dataframe(
+            [{"endpoint": name, **stats} for name, stats in collapsed.items()],
+            use_container_width=True,
+            hide_index=True
+        )
+
 else:
     api_input = st.sidebar.text_input(
         "Enter your API key", key="api_input", type="password")
@@ -254,25 +267,4 @@ else:
     if st.sidebar.button("Set API Key"):
         st.sidebar.success("API Key set successfully!")
         
-footer = """
-<style>
-
-.footer {
-    position: fixed;
-    left: 0;
-    bottom: 0;
-    width: 100%;
-    color: #888;
-    padding: 10px;
-    text-align: right;
-    font-size: 14px;
-    z-index: 999;
-}
-
-</style>
-
-<div class="footer">
-    RAG ToolBox | Created with ⚡ by <a href="">Subodh Chandra Shil</a> 
-</div>
-"""
-st.markdown(footer, unsafe_allow_html=True)
\ No newline at end of file
+create_footer('RAG ToolBox | Created with ⚡ by <a href="">Subodh Chandra Shil</a>')
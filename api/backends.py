@@ -0,0 +1,468 @@
+import asyncio
+import contextlib
+import hashlib
+import json
+import os
+import re
+
+# Backend used when RAG_TOOLBOX_MODEL_BACKEND is not set
+MODEL_BACKEND_ENV_VAR = "RAG_TOOLBOX_MODEL_BACKEND"
+DEFAULT_BACKEND = "fake"
+
+# Seconds the fake model waits per call, to make load tests realistic
+FAKE_LATENCY_ENV_VAR = "RAG_TOOLBOX_FAKE_LATENCY"
+# Share of that latency a streamed fake answer takes to its first word
+STREAM_FIRST_TOKEN_SHARE = 0.2
+
+MODELS = ("gemini", "mistral", "deepseek")
+
+
+class ModelNotFoundError(LookupError):
+    """Raised for a model name the backend does not serve."""
+
+
+class ModelUnavailableError(RuntimeError):
+    """Raised when a model is known but cannot be called right now."""
+
+
+class ModelBackend:
+    """Interface of the models behind the API routes.
+
+    Every method takes the model name from the route path. Subclasses
+    implement check_grammar, paraphrase and chat; stream_chat defaults to
+    yielding the whole chat answer at once.
+    """
+
+    models = MODELS
+
+    def check_model(self, model):
+        if model not in self.models:
+            raise ModelNotFoundError(f"Unknown model '{model}'. Available: {', '.join(self.models)}.")
+
+    async def check_grammar(self, model, text):
+        """
+        Returns the corrected text and the list of corrections.
+
+        Args:
+            model (str): Model name
+            text (str): Text to check
+
+        Returns:
+            dict: {"corrected_text", "corrections"} as in GrammarResponse
+        """
+        raise NotImplementedError
+
+    async def paraphrase(self, model, text, style):
+        """
+        Returns the text rewritten in a style.
+
+        Args:
+            model (str): Model name
+            text (str): Text to rewrite
+            style (str): e.g. "Formal" or "Shorten"
+
+        Returns:
+            str: The paraphrased text
+        """
+        raise NotImplementedError
+
+    async def check_grammar_batch(self, model, texts):
+        """
+        Checks several texts, in one model call where the backend supports it.
+
+        Args:
+            model (str): Model name
+            texts (list): Texts to check
+
+        Returns:
+            list: One check_grammar result per text, in order
+        """
+        return list(await asyncio.gather(*(self.check_grammar(model, text) for text in texts)))
+
+    async def paraphrase_batch(self, model, texts, style):
+        """
+        Paraphrases several texts in the same style, in one model call where
+        the backend supports it.
+
+        Args:
+            model (str): Model name
+            texts (list): Texts to rewrite
+            style (str): e.g. "Formal" or "Shorten"
+
+        Returns:
+            list: One paraphrased text per text, in order
+        """
+        return list(await asyncio.gather(*(self.paraphrase(model, text, style) for text in texts)))
+
+    async def chat(self, model, message, history):
+        """
+        Returns the assistant's answer.
+
+        Args:
+            model (str): Model name
+            message (str): The user's message
+            history (list): Earlier messages as {"role", "content"} dicts
+
+        Returns:
+            str: The answer
+        """
+        raise NotImplementedError
+
+    async def stream_chat(self, model, message, history):
+        """
+        Yields the assistant's answer in pieces.
+
+        Args:
+            model (str): Model name
+            message (str): The user's message
+            history (list): Earlier messages as {"role", "content"} dicts
+
+        Yields:
+            str: Pieces of the answer
+        """
+        yield await self.chat(model, message, history)
+
+
+# --- Deterministic fake model --- #
+
+MISSPELLINGS = {
+    "teh": "the", "recieve": "receive", "definately": "definitely", "seperate": "separate",
+    "occured": "occurred", "untill": "until", "wich": "which", "alot": "a lot", "beleive": "believe",
+    "goverment": "government", "accomodate": "accommodate", "thier": "their",
+}
+
+GRAMMAR_RULES = [
+    # (type, pattern, replacement, explanation, rule)
+    (
+        "spelling", re.compile(r"\b(" + "|".join(MISSPELLINGS) + r")\b", re.IGNORECASE),
+        lambda m: _match_case(MISSPELLINGS[m[0].lower()], m[0]),
+        "The word is misspelled.", None
+    ),
+    (
+        "repetition", re.compile(r"\b(\w+)\s+\1\b", re.IGNORECASE), lambda m: m[1],
+        "The word is repeated.",
+        {
+            "rule_name": "Repeated words",
+            "description": "A word should not appear twice in a row unless it is intended.",
+            "correct_examples": ["She went to the store."],
+            "incorrect_examples": ["She went to the the store."]
+        }
+    ),
+    (
+        "capitalization", re.compile(r"\bi\b"), lambda m: "I",
+        "The pronoun 'I' is always capitalized.",
+        {
+            "rule_name": "Capitalizing 'I'",
+            "description": "The first-person pronoun is written as a capital letter.",
+            "correct_examples": ["Yesterday I went home."],
+            "incorrect_examples": ["Yesterday i went home."]
+        }
+    ),
+    (
+        "article", re.compile(r"\b([Aa])(?= [aeiou])"), lambda m: m[1] + "n",
+        "Use 'an' before a word that starts with a vowel sound.",
+        {
+            "rule_name": "A versus an",
+            "description": "'An' is used before vowel sounds and 'a' before consonant sounds.",
+            "correct_examples": ["an apple", "a banana"],
+            "incorrect_examples": ["a apple"]
+        }
+    ),
+    (
+        "capitalization", re.compile(r"(?:^|(?<=[.!?]\s))([a-z])"), lambda m: m[1].upper(),
+        "A sentence starts with a capital letter.", None
+    ),
+    (
+        "punctuation", re.compile(r"(?<=\S) {2,}(?=\S)"), lambda m: " ",
+        "Use a single space between words.", None
+    ),
+]
+
+STYLE_WORDS = {
+    "Formal": {
+        "don't": "do not", "can't": "cannot", "won't": "will not", "isn't": "is not",
+        "aren't": "are not", "it's": "it is", "i'm": "I am", "we're": "we are",
+        "they're": "they are", "gonna": "going to", "wanna": "want to", "kids": "children",
+    },
+    "Simple": {
+        "utilize": "use", "approximately": "about", "demonstrate": "show", "purchase": "buy",
+        "commence": "start", "sufficient": "enough", "assist": "help", "numerous": "many",
+        "subsequently": "later", "facilitate": "help",
+    },
+    "Academic": {
+        "use": "utilize", "show": "demonstrate", "buy": "purchase", "start": "commence",
+        "enough": "sufficient", "help": "facilitate", "many": "numerous", "later": "subsequently",
+        "big": "substantial", "get": "obtain",
+    },
+    "Shorten": {
+        "really": "", "very": "", "basically": "", "actually": "", "just": "", "quite": "",
+        "in order to": "to", "due to the fact that": "because", "at this point in time": "now",
+    },
+}
+# Styles without their own table swap in common synonyms
+DEFAULT_STYLE_WORDS = {
+    "good": "great", "big": "large", "help": "assist", "many": "numerous", "important": "crucial",
+    "show": "reveal", "think": "believe", "happy": "glad", "fast": "quick", "begin": "start",
+}
+
+CHAT_REPLIES = [
+    "That is a good question. The short answer is that it depends on the details of your situation.",
+    "Here is one way to think about it: break the problem into smaller steps and tackle them one at a time.",
+    "I would start by checking the assumptions behind the question before looking for an answer.",
+    "There are several approaches; the simplest one is usually the best place to begin.",
+]
+
+
+def _match_case(word, original):
+    if original.isupper() and len(original) > 1:
+        return word.upper()
+    if original[:1].isupper():
+        return word[:1].upper() + word[1:]
+    return word
+
+
+def _replace_words(text, mapping):
+    # Longest phrases first, so "in order to" wins over single words
+    pattern = re.compile(
+        r"\b(" + "|".join(re.escape(k) for k in sorted(mapping, key=len, reverse=True)) + r")\b",
+        re.IGNORECASE
+    )
+    text = pattern.sub(lambda m: _match_case(mapping[m[0].lower()], m[0]), text)
+    return re.sub(r" {2,}", " ", re.sub(r" +([,.;:!?])", r"\1", text)).strip()
+
+
+class FakeBackend(ModelBackend):
+    """Deterministic local stand-in for the LLMs.
+
+    Grammar checks apply a handful of rules, paraphrasing rewrites words
+    from per-style tables and chat picks a canned reply from a hash of the
+    message. The same input always gives the same output, which makes the
+    API usable for offline development and load tests.
+    """
+
+    def __init__(self, latency=None, max_concurrency=None):
+        """
+        Initializes the fake model.
+
+        Args:
+            latency (float, optional): Seconds each model call waits; defaults to RAG_TOOLBOX_FAKE_LATENCY or 0
+            max_concurrency (int, optional): Model calls allowed at once, like a provider's
+                throttle; unlimited by default
+        """
+        self.latency = latency if latency is not None else float(os.environ.get(FAKE_LATENCY_ENV_VAR, 0))
+        self._slots = asyncio.Semaphore(max_concurrency) if max_concurrency else None
+        self.calls = 0
+
+    async def _wait(self):
+        # One simulated model call, whatever the number of items in it
+        self.calls += 1
+        if self._slots:
+            async with self._slots:
+                await asyncio.sleep(self.latency)
+        elif self.latency:
+            await asyncio.sleep(self.latency)
+
+    def _check_grammar(self, text):
+        corrections = []
+        for kind, pattern, replace, explanation, rule in GRAMMAR_RULES:
+            def record(match):
+                suggestion = replace(match)
+                if suggestion != match[0]:
+                    corrections.append({
+                        "type": kind,
+                        "error": match[0],
+                        "suggestion": suggestion,
+                        "explanation": explanation,
+                        "grammar_rule": rule
+                    })
+                return suggestion
+            text = pattern.sub(record, text)
+        return {"corrected_text": text, "corrections": corrections}
+
+    async def check_grammar(self, model, text):
+        self.check_model(model)
+        await self._wait()
+        return self._check_grammar(text)
+
+    async def check_grammar_batch(self, model, texts):
+        self.check_model(model)
+        await self._wait()
+        return [self._check_grammar(text) for text in texts]
+
+    async def paraphrase(self, model, text, style):
+        self.check_model(model)
+        await self._wait()
+        return _replace_words(text, STYLE_WORDS.get(style, DEFAULT_STYLE_WORDS))
+
+    async def paraphrase_batch(self, model, texts, style):
+        self.check_model(model)
+        await self._wait()
+        mapping = STYLE_WORDS.get(style, DEFAULT_STYLE_WORDS)
+        return [_replace_words(text, mapping) for text in texts]
+
+    def _chat_answer(self, message, history):
+        digest = int(hashlib.sha256(message.encode("utf-8")).hexdigest(), 16)
+        first_sentence = re.split(r"(?<=[.!?])\s", message.strip(), maxsplit=1)[0][:200]
+        return (
+            f"You asked: \"{first_sentence}\" ({len(message.split())} words, "
+            f"{len(history)} earlier messages). {CHAT_REPLIES[digest % len(CHAT_REPLIES)]}"
+        )
+
+    async def chat(self, model, message, history):
+        self.check_model(model)
+        await self._wait()
+        return self._chat_answer(message, history)
+
+    async def stream_chat(self, model, message, history):
+        # Like a real model, the first words come well before the whole answer:
+        # a fifth of the call's latency passes before the first word and the
+        # rest is spread over the words
+        self.check_model(model)
+        self.calls += 1
+        words = re.findall(r"\S+\s*", self._chat_answer(message, history))
+        async with self._slots or contextlib.nullcontext():
+            await asyncio.sleep(self.latency * STREAM_FIRST_TOKEN_SHARE)
+            for word in words:
+                yield word
+                await asyncio.sleep(self.latency * (1 - STREAM_FIRST_TOKEN_SHARE) / len(words))
+
+
+# --- LangChain models --- #
+
+GRAMMAR_PROMPT = """Check the grammar of the text below. Answer with JSON only, shaped as
+{{"corrected_text": str, "corrections": [{{"type": str, "error": str, "suggestion": str,
+"explanation": str, "grammar_rule": {{"rule_name": str, "description": str,
+"correct_examples": [str], "incorrect_examples": [str]}} or null}}]}}
+
+Text:
+{text}"""
+
+PARAPHRASE_PROMPT = """Paraphrase the text below in a {style} style. Answer with the paraphrased text only.
+
+Text:
+{text}"""
+
+GRAMMAR_BATCH_PROMPT = """Check the grammar of each text in the JSON array below. Answer with a JSON
+array only, holding one result per text in the same order, each shaped as
+{{"corrected_text": str, "corrections": [{{"type": str, "error": str, "suggestion": str,
+"explanation": str, "grammar_rule": {{"rule_name": str, "description": str,
+"correct_examples": [str], "incorrect_examples": [str]}} or null}}]}}
+
+Texts:
+{texts}"""
+
+PARAPHRASE_BATCH_PROMPT = """Paraphrase each text in the JSON array below in a {style} style. Answer with a
+JSON array of the paraphrased texts only, in the same order.
+
+Texts:
+{texts}"""
+
+
+def _parse_json(content):
+    # Models often wrap JSON in a Markdown code fence
+    content = re.sub(r"^```(?:json)?\s*|\s*```$", "", content.strip())
+    return json.loads(content)
+
+
+class LangChainBackend(ModelBackend):
+    """Real models through LangChain chat model integrations.
+
+    Gemini uses langchain-google-genai from requirements.txt; Mistral and
+    DeepSeek need langchain-mistralai and langchain-deepseek, and are
+    reported as unavailable when those are not installed. Model ids can be
+    overridden with RAG_TOOLBOX_<NAME>_MODEL.
+    """
+
+    DEFAULT_MODEL_IDS = {
+        "gemini": "gemini-1.5-flash",
+        "mistral": "mistral-small-latest",
+        "deepseek": "deepseek-chat",
+    }
+
+    def __init__(self):
+        self._chat_models = {}
+
+    def _chat_model(self, model):
+        self.check_model(model)
+        if model not in self._chat_models:
+            model_id = os.environ.get(f"RAG_TOOLBOX_{model.upper()}_MODEL", self.DEFAULT_MODEL_IDS[model])
+            try:
+                if model == "gemini":
+                    from langchain_google_genai import ChatGoogleGenerativeAI as ChatModel
+                elif model == "mistral":
+                    from langchain_mistralai import ChatMistralAI as ChatModel
+                else:
+                    from langchain_deepseek import ChatDeepSeek as ChatModel
+            except ImportError as e:
+                raise ModelUnavailableError(f"Model '{model}' is not installed on this server: {e}")
+            self._chat_models[model] = ChatModel(model=model_id)
+        return self._chat_models[model]
+
+    async def _ask(self, model, prompt):
+        response = await self._chat_model(model).ainvoke(prompt)
+        return response.content
+
+    async def check_grammar(self, model, text):
+        content = await self._ask(model, GRAMMAR_PROMPT.format(text=text))
+        try:
+            return _parse_json(content)
+        except ValueError:
+            raise ModelUnavailableError("The model returned an invalid grammar check.")
+
+    async def paraphrase(self, model, text, style):
+        return (await self._ask(model, PARAPHRASE_PROMPT.format(style=style, text=text))).strip()
+
+    async def _ask_batch(self, model, prompt, texts, **fields):
+        content = await self._ask(model, prompt.format(texts=json.dumps(texts, ensure_ascii=False), **fields))
+        try:
+            results = _parse_json(content)
+        except ValueError:
+            results = None
+        if not isinstance(results, list) or len(results) != len(texts):
+            raise ModelUnavailableError("The model returned an invalid batch answer.")
+        return results
+
+    async def check_grammar_batch(self, model, texts):
+        # A batch of one keeps the simpler single-text prompt
+        if len(texts) == 1:
+            return [await self.check_grammar(model, texts[0])]
+        return await self._ask_batch(model, GRAMMAR_BATCH_PROMPT, texts)
+
+    async def paraphrase_batch(self, model, texts, style):
+        if len(texts) == 1:
+            return [await self.paraphrase(model, texts[0], style)]
+        results = await self._ask_batch(model, PARAPHRASE_BATCH_PROMPT, texts, style=style)
+        return [str(result).strip() for result in results]
+
+    def _messages(self, message, history):
+        return [(m["role"], m["content"]) for m in history] + [("user", message)]
+
+    async def chat(self, model, message, history):
+        return await self._ask(model, self._messages(message, history))
+
+    async def stream_chat(self, model, message, history):
+        async for chunk in self._chat_model(model).astream(self._messages(message, history)):
+            if chunk.content:
+                yield chunk.content
+
+
+BACKENDS = {"fake": FakeBackend, "langchain": LangChainBackend}
+
+
+def load_backend(name=None):
+    """
+    Creates the configured model backend.
+
+    Args:
+        name (str, optional): Key of BACKENDS; defaults to RAG_TOOLBOX_MODEL_BACKEND or "fake"
+
+    Returns:
+        ModelBackend: The backend
+
+    Raises:
+        ValueError: If the name is not a known backend
+    """
+    name = name or os.environ.get(MODEL_BACKEND_ENV_VAR, DEFAULT_BACKEND)
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown model backend '{name}'. Available: {', '.join(BACKENDS)}.")
+    return BACKENDS[name]()
@@ -0,0 +1,155 @@
+import asyncio
+import os
+import time
+
+# Largest number of requests packed into one model call, and the longest a
+# request waits for others to join it (milliseconds)
+BATCH_SIZE_ENV_VAR = "RAG_TOOLBOX_BATCH_SIZE"
+BATCH_WAIT_ENV_VAR = "RAG_TOOLBOX_BATCH_WAIT_MS"
+DEFAULT_MAX_BATCH_SIZE = 16
+DEFAULT_MAX_WAIT_MS = 5
+
+
+class MicroBatcher:
+    """Packs concurrent requests into multi-item model calls.
+
+    Requests are grouped by a key (the model, and the style for
+    paraphrasing) since only requests for the same call can share it. The
+    first request for a key starts a max_wait timer; the batch is sent when
+    the timer fires or max_batch_size requests are waiting, whichever comes
+    first, and the results are handed back to each waiting caller. Batches
+    run concurrently, so a slow model call does not hold up the next batch.
+    """
+
+    def __init__(self, handler, max_batch_size=None, max_wait=None):
+        """
+        Initializes the batcher.
+
+        Args:
+            handler (callable): Coroutine function handler(key, items) returning one result per item
+            max_batch_size (int, optional): Defaults to RAG_TOOLBOX_BATCH_SIZE or 16; 1 disables batching
+            max_wait (float, optional): Seconds; defaults to RAG_TOOLBOX_BATCH_WAIT_MS or 5 ms
+        """
+        self.handler = handler
+        self.max_batch_size = max_batch_size or int(os.environ.get(BATCH_SIZE_ENV_VAR, DEFAULT_MAX_BATCH_SIZE))
+        if max_wait is None:
+            max_wait = float(os.environ.get(BATCH_WAIT_ENV_VAR, DEFAULT_MAX_WAIT_MS)) / 1000
+        self.max_wait = max_wait
+        self._pending = {}  # key -> [(item, future)]
+        self._timers = {}  # key -> TimerHandle
+        self._tasks = set()  # running batches, referenced so they are not collected
+        self.batches = 0
+        self.items = 0
+
+    async def submit(self, key, item):
+        """
+        Adds a request to the next batch for its key and waits for its result.
+
+        Args:
+            key (hashable): Requests with equal keys may share a model call
+            item: The request's input
+
+        Returns:
+            The handler's result for this item
+
+        Raises:
+            Exception: Whatever the handler raised for the batch
+        """
+        if self.max_batch_size <= 1:
+            self.batches += 1
+            self.items += 1
+            return (await self.handler(key, [item]))[0]
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        batch = self._pending.setdefault(key, [])
+        batch.append((item, future))
+        if len(batch) >= self.max_batch_size:
+            self._flush(key)
+        elif len(batch) == 1:
+            self._timers[key] = loop.call_later(self.max_wait, self._flush, key)
+        return await future
+
+    def _flush(self, key):
+        timer = self._timers.pop(key, None)
+        if timer:
+            timer.cancel()
+        batch = self._pending.pop(key, None)
+        if batch:
+            task = asyncio.ensure_future(self._dispatch(key, batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(self, key, batch):
+        self.batches += 1
+        self.items += len(batch)
+        try:
+            results = await self.handler(key, [item for item, _ in batch])
+            if len(results) != len(batch):
+                raise RuntimeError(f"Batch handler returned {len(results)} results for {len(batch)} requests.")
+            for (_, future), result in zip(batch, results):
+                # A caller that disconnected has cancelled its future
+                if not future.done():
+                    future.set_result(result)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            # Cancellation or another BaseException must not leave callers waiting forever
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(RuntimeError("The batch was interrupted before it finished."))
+
+    def stats(self):
+        """
+        Returns batching counters.
+
+        Returns:
+            dict: Model calls made, requests served and the mean batch size
+        """
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0
+        }
+
+
+if __name__ == "__main__":
+    # Throughput and latency of grammar checks against the fake model with
+    # 50 ms per call and at most 4 calls at once, like a throttled provider
+    from api.backends import FakeBackend
+
+    CONFIGS = [(1, 0), (4, 0.002), (8, 0.005), (16, 0.005), (32, 0.010)]
+    REQUESTS_PER_CLIENT = 10
+
+    async def run(clients, max_batch_size, max_wait):
+        backend = FakeBackend(latency=0.05, max_concurrency=4)
+        batcher = MicroBatcher(backend.check_grammar_batch, max_batch_size, max_wait)
+        latencies = []
+
+        async def client(n):
+            for i in range(REQUESTS_PER_CLIENT):
+                started = time.perf_counter()
+                await batcher.submit("gemini", f"client {n} sends teh text number {i}")
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client(n) for n in range(clients)))
+        seconds = time.perf_counter() - started
+        latencies.sort()
+        return (
+            len(latencies) / seconds,
+            latencies[len(latencies) // 2] * 1000,
+            latencies[int(len(latencies) * 0.95)] * 1000,
+            backend.calls
+        )
+
+    print(f"{'clients':>7} {'batch':>5} {'wait':>6} {'req/s':>8} {'p50 ms':>7} {'p95 ms':>7} {'calls':>6}")
+    for clients in (1, 64):
+        for max_batch_size, max_wait in CONFIGS:
+            throughput, p50, p95, calls = asyncio.run(run(clients, max_batch_size, max_wait))
+            print(
+                f"{clients:>7} {max_batch_size:>5} {max_wait * 1000:>4.0f}ms {throughput:>8.1f} "
+                f"{p50:>7.1f} {p95:>7.1f} {calls:>6}"
+            )
@@ -0,0 +1,147 @@
+"""RAG ToolBox backend service.
+
+Serves the grammar, paraphrasing and chat contracts the Streamlit pages
+call. Run it with several workers, e.g.
+
+    uvicorn api.main:app --workers 4
+
+and point the app at it with RAG_TOOLBOX_API_BASE_URL=http://localhost:8000.
+"""
+import json
+from contextlib import asynccontextmanager
+
+from fastapi import Depends, FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from api.backends import ModelNotFoundError, ModelUnavailableError, load_backend
+from api.batching import MicroBatcher
+from api.schemas import (ChatRequest, ChatResponse, GrammarRequest, GrammarResponse, ParaphraseRequest,
+                         ParaphraseResponse)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # One backend per worker process, created before the first request
+    backend = app.state.backend = load_backend()
+    # Concurrent grammar and paraphrase requests share model calls
+    app.state.grammar_batcher = MicroBatcher(backend.check_grammar_batch)
+    app.state.paraphrase_batcher = MicroBatcher(
+        lambda key, texts: backend.paraphrase_batch(key[0], texts, key[1])
+    )
+    yield
+
+
+app = FastAPI(title="RAG ToolBox API", lifespan=lifespan)
+
+
+def get_backend(request: Request):
+    return request.app.state.backend
+
+
+@app.exception_handler(ModelNotFoundError)
+async def model_not_found(request, exc):
+    return JSONResponse(status_code=404, content={"error": str(exc)})
+
+
+@app.exception_handler(ModelUnavailableError)
+async def model_unavailable(request, exc):
+    return JSONResponse(status_code=503, content={"error": str(exc)})
+
+
+@app.get("/health")
+async def health(request: Request):
+    return {
+        "status": "ok",
+        "batching": {
+            "grammar": request.app.state.grammar_batcher.stats(),
+            "paraphrase": request.app.state.paraphrase_batcher.stats()
+        }
+    }
+
+
+@app.post("/grammar/{llm}/check_grammar", response_model=GrammarResponse)
+async def check_grammar(llm: str, body: GrammarRequest, request: Request, backend=Depends(get_backend)):
+    # Checked up front, so an unknown model fails alone instead of failing its batch
+    backend.check_model(llm)
+    result = await request.app.state.grammar_batcher.submit(llm, body.text)
+    return dict(result, original_text=body.text)
+
+
+@app.post("/paraphraser/{llm}/paraphrase", response_model=ParaphraseResponse)
+async def paraphrase(llm: str, body: ParaphraseRequest, request: Request, backend=Depends(get_backend)):
+    backend.check_model(llm)
+    paraphrased = await request.app.state.paraphrase_batcher.submit((llm, body.style), body.text)
+    return {"original_text": body.text, "paraphrased_text": paraphrased}
+
+
+@app.post("/chat/{model}/chat", response_model=ChatResponse)
+async def chat(model: str, body: ChatRequest, backend=Depends(get_backend)):
+    history = [message.model_dump() for message in body.conversation_history]
+    if not body.stream:
+        return {"response": await backend.chat(model, body.message, history)}
+
+    # Fail before the stream starts, so an unknown model still gets a 404
+    backend.check_model(model)
+
+    async def events():
+        # Server-sent events in the shape APIClient.stream_post consumes
+        async for piece in backend.stream_chat(model, body.message, history):
+            yield f"data: {json.dumps({'response': piece})}\n\n"
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+if __name__ == "__main__":
+    # Time to first token of an AI Chat answer, streamed over the SSE route
+    # versus sent whole, through the app's APIClient. The fake model takes
+    # FAKE_LATENCY seconds per answer.
+    import os
+    import socket
+    import threading
+    import time
+
+    import uvicorn
+
+    from api.backends import FAKE_LATENCY_ENV_VAR
+    from app.utils.api_client import APIClient
+
+    FAKE_LATENCY = 2.0
+    REQUESTS = 10
+
+    os.environ[FAKE_LATENCY_ENV_VAR] = str(FAKE_LATENCY)
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+
+    client = APIClient()
+    url = f"http://127.0.0.1:{port}/chat/gemini/chat"
+
+    def whole(n):
+        payload = {"message": f"Question {n}: how do I improve my essays?", "conversation_history": []}
+        started = time.perf_counter()
+        client.post(url, payload, endpoint="chat").json()
+        seconds = time.perf_counter() - started
+        return seconds, seconds
+
+    def streamed(n):
+        payload = {"message": f"Question {n}: how do I improve my essays?", "conversation_history": []}
+        started = time.perf_counter()
+        first = None
+        for _ in client.stream_post(url, payload, endpoint="chat"):
+            if first is None:
+                first = time.perf_counter() - started
+        return first, time.perf_counter() - started
+
+    print(f"fake model latency {FAKE_LATENCY:.1f} s per answer, {REQUESTS} requests")
+    print(f"{'':<10} {'first token p50 ms':>18} {'full answer p50 ms':>18}")
+    for name, send in (("whole", whole), ("streamed", streamed)):
+        results = [send(n) for n in range(REQUESTS)]
+        first = sorted(r[0] for r in results)[REQUESTS // 2] * 1000
+        full = sorted(r[1] for r in results)[REQUESTS // 2] * 1000
+        print(f"{name:<10} {first:>18.0f} {full:>18.0f}")
+    server.should_exit = True
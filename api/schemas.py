@@ -0,0 +1,53 @@
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+
+class GrammarRequest(BaseModel):
+    text: str
+
+
+class GrammarRule(BaseModel):
+    rule_name: str
+    description: str
+    correct_examples: List[str] = []
+    incorrect_examples: List[str] = []
+
+
+class Correction(BaseModel):
+    type: str
+    error: str
+    suggestion: str
+    explanation: str
+    grammar_rule: Optional[GrammarRule] = None
+
+
+class GrammarResponse(BaseModel):
+    original_text: str
+    corrected_text: str
+    corrections: List[Correction]
+
+
+class ParaphraseRequest(BaseModel):
+    text: str
+    style: str = "Fluency"
+
+
+class ParaphraseResponse(BaseModel):
+    original_text: str
+    paraphrased_text: str
+
+
+class ChatMessage(BaseModel):
+    role: str
+    content: str
+
+
+class ChatRequest(BaseModel):
+    message: str
+    conversation_history: List[ChatMessage] = []
+    stream: bool = False
+
+
+class ChatResponse(BaseModel):
+    response: str
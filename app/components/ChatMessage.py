@@ -0,0 +1,89 @@
+from functools import lru_cache
+
+import streamlit as st
+
+from app.utils.instrumentation import span
+
+
+@lru_cache(maxsize=4096)
+def message_html(role, content):
+    """
+    Returns the HTML for one chat message, built once per distinct message.
+
+    Args:
+        role (str): 'user' or 'assistant'
+        content (str): The text content of the message
+
+    Returns:
+        str: HTML snippet styled by the .chat-message rules
+    """
+    if role == "user":
+        return f"<div class='chat-message user'><div class='message'>🧑‍💻 <b>You:</b> {content}</div></div>"
+    return f"<div class='chat-message assistant'><div class='message'>🤖 <b>AI:</b> {content}</div></div>"
+
+
+def render_chat_history(messages):
+    """
+    Renders a window of chat messages as a single markdown element.
+
+    Args:
+        messages (list): Message objects with 'role' and 'content'
+    """
+    if messages:
+        with span("render", phase="chat_history"):
+            st.markdown(
+                "".join(message_html(message["role"], message["content"]) for message in messages),
+                unsafe_allow_html=True
+            )
+
+
+if __name__ == "__main__":
+    # Rerun time of the AI Chat page as the conversation grows, against
+    # rendering every message as its own element like the page used to
+    import os
+    import tempfile
+    import time
+
+    from streamlit.testing.v1 import AppTest
+
+    from app.utils.history_store import HISTORY_DB_ENV_VAR
+
+    PAGE = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "pages", "AI_Chat.py"))
+    RUNS = 10
+
+    os.environ[HISTORY_DB_ENV_VAR] = os.path.join(tempfile.mkdtemp(), "history.sqlite3")
+    from app.utils.history_store import get_history_store
+
+    def render_all():
+        import streamlit as st
+
+        from app.components.ChatMessage import message_html
+
+        for message in st.session_state.messages:
+            st.markdown(message_html(message["role"], message["content"]), unsafe_allow_html=True)
+
+    def rerun_ms(app):
+        app.run()
+        started = time.perf_counter()
+        for _ in range(RUNS):
+            app.run()
+        return (time.perf_counter() - started) / RUNS * 1000
+
+    store = get_history_store()
+    print(f"{'messages':>8} {'windowed page ms':>16} {'render all ms':>13}")
+    for count in (20, 200, 2000):
+        session = f"benchmark{count:023d}"
+        messages = [
+            {"role": "user" if i % 2 == 0 else "assistant", "content": f"Message {i}: " + "some text " * 30,
+             "timestamp": time.time()}
+            for i in range(count)
+        ]
+        for message in messages:
+            store.append(session, "chat", message)
+        store.flush()
+
+        page = AppTest.from_file(PAGE, default_timeout=60)
+        page.session_state["chat_history_id"] = session
+        baseline = AppTest.from_function(render_all, default_timeout=60)
+        baseline.session_state["messages"] = messages
+        print(f"{count:>8} {rerun_ms(page):>16.1f} {rerun_ms(baseline):>13.1f}")
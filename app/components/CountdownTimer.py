@@ -0,0 +1,75 @@
+import streamlit.components.v1 as components
+
+
+def countdown_timer(seconds_left, label="Time Left"):
+    """
+    Renders a countdown that ticks in the browser without rerunning the script.
+
+    Args:
+        seconds_left (float): Seconds remaining when the page is rendered
+        label (str): Text shown before the remaining time
+    """
+    components.html(
+        f"""
+        <div id="countdown" style="font-family: sans-serif; font-size: 1.75rem; font-weight: 600; color: #31333F;"></div>
+        <script>
+            const end = Date.now() + {max(0, seconds_left) * 1000:.0f};
+            const element = document.getElementById("countdown");
+            function tick() {{
+                const remaining = Math.max(0, Math.round((end - Date.now()) / 1000));
+                if (remaining === 0) {{
+                    element.style.color = "#ff4b4b";
+                    element.textContent = "Time's Up!";
+                    return;
+                }}
+                const minutes = String(Math.floor(remaining / 60)).padStart(2, "0");
+                const seconds = String(remaining % 60).padStart(2, "0");
+                element.textContent = "{label}: " + minutes + ":" + seconds;
+                setTimeout(tick, 250);
+            }}
+            tick();
+        </script>
+        """,
+        height=50
+    )
+
+
+if __name__ == "__main__":
+    # Server CPU for users sitting in an active Writing Challenge: the old
+    # countdown reran the whole page every second, the browser countdown
+    # only reruns it when the user acts (about every INTERACTION_INTERVAL s)
+    import os
+    import time
+    from datetime import datetime, timedelta
+
+    from streamlit.testing.v1 import AppTest
+
+    PAGE = os.path.join(os.path.dirname(__file__), "..", "..", "pages", "Writing_Challenge.py")
+    INTERACTION_INTERVAL = 30
+    RUNS = 50
+
+    app = AppTest.from_file(os.path.abspath(PAGE), default_timeout=60)
+    app.session_state["selected_llm"] = "gemini"
+    app.session_state["challenge_active"] = True
+    app.session_state["writing_challenge_data"] = {
+        "prompt": "IELTS Writing Task 2: Discuss both views and give your own opinion.",
+        "start_time": datetime.now(),
+        "end_time": datetime.now() + timedelta(minutes=20),
+        "user_response": "Some people believe that universities should focus on academic skills. " * 10,
+        "on_time_response": "",
+        "late_submission": False,
+        "feedback": None,
+        "band_score": None
+    }
+    app.run()
+
+    started = time.process_time()
+    for _ in range(RUNS):
+        app.run()
+    cpu_per_run = (time.process_time() - started) / RUNS
+
+    print(f"one run of the active challenge page: {cpu_per_run * 1000:.1f} ms CPU")
+    print(f"{'users':>6} {'1 s rerun loop':>16} {'browser countdown':>18}")
+    for users in (10, 50, 200):
+        print(f"{users:>6} {users * cpu_per_run:>15.0%}  {users * cpu_per_run / INTERACTION_INTERVAL:>17.1%}")
+    print("(share of one CPU core)")
@@ -0,0 +1,47 @@
+import threading
+from collections import deque
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from app.utils.instrumentation import capture_spans, get_metrics_server
+
+# Adding ?debug=1 to a page URL turns the panel on for that session
+DEBUG_PARAM = "debug"
+MAX_DEBUG_SPANS = 50
+
+
+def debug_panel():
+    """
+    Starts the /metrics endpoint and, for sessions that opened the page with
+    ?debug=1, shows their most recent timing spans in the sidebar.
+
+    Call it near the top of a page, so the spans of the whole run are shown.
+    """
+    get_metrics_server()
+    # A sink left by an earlier run on this thread must not receive this run's spans
+    capture_spans(None)
+    if st.query_params.get(DEBUG_PARAM) != "1":
+        return
+
+    if "debug_spans" not in st.session_state:
+        st.session_state.debug_spans = deque(maxlen=MAX_DEBUG_SPANS)
+    spans = st.session_state.debug_spans
+    with st.sidebar.expander("Timings", expanded=True):
+        table = st.empty()
+    script_thread = threading.get_ident()
+
+    def render():
+        table.dataframe(list(reversed(spans)), use_container_width=True, hide_index=True)
+
+    run = get_script_run_ctx()
+
+    def record(name, labels, seconds):
+        spans.append({"span": name, "labels": ", ".join(f"{k}={v}" for k, v in labels), "ms": round(seconds * 1000, 2)})
+        # Spans from worker threads show up with the next one on the script thread;
+        # another session's script on this thread never draws into this placeholder
+        if threading.get_ident() == script_thread and get_script_run_ctx() is run:
+            render()
+
+    capture_spans(record)
+    render()
@@ -0,0 +1,33 @@
+from contextlib import contextmanager, nullcontext
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from app.utils.rate_limit import admission_scope
+
+
+@contextmanager
+def queue_status(label=None):
+    """
+    Shows a spinner while the block runs, and the request's place in the
+    admission queue whenever it has to wait.
+
+    Requests made inside the block count against this browser session's
+    rate limit.
+
+    Args:
+        label (str, optional): Spinner text; no spinner when None, e.g. for streamed output
+    """
+    ctx = get_script_run_ctx()
+    placeholder = st.empty()
+
+    def on_wait(position, eta):
+        # Called on the script thread, also for waits of chunk, tool and hedge workers
+        if position == 0:
+            placeholder.info(f"⏳ Too many requests from this session; continuing in about {eta:.0f} s.")
+        else:
+            placeholder.info(f"⏳ The service is busy. You are number {position} in the queue, about {eta:.0f} s to go.")
+
+    with st.spinner(label) if label else nullcontext(), admission_scope(ctx.session_id if ctx else None, on_wait):
+        yield
+    placeholder.empty()
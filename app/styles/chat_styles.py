@@ -0,0 +1,149 @@
+import json
+import os
+
+import streamlit as st
+import streamlit.components.v1 as components
+
+from app.styles.fonts import FONT_DIR
+
+# Served by Streamlit's static file serving (.streamlit/config.toml) from
+# static/fonts; fetch the files with `python -m app.styles.fonts`
+FONT_DIR_URL = "app/static/fonts"
+
+
+def _font_src(local_name, filename):
+    # Files that were never downloaded are left out rather than requested and
+    # 404'd; the browser then uses an installed copy or the sans-serif fallback.
+    # Checked at import, so fonts fetched later apply after a restart.
+    if os.path.exists(os.path.join(FONT_DIR, filename)):
+        return f'local("{local_name}"), url("{FONT_DIR_URL}/{filename}") format("woff2")'
+    return f'local("{local_name}")'
+
+
+# Only the last font-family of the old rules ever applied, so Sofia Sans is
+# the one family the theme needs
+BASE_CSS = f"""
+@font-face {{
+    font-family: "Sofia Sans";
+    font-style: normal;
+    font-weight: 1 1000;
+    font-display: swap;
+    src: {_font_src("Sofia Sans", "sofia-sans-latin-normal.woff2")};
+    unicode-range: U+0000-00FF, U+0131, U+0152-0153, U+02BB-02BC, U+02C6, U+02DA, U+02DC,
+        U+0304, U+0308, U+0329, U+2000-206F, U+20AC, U+2122, U+2191, U+2193, U+2212, U+2215, U+FEFF, U+FFFD;
+}}
+
+@font-face {{
+    font-family: "Sofia Sans";
+    font-style: italic;
+    font-weight: 1 1000;
+    font-display: swap;
+    src: {_font_src("Sofia Sans Italic", "sofia-sans-latin-italic.woff2")};
+    unicode-range: U+0000-00FF, U+0131, U+0152-0153, U+02BB-02BC, U+02C6, U+02DA, U+02DC,
+        U+0304, U+0308, U+0329, U+2000-206F, U+20AC, U+2122, U+2191, U+2193, U+2212, U+2215, U+FEFF, U+FFFD;
+}}
+
+html, body, [class*="css"], .stApp {{
+    font-family: "Sofia Sans", sans-serif;
+}}
+
+h1, h2, h3, h4, h5, h6 {{
+    font-family: "Sofia Sans", sans-serif !important;
+}}
+
+.footer {{
+    position: fixed;
+    left: 0;
+    bottom: 0;
+    width: 100%;
+    color: #888;
+    padding: 10px;
+    text-align: right;
+    font-size: 14px;
+    z-index: 999;
+}}
+"""
+
+# Message bubbles of the AI Chat page (app.components.ChatMessage)
+CHAT_CSS = """
+.chat-message {
+    padding: 1.5rem;
+    border-radius: 0.5rem;
+    margin-bottom: 1rem;
+    display: flex;
+    box-shadow: 0 2px 5px rgba(0,0,0,0.1);
+}
+
+.chat-message.user {
+    background-color: #f0f2f6;
+    border-left: 5px solid #7c7c7c;
+}
+
+.chat-message.assistant {
+    background-color: #e6f7ff;
+    border-left: 5px solid #2b6cb0;
+}
+
+.chat-message .avatar {
+    width: 20%;
+}
+
+.chat-message .avatar img {
+    max-width: 78px;
+    max-height: 78px;
+    border-radius: 50%;
+    object-fit: cover;
+}
+
+.chat-message .message {
+    width: 80%;
+    padding: 0 1.5rem;
+    color: #333333;
+}
+"""
+
+STYLESHEETS = {"base": BASE_CSS, "chat": CHAT_CSS}
+
+
+def _inject(name, css):
+    # A style element added to the app's own document outlives the script
+    # run that added it, so it is not re-sent on every rerun
+    components.html(
+        f"""
+        <script>
+            const doc = window.parent.document;
+            if (!doc.getElementById("rag-toolbox-{name}")) {{
+                const style = doc.createElement("style");
+                style.id = "rag-toolbox-{name}";
+                style.textContent = {json.dumps(css)};
+                doc.head.appendChild(style);
+            }}
+        </script>
+        """,
+        height=0
+    )
+
+
+def apply_chat_styles(*names):
+    """
+    Injects the shared theme, plus optional named stylesheets, once per session.
+
+    Args:
+        *names (str): Extra stylesheets from STYLESHEETS, e.g. "chat"
+    """
+    if "injected_styles" not in st.session_state:
+        st.session_state.injected_styles = set()
+    for name in ("base", *names):
+        if name not in st.session_state.injected_styles:
+            _inject(name, STYLESHEETS[name])
+            st.session_state.injected_styles.add(name)
+
+
+def create_footer(text):
+    """
+    Renders the fixed footer; its styling comes from the shared theme.
+
+    Args:
+        text (str): HTML content of the footer
+    """
+    st.markdown(f'<div class="footer">{text}</div>', unsafe_allow_html=True)
@@ -0,0 +1,48 @@
+import os
+import re
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+FONT_DIR = os.path.join(ROOT, "static", "fonts")
+
+GOOGLE_FONTS_CSS = "https://fonts.googleapis.com/css2?family=Sofia+Sans:ital,wght@0,1..1000;1,1..1000&display=swap"
+# Google Fonts only serves woff2 to browsers it recognises
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36"
+
+FONT_FACE = re.compile(r"/\* (?P<subset>[\w-]+) \*/\s*@font-face\s*{(?P<body>[^}]*)}")
+
+
+def download_fonts(subset="latin", directory=FONT_DIR):
+    """
+    Downloads one subset of the theme's font so the app can serve it itself.
+
+    Args:
+        subset (str): Google Fonts unicode subset, e.g. "latin"
+        directory (str): Where to write the .woff2 files
+
+    Returns:
+        list: Paths of the files written
+    """
+    css = requests.get(GOOGLE_FONTS_CSS, headers={"User-Agent": USER_AGENT}, timeout=30)
+    css.raise_for_status()
+
+    os.makedirs(directory, exist_ok=True)
+    written = []
+    for match in FONT_FACE.finditer(css.text):
+        if match["subset"] != subset:
+            continue
+        style = re.search(r"font-style:\s*(\w+)", match["body"])[1]
+        url = re.search(r"url\((\S+?)\)", match["body"])[1]
+        path = os.path.join(directory, f"sofia-sans-{subset}-{style}.woff2")
+        font = requests.get(url, timeout=30)
+        font.raise_for_status()
+        with open(path, "wb") as f:
+            f.write(font.content)
+        written.append(path)
+    return written
+
+
+if __name__ == "__main__":
+    for path in download_fonts():
+        print(f"{path}: {os.path.getsize(path) / 1024:.0f} KB")
@@ -0,0 +1,418 @@
+import contextvars
+import json
+import os
+import random
+import time
+from contextlib import contextmanager
+
+import requests
+import streamlit as st
+
+from app.utils import cancellation
+from app.utils.cancellation import CancellableAdapter, RequestCancelledError, cancel_requested
+from app.utils.endpoint_health import EndpointUnavailableError, HealthRegistry, host_of
+from app.utils.hedging import get_latency_registry
+from app.utils.instrumentation import get_metrics_registry, span
+from app.utils.rate_limit import AdmissionController, current_admission_scope
+
+# --- Backend endpoints --- #
+# Base URL of the grammar/paraphrase/chat service; point it at a local
+# `uvicorn api.main:app` with RAG_TOOLBOX_API_BASE_URL
+API_BASE_URL = os.environ.get(
+    "RAG_TOOLBOX_API_BASE_URL", "https://langchain-grammar-check-api.onrender.com"
+).rstrip("/")
+PLAGIARISM_API_URL = "https://bdstall-duplicate-content-checking-api.onrender.com/api/v1/ai/moderation/content-duplication-check"
+WATERMARK_API_ENDPOINTS = [
+    "http://128.199.144.145:8002/api/v1/ai/image_title_relevancy/check_image",
+    "http://128.199.144.145:8002/api/v1/ai/image_health_check/check_image"
+]
+
+# (connect, read) timeouts in seconds for each logical endpoint
+ENDPOINT_TIMEOUTS = {
+    "grammar": (3.05, 60),
+    "paraphrase": (3.05, 60),
+    "chat": (3.05, 90),
+    "plagiarism": (3.05, 30),
+    "watermark": (3.05, 20),
+    "image_download": (3.05, 20),
+}
+DEFAULT_TIMEOUT = (3.05, 30)
+
+# Gateway errors returned by onrender while a backend is cold starting
+RETRY_STATUS_CODES = {502, 503, 504}
+
+# LLM endpoints pass admission control before a request is sent
+ADMISSION_ENDPOINTS = {"grammar", "paraphrase", "chat"}
+ADMISSION_LIMITS = {
+    "global_rate": 20.0,  # requests per second across all sessions
+    "global_burst": 40,
+    "model_rate": 10.0,  # requests per second to each model
+    "model_burst": 20,
+    "session_rate": 1.0,  # user actions per second from each browser session
+    "session_burst": 10,
+    "max_queue": 50,
+    "max_queue_wait": 15.0,
+    "max_session_wait": 20.0,
+}
+
+# time.monotonic() by which the requests made in the current context must finish
+_deadline = contextvars.ContextVar("request_deadline", default=None)
+
+
+@contextmanager
+def request_deadline(expires_at):
+    """
+    Bounds the requests made inside the block by an absolute deadline.
+
+    Timeouts are shortened to the time left and no retry starts after the
+    deadline, so a caller that gives up on a request does not leave it
+    running in a worker thread.
+
+    Args:
+        expires_at (float): Deadline as a time.monotonic() value
+    """
+    token = _deadline.set(expires_at)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def _timeout_for(endpoint):
+    # The endpoint's (connect, read) timeouts, cut to the current deadline
+    if cancel_requested():
+        raise RequestCancelledError("The request was cancelled.")
+    timeout = ENDPOINT_TIMEOUTS.get(endpoint, DEFAULT_TIMEOUT)
+    expires_at = _deadline.get()
+    if expires_at is None:
+        return timeout
+    remaining = expires_at - time.monotonic()
+    if remaining <= 0:
+        raise requests.exceptions.Timeout("The request deadline has passed.")
+    return tuple(min(limit, remaining) for limit in timeout)
+
+
+class APIClient:
+    """Client for the RAG ToolBox backends.
+
+    All requests go through one requests.Session, so TCP and TLS connections
+    are kept alive and reused instead of being opened on every click. A
+    HealthRegistry tracks every backend host, so requests to a host that is
+    known to be down fail immediately instead of waiting for a timeout.
+    Requests to the LLM endpoints first pass an AdmissionController, which
+    queues them under load and rejects them quickly once the queue is full.
+    """
+
+    def __init__(self, pool_connections=4, pool_maxsize=16, max_retries=2,
+                 backoff_base=0.5, backoff_max=8.0, admission=None):
+        """
+        Initializes the API client.
+
+        Args:
+            pool_connections (int): Number of host pools to keep
+            pool_maxsize (int): Maximum open connections per host
+            max_retries (int): Retries after the first attempt on connection
+                errors, timeouts and gateway errors
+            backoff_base (float): Base delay in seconds for exponential backoff
+            backoff_max (float): Upper bound of a single backoff delay
+            admission (AdmissionController, optional): Defaults to one built from ADMISSION_LIMITS
+        """
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.health = HealthRegistry()
+        self.admission = admission or AdmissionController(**ADMISSION_LIMITS)
+
+        self.session = requests.Session()
+        self.session.headers.update({"Content-Type": "application/json"})
+        # Lets a CancelToken cut short a request that is no longer wanted
+        adapter = CancellableAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=True
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def post(self, url, payload, endpoint=None, model=None, admit=True):
+        """
+        Sends a JSON POST request, retrying transient failures.
+
+        Args:
+            url (str): Full URL of the backend route
+            payload (dict): JSON body of the request
+            endpoint (str, optional): Logical endpoint name used to pick the timeout
+            model (str, optional): Model the request is for, used by admission control
+            admit (bool): False if the caller already passed admit() for this request
+
+        Returns:
+            requests.Response: The last response received
+
+        Raises:
+            AdmissionRejectedError: If the request would wait too long to be sent
+            EndpointUnavailableError: If the host's circuit breaker is open
+            requests.exceptions.RequestException: If every attempt failed to connect
+        """
+        if admit:
+            self.admit(endpoint, model)
+        return self._request("POST", url, endpoint, model, json=payload)
+
+    def get(self, url, endpoint=None, **kwargs):
+        """
+        Sends a GET request, retrying transient failures.
+
+        Args:
+            url (str): Full URL to fetch
+            endpoint (str, optional): Logical endpoint name used to pick the timeout
+            **kwargs: Passed on to requests, e.g. stream=True
+
+        Returns:
+            requests.Response: The last response received
+
+        Raises:
+            EndpointUnavailableError: If the host's circuit breaker is open
+            requests.exceptions.RequestException: If every attempt failed to connect
+        """
+        return self._request("GET", url, endpoint, None, **kwargs)
+
+    def _request(self, method, url, endpoint, model, **kwargs):
+        with span("backend_call", endpoint=endpoint or "other"):
+            return self._attempts(method, url, endpoint, model, **kwargs)
+
+    def _attempts(self, method, url, endpoint, model, **kwargs):
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            # Before the breaker check, so a passed deadline does not take a half-open trial
+            timeout = _timeout_for(endpoint)
+            self._check_available(url)
+            started = time.perf_counter()
+            try:
+                response = self.session.request(method, url, timeout=timeout, **kwargs)
+            except requests.exceptions.RequestException as e:
+                if cancel_requested():
+                    # Cut short by its CancelToken; the host did nothing wrong
+                    self.health.release_trial(url)
+                    raise RequestCancelledError("The request was cancelled.") from e
+                self.health.record_failure(url)
+                retryable = isinstance(e, (requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+                if last_attempt or not retryable:
+                    raise
+            except BaseException:
+                # Says nothing about the host, e.g. the script was stopped
+                self.health.release_trial(url)
+                raise
+            else:
+                self._record_status(url, response.status_code)
+                # Only successful model calls set the hedge delay
+                if response.ok and model is not None:
+                    get_latency_registry().record(endpoint, model, time.perf_counter() - started)
+                if last_attempt or response.status_code not in RETRY_STATUS_CODES:
+                    return response
+                response.close()
+            delay = self._backoff_delay(attempt)
+            expires_at = _deadline.get()
+            if expires_at is not None:
+                delay = min(delay, max(0.0, expires_at - time.monotonic()))
+            cancellation.sleep(delay)
+
+    def stream_post(self, url, payload, endpoint=None, field="response", model=None):
+        """
+        Sends a JSON POST request and yields the response text as it arrives.
+
+        Server-sent events and newline-delimited JSON bodies are consumed chunk
+        by chunk. Backends that do not support streaming answer with a single
+        JSON body, which is yielded as one chunk. Streams are not retried, since
+        part of the answer may already have been shown.
+
+        Args:
+            url (str): Full URL of the backend route
+            payload (dict): JSON body of the request
+            endpoint (str, optional): Logical endpoint name used to pick the timeout
+            field (str): Key holding the text in each JSON chunk
+            model (str, optional): Model the request is for, used by admission control
+
+        Yields:
+            str: Pieces of the response text
+        """
+        headers = {"Accept": "text/event-stream, application/x-ndjson, application/json"}
+
+        self.admit(endpoint, model)
+        timeout = _timeout_for(endpoint)
+        self._check_available(url)
+        # Timed until the stream ends, so the span covers the whole answer
+        with span("backend_stream", endpoint=endpoint or "other"):
+            yield from self._stream(url, payload, field, timeout, headers)
+
+    def _stream(self, url, payload, field, timeout, headers):
+        try:
+            response = self.session.post(url, json=dict(payload, stream=True), headers=headers,
+                                         timeout=timeout, stream=True)
+        except requests.exceptions.RequestException:
+            self.health.record_failure(url)
+            raise
+        except BaseException:
+            self.health.release_trial(url)
+            raise
+        self._record_status(url, response.status_code)
+
+        with response:
+            response.raise_for_status()
+            response.encoding = response.encoding or "utf-8"
+            content_type = response.headers.get("Content-Type", "")
+
+            if content_type.startswith("text/event-stream"):
+                yield from _iter_sse(response, field)
+            elif content_type.startswith("application/x-ndjson"):
+                for line in response.iter_lines(decode_unicode=True):
+                    if line:
+                        yield _chunk_text(line, field)
+            else:
+                yield response.json()[field]
+
+    def admit(self, endpoint, model=None):
+        """
+        Waits until a request to an LLM endpoint may be sent; other endpoints pass at once.
+
+        Retries of an admitted request are not admitted again.
+
+        Args:
+            endpoint (str): Logical endpoint name
+            model (str, optional): Model the request is for
+
+        Raises:
+            AdmissionRejectedError: If the request would wait too long to be sent
+        """
+        if endpoint in ADMISSION_ENDPOINTS:
+            scope = current_admission_scope()
+            with span("admission_wait", endpoint=endpoint):
+                # A user action pays one session token however many requests it makes
+                if scope is not None and scope.session is not None:
+                    scope.charge(self.admission)
+                self.admission.admit(None, model or endpoint, scope.report if scope else None)
+
+    def _check_available(self, url):
+        if not self.health.allow_request(url):
+            raise EndpointUnavailableError(f"{host_of(url)} is currently unavailable.")
+
+    def _record_status(self, url, status_code):
+        # Client errors mean the host is up; only server errors count against it
+        if status_code >= 500:
+            self.health.record_failure(url)
+        else:
+            self.health.record_success(url)
+
+    def _backoff_delay(self, attempt):
+        # Full jitter keeps retries from many sessions from arriving in lockstep
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def close(self):
+        """Closes all pooled connections."""
+        self.session.close()
+
+
+def _iter_sse(response, field):
+    # Only "data:" lines carry text; comments, ids and keep-alives are skipped
+    for line in response.iter_lines(decode_unicode=True):
+        if not line or not line.startswith("data:"):
+            continue
+        data = line[5:]
+        if data.startswith(" "):
+            data = data[1:]
+        if data == "[DONE]":
+            break
+        yield _chunk_text(data, field)
+
+
+def _chunk_text(data, field):
+    # A chunk is either a JSON object holding the text or the raw text itself
+    try:
+        chunk = json.loads(data)
+    except ValueError:
+        return data
+    if isinstance(chunk, dict):
+        return chunk.get(field) or chunk.get("token") or ""
+    return data
+
+
+@st.cache_resource
+def get_api_client():
+    """
+    Returns the process-wide API client shared by every Streamlit session.
+
+    Returns:
+        APIClient: The shared client
+    """
+    client = APIClient()
+
+    def collect():
+        stats = client.admission.stats()
+        return [
+            ("rag_toolbox_admission_total", "counter", "LLM requests admitted or rejected by admission control.",
+             [({"outcome": "admitted"}, stats["admitted"]), ({"outcome": "rejected"}, stats["rejected"])]),
+            ("rag_toolbox_admission_queued", "gauge", "LLM requests waiting for admission.", [({}, stats["queued"])]),
+        ]
+
+    get_metrics_registry().register_collector("admission", collect)
+    return client
+
+
+if __name__ == "__main__":
+    # Latency of sequential requests to a local stub backend, opening a new
+    # connection for every request (plain requests.post) versus the pooled
+    # client. The stub charges HANDSHAKE_SECONDS for every new connection,
+    # standing in for the TCP and TLS handshakes with a remote host.
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    HANDSHAKE_SECONDS = 0.05
+    REQUESTS = 200
+
+    class StubBackend(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body leave in one segment, so delayed ACKs do not skew the timings
+        wbufsize = -1
+        disable_nagle_algorithm = True
+        connections = 0
+
+        def setup(self):
+            super().setup()
+            StubBackend.connections += 1
+            time.sleep(HANDSHAKE_SECONDS)
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers["Content-Length"]))
+            body = json.dumps({"corrected_text": "The text."}).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubBackend)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/grammar/gemini/check_grammar"
+    payload = {"text": "teh text"}
+    client = APIClient()
+
+    def measure(send):
+        StubBackend.connections = 0
+        latencies = []
+        for _ in range(REQUESTS):
+            started = time.perf_counter()
+            send().raise_for_status()
+            latencies.append(time.perf_counter() - started)
+        latencies.sort()
+        return latencies[len(latencies) // 2] * 1000, latencies[int(len(latencies) * 0.99)] * 1000, StubBackend.connections
+
+    print(f"{'':<24} {'p50 ms':>7} {'p99 ms':>7} {'connections':>11}")
+    for name, send in (
+        ("new connection each", lambda: requests.post(url, json=payload, timeout=DEFAULT_TIMEOUT)),
+        ("pooled APIClient", lambda: client.post(url, payload)),
+    ):
+        p50, p99, connections = measure(send)
+        print(f"{name:<24} {p50:>7.1f} {p99:>7.1f} {connections:>11}")
+    server.shutdown()
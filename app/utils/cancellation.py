@@ -0,0 +1,161 @@
+import contextvars
+import socket
+import threading
+import time
+from contextlib import contextmanager
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+
+class RequestCancelledError(requests.exceptions.Timeout):
+    """Raised by a request whose CancelToken was cancelled, e.g. a hedged call that lost."""
+
+
+class CancelToken:
+    """Lets another thread stop the requests made under it.
+
+    Once cancelled, requests made inside cancellable(token) start no new
+    attempt and their backoff sleeps end. The connections they are waiting
+    on are shut down, so a blocked read ends at once instead of running on
+    to its timeout.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cancelled = threading.Event()
+        self._connections = set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        """Stops the requests made under the token."""
+        with self._lock:
+            self._cancelled.set()
+            for conn in self._connections:
+                _shutdown(conn)
+            self._connections.clear()
+
+    def wait(self, seconds):
+        """
+        Sleeps, waking early if the token is cancelled.
+
+        Args:
+            seconds (float): Longest sleep
+        """
+        self._cancelled.wait(seconds)
+
+    def _watch(self, conn):
+        with self._lock:
+            if self.cancelled:
+                _shutdown(conn)
+            else:
+                self._connections.add(conn)
+                conn.cancel_token = self
+
+    def _unwatch(self, conn):
+        # Under the lock, so cancel() never shuts down a connection handed to another request
+        with self._lock:
+            self._connections.discard(conn)
+            conn.cancel_token = None
+
+
+def _shutdown(conn):
+    # Shutting the socket down makes a read blocked in another thread return
+    try:
+        conn.sock.shutdown(socket.SHUT_RDWR)
+    except (AttributeError, OSError):
+        pass
+
+
+_cancel_token = contextvars.ContextVar("cancel_token", default=None)
+
+
+@contextmanager
+def cancellable(token):
+    """
+    Lets token stop the requests made inside the block.
+
+    Args:
+        token (CancelToken): The token
+    """
+    reset = _cancel_token.set(token)
+    try:
+        yield
+    finally:
+        _cancel_token.reset(reset)
+
+
+def cancel_requested():
+    """
+    Tells whether the current context's token was cancelled.
+
+    Returns:
+        bool: False outside cancellable() or before cancel()
+    """
+    token = _cancel_token.get()
+    return token is not None and token.cancelled
+
+
+def sleep(seconds):
+    """
+    Sleeps like time.sleep, waking early if the current context's token is cancelled.
+
+    Args:
+        seconds (float): Longest sleep
+    """
+    token = _cancel_token.get()
+    if token is None:
+        time.sleep(seconds)
+    else:
+        token.wait(seconds)
+
+
+class _CancellableConnectionMixin:
+    cancel_token = None
+
+    def getresponse(self, *args, **kwargs):
+        # The request has been sent, so the socket exists; the wait for the answer can be cut
+        token = _cancel_token.get()
+        if token is not None:
+            token._watch(self)
+        return super().getresponse(*args, **kwargs)
+
+
+class _CancellableHTTPConnection(_CancellableConnectionMixin, HTTPConnection):
+    pass
+
+
+class _CancellableHTTPSConnection(_CancellableConnectionMixin, HTTPSConnection):
+    pass
+
+
+class _CancellablePoolMixin:
+    def _put_conn(self, conn):
+        # The body has been read (or the connection dropped), so the token lets go of it
+        if conn is not None and conn.cancel_token is not None:
+            conn.cancel_token._unwatch(conn)
+        super()._put_conn(conn)
+
+
+class _CancellableHTTPConnectionPool(_CancellablePoolMixin, HTTPConnectionPool):
+    ConnectionCls = _CancellableHTTPConnection
+
+
+class _CancellableHTTPSConnectionPool(_CancellablePoolMixin, HTTPSConnectionPool):
+    ConnectionCls = _CancellableHTTPSConnection
+
+
+class CancellableAdapter(HTTPAdapter):
+    """HTTPAdapter whose connections can be shut down by a CancelToken."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _CancellableHTTPConnectionPool,
+            "https": _CancellableHTTPSConnectionPool
+        }
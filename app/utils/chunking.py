@@ -0,0 +1,175 @@
+import contextvars
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from app.utils.rate_limit import wait_first_completed
+
+PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+")
+
+# Paragraphs longer than this are split further on sentence boundaries
+MAX_CHUNK_CHARS = 2000
+
+
+def _spans(text, start, end, separator):
+    # Yields (start, end) of the pieces of text[start:end] between separators
+    position = start
+    for match in separator.finditer(text, start, end):
+        if match.start() > position:
+            yield position, match.start()
+        position = match.end()
+    if end > position:
+        yield position, end
+
+
+def split_text(text, max_chars=MAX_CHUNK_CHARS):
+    """
+    Splits text into chunks on paragraph and sentence boundaries.
+
+    Every paragraph becomes its own chunk, so editing one paragraph leaves the
+    other chunks unchanged. Paragraphs longer than max_chars are packed into
+    runs of whole sentences instead.
+
+    Args:
+        text (str): The text to split
+        max_chars (int): Preferred maximum chunk length
+
+    Returns:
+        list: (offset, chunk_text) tuples in document order
+    """
+    spans = []
+    for para_start, para_end in _spans(text, 0, len(text), PARAGRAPH_BREAK):
+        if para_end - para_start <= max_chars:
+            spans.append((para_start, para_end))
+            continue
+
+        run_start = run_end = None
+        for sent_start, sent_end in _spans(text, para_start, para_end, SENTENCE_BREAK):
+            if run_start is not None and sent_end - run_start > max_chars:
+                spans.append((run_start, run_end))
+                run_start = None
+            if run_start is None:
+                run_start = sent_start
+            run_end = sent_end
+        if run_start is not None:
+            spans.append((run_start, run_end))
+
+    return [(start, text[start:end]) for start, end in spans]
+
+
+def map_chunks(chunks, func, max_workers=4):
+    """
+    Runs func on every chunk with a bounded thread pool.
+
+    Args:
+        chunks (list): (offset, chunk_text) tuples from split_text
+        func (callable): Function called with each chunk text
+        max_workers (int): Maximum number of concurrent calls
+
+    Yields:
+        tuple: (index, result) in completion order, so callers can render
+        results as soon as each chunk finishes
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        # Each call runs in a copy of the caller's context, so request
+        # attribution such as admission_scope reaches the workers
+        futures = {
+            pool.submit(contextvars.copy_context().run, func, chunk): index
+            for index, (_, chunk) in enumerate(chunks)
+        }
+        pending = set(futures)
+        while pending:
+            # Shows the workers' place in the admission queue meanwhile
+            done, pending = wait_first_completed(pending)
+            for future in done:
+                yield futures[future], future.result()
+
+
+def merge_grammar_results(text, chunks, results):
+    """
+    Merges per-chunk grammar check results into one result for the whole text.
+
+    Corrections get an "offset" into the original text: offsets returned by the
+    backend are shifted by the chunk offset, otherwise the error text is
+    located inside its chunk. Chunks without a result yet, or whose check
+    failed, keep their original text.
+
+    Args:
+        text (str): The full original text
+        chunks (list): (offset, chunk_text) tuples from split_text
+        results (dict): Chunk index -> grammar check response
+
+    Returns:
+        dict: Response shaped like check_grammar's, plus "failed_chunks"
+    """
+    corrected_parts = []
+    corrections = []
+    errors = []
+    previous_end = 0
+
+    for index, (offset, chunk) in enumerate(chunks):
+        corrected_parts.append(text[previous_end:offset])
+        previous_end = offset + len(chunk)
+
+        result = results.get(index)
+        if result is None or "error" in result:
+            if result is not None:
+                errors.append(result["error"])
+            corrected_parts.append(chunk)
+            continue
+
+        corrected_parts.append(result.get("corrected_text", chunk))
+        for correction in result.get("corrections") or []:
+            correction = dict(correction)
+            if "offset" in correction:
+                correction["offset"] += offset
+            elif correction.get("error"):
+                position = chunk.find(correction["error"])
+                if position >= 0:
+                    correction["offset"] = offset + position
+            corrections.append(correction)
+
+    corrected_parts.append(text[previous_end:])
+
+    if chunks and len(errors) == len(chunks):
+        return {"error": errors[0]}
+
+    corrections.sort(key=lambda correction: correction.get("offset", len(text)))
+    return {
+        "original_text": text,
+        "corrected_text": "".join(corrected_parts),
+        "corrections": corrections,
+        "failed_chunks": len(errors)
+    }
+
+
+def pack_paragraphs(paragraphs, max_chars=1000):
+    """
+    Groups consecutive paragraphs into chunks of roughly max_chars.
+
+    Paragraphs are consumed lazily, so this works directly on the generator
+    returned by the ingestion module. Paragraphs longer than max_chars are
+    split on sentence boundaries.
+
+    Args:
+        paragraphs (iterable): Paragraph strings in document order
+        max_chars (int): Preferred maximum chunk length
+
+    Yields:
+        str: Chunks of text
+    """
+    pending = []
+    pending_chars = 0
+    for paragraph in paragraphs:
+        pieces = [paragraph] if len(paragraph) <= max_chars else [
+            chunk for _, chunk in split_text(paragraph, max_chars)
+        ]
+        for piece in pieces:
+            if pending and pending_chars + len(piece) > max_chars:
+                yield "\n\n".join(pending)
+                pending = []
+                pending_chars = 0
+            pending.append(piece)
+            pending_chars += len(piece) + 2
+    if pending:
+        yield "\n\n".join(pending)
@@ -0,0 +1,158 @@
+import json
+import re
+import threading
+from functools import lru_cache
+
+import streamlit as st
+
+# Tokens of conversation history sent with each request, per model
+MODEL_HISTORY_BUDGETS = {
+    "gemini": 6000,
+    "mistral": 3000,
+    "deepseek": 3000,
+}
+DEFAULT_HISTORY_BUDGET = 3000
+
+# Share of the budget reserved for recent turns sent verbatim
+RECENT_SHARE = 0.75
+
+SUMMARY_CHARS = 160
+WORD_PATTERN = re.compile(r"\w+|[^\w\s]")
+SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+
+
+def estimate_tokens(text):
+    """
+    Estimates the number of LLM tokens in a text without a tokenizer.
+
+    Args:
+        text (str): The text to measure
+
+    Returns:
+        int: Approximate token count
+    """
+    return max(len(WORD_PATTERN.findall(text)) * 4 // 3, len(text) // 4) + 1
+
+
+@lru_cache(maxsize=4096)
+def summarize_message(role, content):
+    """
+    Shortens an older message to its first sentence.
+
+    Args:
+        role (str): 'user' or 'assistant'
+        content (str): The text content of the message
+
+    Returns:
+        str: One summary line, cached per distinct message
+    """
+    first_sentence = SENTENCE_END.split(content.strip(), maxsplit=1)[0]
+    if len(first_sentence) > SUMMARY_CHARS:
+        first_sentence = first_sentence[:SUMMARY_CHARS].rsplit(" ", 1)[0] + "…"
+    speaker = "User" if role == "user" else "Assistant"
+    return f"{speaker}: {first_sentence}"
+
+
+def build_conversation_history(messages, model="gemini"):
+    """
+    Builds a token-budgeted conversation history for a chat request.
+
+    The newest turns are sent verbatim until RECENT_SHARE of the model's budget
+    is used. Turns before that are reduced to one-line summaries, newest first,
+    which are sent as a single system message within the rest of the budget.
+
+    Args:
+        messages (list): Message objects with 'role' and 'content', oldest first
+        model (str): The selected LLM
+
+    Returns:
+        list: Message objects formatted for the API, oldest first
+    """
+    budget = MODEL_HISTORY_BUDGETS.get(model, DEFAULT_HISTORY_BUDGET)
+    recent_budget = int(budget * RECENT_SHARE)
+
+    recent = []
+    used = 0
+    position = len(messages)
+    while position > 0:
+        message = messages[position - 1]
+        tokens = estimate_tokens(message["content"])
+        if used + tokens > recent_budget:
+            break
+        recent.append({"role": message["role"], "content": message["content"]})
+        used += tokens
+        position -= 1
+    recent.reverse()
+
+    summaries = []
+    for message in reversed(messages[:position]):
+        summary = summarize_message(message["role"], message["content"])
+        tokens = estimate_tokens(summary)
+        if used + tokens > budget:
+            break
+        summaries.append(summary)
+        used += tokens
+
+    if not summaries:
+        return recent
+    summary_message = {
+        "role": "system",
+        "content": "Summary of earlier conversation:\n" + "\n".join(reversed(summaries))
+    }
+    return [summary_message] + recent
+
+
+class PayloadMetrics:
+    """Thread-safe counters of request payload sizes."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.total_bytes = 0
+        self.max_bytes = 0
+        self.last_bytes = 0
+
+    def record(self, payload):
+        """
+        Records the serialized size of a request payload.
+
+        Args:
+            payload (dict): The JSON body about to be sent
+
+        Returns:
+            int: Size of the payload in bytes
+        """
+        size = len(json.dumps(payload, ensure_ascii=False).encode("utf-8"))
+        with self._lock:
+            self.requests += 1
+            self.total_bytes += size
+            self.max_bytes = max(self.max_bytes, size)
+            self.last_bytes = size
+        return size
+
+    def snapshot(self):
+        """
+        Returns the current counter values.
+
+        Returns:
+            dict: requests, total_bytes, mean_bytes, max_bytes and last_bytes
+        """
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "total_bytes": self.total_bytes,
+                "mean_bytes": self.total_bytes / self.requests if self.requests else 0,
+                "max_bytes": self.max_bytes,
+                "last_bytes": self.last_bytes
+            }
+
+
+@st.cache_resource
+def get_payload_metrics():
+    """
+    Returns the chat payload metrics shared by every Streamlit session.
+
+    Returns:
+        PayloadMetrics: The shared metrics
+    """
+    return PayloadMetrics()
@@ -0,0 +1,205 @@
+import socket
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class EndpointUnavailableError(requests.exceptions.ConnectionError):
+    """Raised instead of sending a request to a backend whose circuit is open."""
+
+
+class CircuitBreaker:
+    """Circuit breaker for one backend host.
+
+    Closed: requests flow normally. After failure_threshold consecutive
+    failures the circuit opens and requests are rejected immediately. Once
+    reset_timeout has passed, or a background probe reaches the host, it
+    becomes half-open and lets a single trial request through; the trial's
+    outcome closes or re-opens the circuit. A trial that has not reported
+    back after reset_timeout is given up on and the next request becomes
+    the trial, so a lost outcome cannot keep the host rejected.
+    """
+
+    def __init__(self, failure_threshold=3, reset_timeout=30.0):
+        """
+        Initializes a closed circuit.
+
+        Args:
+            failure_threshold (int): Consecutive failures that open the circuit
+            reset_timeout (float): Seconds an open circuit waits before a trial
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+        self._trial_started = 0.0
+        self._lock = threading.Lock()
+
+    def allow_request(self):
+        """
+        Decides whether a request may be sent now.
+
+        Returns:
+            bool: False while the circuit is open or a half-open trial is running
+        """
+        with self._lock:
+            now = time.monotonic()
+            if self.state == OPEN and now - self.opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and (not self._trial_in_flight
+                                            or now - self._trial_started >= self.reset_timeout):
+                self._trial_in_flight = True
+                self._trial_started = now
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+    def release_trial(self):
+        """Frees a half-open trial that ended without an outcome, e.g. when it was interrupted."""
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._trial_in_flight = False
+
+    def probe_succeeded(self):
+        """Moves an open circuit to half-open after a successful health probe."""
+        with self._lock:
+            if self.state == OPEN:
+                self.state = HALF_OPEN
+
+
+def host_of(url):
+    """
+    Returns the scheme and network location a URL is served from.
+
+    Args:
+        url (str): Full URL
+
+    Returns:
+        str: e.g. "https://example.com:443"
+    """
+    parts = urlsplit(url)
+    port = parts.port or (443 if parts.scheme == "https" else 80)
+    return f"{parts.scheme}://{parts.hostname}:{port}"
+
+
+class HealthRegistry:
+    """Circuit breakers for every backend host, with background health probes.
+
+    While any circuit is open, a daemon thread tries a TCP connection to each
+    open host every probe_interval seconds, so a recovered backend is retried
+    without waiting for the full reset timeout.
+    """
+
+    def __init__(self, failure_threshold=3, reset_timeout=30.0, probe_interval=10.0, probe_timeout=2.0):
+        """
+        Initializes an empty registry.
+
+        Args:
+            failure_threshold (int): Consecutive failures that open a circuit
+            reset_timeout (float): Seconds an open circuit waits before a trial
+            probe_interval (float): Seconds between health probes of open hosts
+            probe_timeout (float): Connect timeout of a health probe
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.probe_interval = probe_interval
+        self.probe_timeout = probe_timeout
+        self.breakers = {}
+        self._lock = threading.Lock()
+        self._prober = None
+
+    def breaker(self, url):
+        """
+        Returns the circuit breaker of the host serving a URL.
+
+        Args:
+            url (str): Full URL of a backend route
+
+        Returns:
+            CircuitBreaker: The host's breaker, created on first use
+        """
+        host = host_of(url)
+        with self._lock:
+            if host not in self.breakers:
+                self.breakers[host] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            return self.breakers[host]
+
+    def allow_request(self, url):
+        return self.breaker(url).allow_request()
+
+    def record_success(self, url):
+        self.breaker(url).record_success()
+
+    def record_failure(self, url):
+        self.breaker(url).record_failure()
+        self._start_prober()
+
+    def release_trial(self, url):
+        self.breaker(url).release_trial()
+
+    def is_available(self, url):
+        """
+        Tells whether a URL's host is not known to be down, without using a trial.
+
+        Args:
+            url (str): Full URL of a backend route
+
+        Returns:
+            bool: True unless the host's circuit is open
+        """
+        return self.breaker(url).state != OPEN
+
+    def status(self):
+        """
+        Returns the circuit state of every known host.
+
+        Returns:
+            dict: Host -> state name
+        """
+        with self._lock:
+            return {host: breaker.state for host, breaker in self.breakers.items()}
+
+    def _start_prober(self):
+        with self._lock:
+            if self._prober is not None and self._prober.is_alive():
+                return
+            self._prober = threading.Thread(target=self._probe_loop, name="health-probe", daemon=True)
+            self._prober.start()
+
+    def _probe_loop(self):
+        while True:
+            time.sleep(self.probe_interval)
+            with self._lock:
+                open_hosts = [(host, b) for host, b in self.breakers.items() if b.state == OPEN]
+            if not open_hosts:
+                return
+            for host, breaker in open_hosts:
+                parts = urlsplit(host)
+                try:
+                    socket.create_connection((parts.hostname, parts.port), timeout=self.probe_timeout).close()
+                except OSError:
+                    continue
+                breaker.probe_succeeded()
@@ -0,0 +1,201 @@
+import argparse
+import random
+import time
+
+# Common items of the Academic Word List used for the academic-word ratio
+ACADEMIC_WORDS = frozenset("""
+analyse analysis approach area assess assessment assume available benefit concept consist
+constitute context contract create data define definition derive distribute economy
+environment establish estimate evident export factor finance formula function identify
+income indicate individual interpret involve issue labour legal legislate major method
+occur percent period policy principle proceed process require research respond role
+section sector significant similar source specific structure theory vary achieve acquire
+administrate affect appropriate aspect assist category chapter commission community complex
+compute conclude conduct consequent construct consume credit culture design distinct element
+equate evaluate feature final focus impact injure institute invest item journal maintain
+normal obtain participate perceive positive potential previous primary purchase range region
+regulate relevant reside resource restrict secure seek select site strategy survey text
+tradition transfer alternative circumstance comment compensate component consent considerable
+constant constrain contribute convene coordinate core corporate correspond criteria deduce
+demonstrate document dominate emphasis ensure exclude framework fund illustrate immigrate imply
+initial instance interact justify layer link locate maximise minor negate outcome partner
+philosophy physical proportion publish react register rely remove scheme sequence sex shift
+specify sufficient task technical technique technology valid volume furthermore moreover
+however therefore consequently nevertheless whereas although significant substantial
+""".split())
+
+PUNCTUATION = ".,;:!?\"'()[]{}-"
+
+
+def score_essay(user_response, rng=random):
+    """
+    Scores one essay with the word-count and sentence-length heuristic.
+
+    Args:
+        user_response (str): The essay text
+        rng: Object with a uniform(a, b) method used for the score jitter
+
+    Returns:
+        dict: word_count, sentence_count, avg_words_per_sentence and band_score
+    """
+    word_count = len(user_response.split())
+    sentence_count = len([s for s in user_response.split('.') if s.strip()])
+    avg_words_per_sentence = word_count / max(1, sentence_count)
+
+    # Simple scoring logic
+    if word_count < 100:
+        band_score = 4.0
+    elif word_count < 150:
+        band_score = 5.0
+    elif word_count < 200:
+        band_score = 6.0
+    elif word_count < 250:
+        band_score = 7.0
+    else:
+        band_score = 7.5
+
+    # Adjust based on average sentence length (very simple heuristic)
+    if avg_words_per_sentence < 8:
+        band_score -= 0.5
+    elif avg_words_per_sentence > 25:
+        band_score -= 0.5
+
+    # Random slight variation to make it seem more realistic
+    band_score += rng.uniform(-0.5, 0.5)
+    band_score = round(max(4.0, min(9.0, band_score)) * 2) / 2  # Round to nearest 0.5
+
+    return {
+        "word_count": word_count,
+        "sentence_count": sentence_count,
+        "avg_words_per_sentence": avg_words_per_sentence,
+        "band_score": band_score
+    }
+
+
+def essay_features(essays):
+    """
+    Computes the scoring features of many essays with vectorized string operations.
+
+    Args:
+        essays (pandas.Series): Essay texts
+
+    Returns:
+        pandas.DataFrame: word_count, sentence_count, avg_words_per_sentence,
+        lexical_diversity and academic_word_ratio, indexed like essays
+    """
+    # NumPy and pandas are only needed for batch scoring, not for the page
+    import numpy as np
+    import pandas as pd
+
+    index = essays.index
+    essays = essays.fillna("").astype(str).reset_index(drop=True)
+
+    # Tokenize once; the same tokens give the word count and the word statistics
+    tokens = essays.str.lower().str.split()
+    word_count = tokens.str.len().to_numpy()
+    # Same definition as score_essay: non-blank pieces between full stops
+    sentence_count = essays.str.count(r"[^.]*[^.\s][^.]*").to_numpy()
+
+    words = tokens.explode().dropna().str.strip(PUNCTUATION)
+    words = words[words != ""]
+    positions = words.index.to_numpy(dtype=np.int64)
+    codes, vocabulary = pd.factorize(words)
+
+    n_essays = len(essays)
+    total_words = np.bincount(positions, minlength=n_essays)
+    unique_pairs = np.unique(positions * max(1, len(vocabulary)) + codes)
+    unique_words = np.bincount(unique_pairs // max(1, len(vocabulary)), minlength=n_essays)
+    is_academic = vocabulary.isin(ACADEMIC_WORDS)[codes]
+    academic_words = np.bincount(positions, weights=is_academic, minlength=n_essays)
+
+    safe_total = np.maximum(total_words, 1)
+    return pd.DataFrame({
+        "word_count": word_count,
+        "sentence_count": sentence_count,
+        "avg_words_per_sentence": word_count / np.maximum(sentence_count, 1),
+        "lexical_diversity": unique_words / safe_total,
+        "academic_word_ratio": academic_words / safe_total
+    }, index=index)
+
+
+def score_essays(essays, seed=0):
+    """
+    Scores a batch of essays with the same heuristic as score_essay.
+
+    Args:
+        essays (pandas.Series): Essay texts
+        seed (int, optional): Seed of the score jitter; None disables the jitter
+
+    Returns:
+        pandas.DataFrame: The features of essay_features plus band_score
+    """
+    import numpy as np
+
+    features = essay_features(essays)
+    word_count = features["word_count"].to_numpy()
+    avg = features["avg_words_per_sentence"].to_numpy()
+
+    band_score = np.select(
+        [word_count < 100, word_count < 150, word_count < 200, word_count < 250],
+        [4.0, 5.0, 6.0, 7.0],
+        default=7.5
+    )
+    band_score -= np.where((avg < 8) | (avg > 25), 0.5, 0.0)
+    if seed is not None:
+        band_score += np.random.default_rng(seed).uniform(-0.5, 0.5, len(band_score))
+    features["band_score"] = np.round(np.clip(band_score, 4.0, 9.0) * 2) / 2
+    return features
+
+
+def load_essays(file, column=None):
+    """
+    Reads essays from a CSV or JSONL file.
+
+    Args:
+        file: Path or file-like object with a .name ending in .csv or .jsonl
+        column (str, optional): Name of the essay column; guessed if omitted
+
+    Returns:
+        pandas.DataFrame: The file contents with the essays in an "essay" column
+    """
+    import pandas as pd
+
+    name = getattr(file, "name", str(file)).lower()
+    if name.endswith((".jsonl", ".json")):
+        frame = pd.read_json(file, lines=name.endswith(".jsonl"))
+    else:
+        frame = pd.read_csv(file)
+
+    if column is None:
+        candidates = [c for c in ("essay", "response", "user_response", "text") if c in frame.columns]
+        if not candidates:
+            raise ValueError("Could not find an essay column; expected one of essay, response or text.")
+        column = candidates[0]
+    return frame.rename(columns={column: "essay"})
+
+
+if __name__ == "__main__":
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description="Score a file of essays and report throughput.")
+    parser.add_argument("input", help="CSV or JSONL file with an essay column")
+    parser.add_argument("--output", help="CSV file to write the scores to")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    frame = load_essays(args.input)
+
+    start = time.perf_counter()
+    scores = score_essays(frame["essay"], seed=args.seed)
+    batch_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    rng = random.Random(args.seed)
+    for essay in frame["essay"].fillna("").astype(str):
+        score_essay(essay, rng)
+    single_seconds = time.perf_counter() - start
+
+    print(f"batch:  {len(frame) / batch_seconds:,.0f} essays/s")
+    print(f"single: {len(frame) / single_seconds:,.0f} essays/s")
+    if args.output:
+        pd.concat([frame, scores], axis=1).to_csv(args.output, index=False)
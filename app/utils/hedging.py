@@ -0,0 +1,177 @@
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+
+from app.utils.cancellation import CancelToken, cancellable
+from app.utils.histogram import LatencyHistogram
+from app.utils.rate_limit import wait_first_completed
+
+MODELS = ["gemini", "mistral", "deepseek"]
+
+# Hedge delay used until a model has enough recorded latencies
+DEFAULT_HEDGE_DELAY = 5.0
+MIN_SAMPLES = 20
+HEDGE_QUANTILE = 0.95
+
+
+class LatencyRegistry:
+    """Latency histograms per endpoint and model that drive the hedge delay.
+
+    Only successful upstream calls are recorded (by APIClient), so cache
+    hits, single-flight waits, admission queueing and instant errors do not
+    pull the hedge delay down.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.histograms = {}
+
+    def histogram(self, endpoint, model):
+        with self._lock:
+            return self.histograms.setdefault((endpoint, model), LatencyHistogram())
+
+    def record(self, endpoint, model, seconds):
+        self.histogram(endpoint, model).record(seconds)
+
+    def hedge_delay(self, endpoint, model):
+        """
+        Returns how long to wait for a model before hedging.
+
+        Args:
+            endpoint (str): Logical endpoint, e.g. "grammar"
+            model (str): The primary model
+
+        Returns:
+            float: The model's p95 latency on the endpoint, or DEFAULT_HEDGE_DELAY with too few samples
+        """
+        histogram = self.histogram(endpoint, model)
+        if histogram.count < MIN_SAMPLES:
+            return DEFAULT_HEDGE_DELAY
+        return histogram.quantile(HEDGE_QUANTILE)
+
+    def summary(self):
+        """
+        Returns request counts and latency quantiles for every endpoint and model.
+
+        Returns:
+            dict: (endpoint, model) -> {"requests", "p50", "p95"}
+        """
+        with self._lock:
+            histograms = dict(self.histograms)
+        return {
+            key: {
+                "requests": histogram.count,
+                "p50": histogram.quantile(0.5),
+                "p95": histogram.quantile(0.95)
+            }
+            for key, histogram in histograms.items()
+        }
+
+
+@st.cache_resource
+def get_latency_registry():
+    """
+    Returns the latency registry shared by every Streamlit session.
+
+    Returns:
+        LatencyRegistry: The shared registry
+    """
+    return LatencyRegistry()
+
+
+@st.cache_resource
+def get_hedge_executor():
+    """
+    Returns the thread pool running hedged calls, created on first use.
+
+    Returns:
+        ThreadPoolExecutor: The shared pool
+    """
+    return ThreadPoolExecutor(max_workers=32, thread_name_prefix="hedge")
+
+
+def hedged_call(call, model, endpoint, backup_models=None, is_good=None, registry=None, delay=None):
+    """
+    Calls a model and, if it is slow, races the same request on a backup model.
+
+    The primary request starts immediately. If it has not succeeded after the
+    hedge delay, the request is also sent to the next backup model, and so on.
+    The first good response wins. The calls still running are cancelled:
+    they retry no more and their connections are shut down, so they free
+    their worker and connection at once.
+
+    Args:
+        call (callable): Function taking a model name and returning a response
+        model (str): The selected model
+        endpoint (str): Logical endpoint the call uses, whose latencies set the hedge delay
+        backup_models (list, optional): Models to hedge with; defaults to the other MODELS
+        is_good (callable, optional): Predicate for a usable response; defaults to
+            "no 'error' key"
+        registry (LatencyRegistry, optional): Latency histograms to use
+        delay (float, optional): Fixed hedge delay instead of the model's p95
+
+    Returns:
+        tuple: (model, response) of the winning call, or of the last failure
+    """
+    registry = registry or get_latency_registry()
+    is_good = is_good or (lambda response: "error" not in response)
+    backups = list(backup_models if backup_models is not None else [m for m in MODELS if m != model])
+
+    executor = get_hedge_executor()
+    pending = {}  # future -> (model, CancelToken)
+
+    def start(target):
+        # Calls run in a copy of the caller's context, e.g. its admission_scope
+        token = CancelToken()
+        pending[executor.submit(contextvars.copy_context().run, _run_cancellable, token, call, target)] = (target, token)
+
+    start(model)
+    last = None
+    try:
+        while pending:
+            hedge_delay = delay if delay is not None else registry.hedge_delay(endpoint, model)
+            done, _ = wait_first_completed(pending, timeout=hedge_delay if backups else None)
+
+            for future in done:
+                answered_by, _ = pending.pop(future)
+                try:
+                    last = (answered_by, future.result())
+                except Exception as e:
+                    last = (answered_by, {"error": str(e)})
+                if is_good(last[1]):
+                    return last
+
+            # Hedge when the current calls are slow or have all failed
+            if backups and (not done or not pending):
+                start(backups.pop(0))
+        return last
+    finally:
+        # The losers, or every call if the caller was interrupted
+        for future, (_, token) in pending.items():
+            future.cancel()
+            token.cancel()
+
+
+def _run_cancellable(token, call, model):
+    with cancellable(token):
+        return call(model)
+
+
+def call_model(call, model, endpoint, is_good=None):
+    """
+    Calls a model, hedging across models when the session enabled it.
+
+    Args:
+        call (callable): Function taking a model name and returning a response
+        model (str): The selected model
+        endpoint (str): Logical endpoint the call uses, e.g. "grammar"
+        is_good (callable, optional): Predicate for a usable response
+
+    Returns:
+        tuple: (model, response) of the call that answered
+    """
+    if st.session_state.get("hedging_enabled"):
+        return hedged_call(call, model, endpoint, is_good=is_good)
+    return model, call(model)
@@ -0,0 +1,65 @@
+import bisect
+import threading
+
+# Geometric bucket bounds from 50 ms to about 5 minutes
+BUCKET_BOUNDS = [0.05 * 1.25 ** i for i in range(40)]
+
+
+class LatencyHistogram:
+    """Thread-safe histogram of request latencies with geometric buckets."""
+
+    def __init__(self, bounds=BUCKET_BOUNDS):
+        """
+        Initializes an empty histogram.
+
+        Args:
+            bounds (list): Ascending bucket upper bounds in seconds; a last
+                bucket catches everything above them
+        """
+        self.bounds = bounds
+        self._lock = threading.Lock()
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def record(self, seconds):
+        """
+        Adds one observation.
+
+        Args:
+            seconds (float): Latency of a completed request
+        """
+        with self._lock:
+            self.counts[bisect.bisect_left(self.bounds, seconds)] += 1
+            self.count += 1
+            self.total += seconds
+
+    def snapshot(self):
+        """
+        Returns a consistent copy of the histogram.
+
+        Returns:
+            tuple: (bucket counts, observation count, sum of observations)
+        """
+        with self._lock:
+            return list(self.counts), self.count, self.total
+
+    def quantile(self, q):
+        """
+        Estimates a latency quantile from the bucket counts.
+
+        Args:
+            q (float): Quantile between 0 and 1
+
+        Returns:
+            float: Upper bound of the bucket holding the quantile, or None if empty
+        """
+        with self._lock:
+            if not self.count:
+                return None
+            target = q * self.count
+            cumulative = 0
+            for bucket, count in enumerate(self.counts):
+                cumulative += count
+                if cumulative >= target:
+                    return self.bounds[min(bucket, len(self.bounds) - 1)]
@@ -0,0 +1,233 @@
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import zlib
+
+import streamlit as st
+
+# SQLite file holding chat and challenge history; defaults to a directory
+# only the app's user can read, as the histories are private
+HISTORY_DB_ENV_VAR = "RAG_TOOLBOX_HISTORY_DB"
+DEFAULT_DATA_DIR = os.path.join(
+    os.environ.get("XDG_DATA_HOME") or os.path.join(os.path.expanduser("~"), ".local", "share"), "rag_toolbox"
+)
+DEFAULT_HISTORY_DB = os.path.join(DEFAULT_DATA_DIR, "history.sqlite3")
+
+# Pending records are written in one transaction every FLUSH_INTERVAL
+# seconds, or as soon as FLUSH_BATCH of them are waiting
+FLUSH_INTERVAL = 0.5
+FLUSH_BATCH = 64
+
+# The newest KEEP_UNCOMPRESSED records of a history stay plain; older ones
+# of at least COMPRESS_MIN_BYTES are stored zlib-compressed
+KEEP_UNCOMPRESSED = 50
+COMPRESS_MIN_BYTES = 256
+
+logger = logging.getLogger(__name__)
+
+
+class HistoryStore:
+    """Append-only chat and challenge history in SQLite.
+
+    Each history is identified by a session id and a kind ("chat",
+    "challenge") and its records are numbered from 0. The database runs in
+    WAL mode so reads do not block the writer. Appends are buffered and
+    written in batches by a background thread, and older records are
+    compressed as the history grows.
+    """
+
+    def __init__(self, db_path=DEFAULT_HISTORY_DB, flush_interval=FLUSH_INTERVAL, flush_batch=FLUSH_BATCH):
+        """
+        Opens or creates the database.
+
+        Args:
+            db_path (str): Path of the SQLite file
+            flush_interval (float): Seconds between background flushes
+            flush_batch (int): Pending records that trigger an early flush
+        """
+        self.flush_interval = flush_interval
+        self.flush_batch = flush_batch
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS history ("
+            "session TEXT, kind TEXT, seq INTEGER, created_at REAL, "
+            "compressed INTEGER, data BLOB, PRIMARY KEY (session, kind, seq))"
+        )
+        self._db.commit()
+
+        self._lock = threading.Lock()
+        self._pending = []  # (session, kind, seq, created_at, data)
+        self._next_seq = {}  # (session, kind) -> next record number
+        self._wake = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, name="history-flush", daemon=True)
+        self._flusher.start()
+
+    def _seq(self, session, kind):
+        # Caller holds the lock
+        key = (session, kind)
+        if key not in self._next_seq:
+            row = self._db.execute(
+                "SELECT MAX(seq) FROM history WHERE session = ? AND kind = ?", key
+            ).fetchone()
+            self._next_seq[key] = 0 if row[0] is None else row[0] + 1
+        return self._next_seq[key]
+
+    def append(self, session, kind, record):
+        """
+        Queues a record for writing.
+
+        Args:
+            session (str): Session id
+            kind (str): History name, e.g. "chat"
+            record (dict): JSON-serializable record
+
+        Returns:
+            int: Number of the record in its history
+        """
+        data = json.dumps(record, ensure_ascii=False).encode("utf-8")
+        with self._lock:
+            seq = self._seq(session, kind)
+            self._next_seq[(session, kind)] = seq + 1
+            self._pending.append((session, kind, seq, time.time(), data))
+            if len(self._pending) >= self.flush_batch:
+                self._wake.set()
+        return seq
+
+    def count(self, session, kind):
+        """
+        Returns the number of records in a history, including unflushed ones.
+
+        Args:
+            session (str): Session id
+            kind (str): History name
+
+        Returns:
+            int: Number of records
+        """
+        with self._lock:
+            return self._seq(session, kind)
+
+    def read(self, session, kind, start=0, end=None):
+        """
+        Reads a page of a history.
+
+        Args:
+            session (str): Session id
+            kind (str): History name
+            start (int): Number of the first record
+            end (int, optional): Number after the last record; defaults to the end
+
+        Returns:
+            list: Records in order
+        """
+        self.flush()
+        end = self.count(session, kind) if end is None else end
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT compressed, data FROM history WHERE session = ? AND kind = ? "
+                "AND seq >= ? AND seq < ? ORDER BY seq",
+                (session, kind, start, end)
+            ).fetchall()
+        return [json.loads(zlib.decompress(data) if compressed else data) for compressed, data in rows]
+
+    def clear(self, session, kind):
+        """
+        Deletes a history.
+
+        Args:
+            session (str): Session id
+            kind (str): History name
+        """
+        with self._lock:
+            self._pending = [p for p in self._pending if (p[0], p[1]) != (session, kind)]
+            self._db.execute("DELETE FROM history WHERE session = ? AND kind = ?", (session, kind))
+            self._db.commit()
+            self._next_seq[(session, kind)] = 0
+
+    def flush(self):
+        """
+        Writes all pending records in one transaction and compresses old ones.
+
+        Raises:
+            sqlite3.Error: If the write failed; the records stay pending for the next flush
+        """
+        with self._lock:
+            pending, self._pending = self._pending, []
+            if not pending:
+                return
+            try:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO history VALUES (?, ?, ?, ?, 0, ?)", pending
+                )
+                for session, kind in {(p[0], p[1]) for p in pending}:
+                    self._compress_old(session, kind)
+                self._db.commit()
+            except sqlite3.Error:
+                self._db.rollback()
+                self._pending = pending + self._pending
+                raise
+
+    def _compress_old(self, session, kind):
+        # Caller holds the lock; records past the plain window are compressed once
+        cutoff = self._seq(session, kind) - KEEP_UNCOMPRESSED
+        rows = self._db.execute(
+            "SELECT seq, data FROM history WHERE session = ? AND kind = ? AND compressed = 0 "
+            "AND seq < ? AND length(data) >= ?",
+            (session, kind, cutoff, COMPRESS_MIN_BYTES)
+        ).fetchall()
+        self._db.executemany(
+            "UPDATE history SET compressed = 1, data = ? WHERE session = ? AND kind = ? AND seq = ?",
+            [(zlib.compress(data, 6), session, kind, seq) for seq, data in rows]
+        )
+
+    def _flush_loop(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except sqlite3.Error:
+                # Keep the thread alive; the batch is retried on the next flush
+                logger.exception("Could not write %d history records; retrying", len(self._pending))
+
+
+@st.cache_resource
+def get_history_store():
+    """
+    Returns the history store shared by every Streamlit session.
+
+    Returns:
+        HistoryStore: Store at RAG_TOOLBOX_HISTORY_DB
+    """
+    db_path = os.environ.get(HISTORY_DB_ENV_VAR, DEFAULT_HISTORY_DB)
+    os.makedirs(os.path.dirname(os.path.abspath(db_path)), mode=0o700, exist_ok=True)
+    return HistoryStore(db_path)
+
+
+if __name__ == "__main__":
+    # Append and page-read throughput, and stored size with compression
+    directory = tempfile.mkdtemp()
+    store = HistoryStore(os.path.join(directory, "history.sqlite3"))
+    text = "The quick brown fox jumps over the lazy dog. " * 20
+
+    started = time.perf_counter()
+    for session in range(100):
+        for turn in range(200):
+            store.append(f"s{session}", "chat", {"role": "user", "content": f"{turn} {text}", "timestamp": time.time()})
+    store.flush()
+    seconds = time.perf_counter() - started
+    print(f"append: {20000 / seconds:,.0f} messages/s")
+
+    started = time.perf_counter()
+    for session in range(100):
+        store.read(f"s{session}", "chat", 180, 200)
+    print(f"page read: {(time.perf_counter() - started) * 10:.2f} ms per page of 20")
+
+    stored = store._db.execute("SELECT SUM(length(data)) FROM history").fetchone()[0]
+    print(f"stored: {stored / 1e6:.1f} MB of record data for {20000 * len(text) / 1e6:.1f} MB of message text")
@@ -0,0 +1,165 @@
+import base64
+import hashlib
+import io
+import time
+
+import streamlit as st
+
+from app.utils.response_cache import ResponseCache
+
+# Longest side of the image sent to the watermark model
+MODEL_INPUT_SIZE = 1024
+JPEG_QUALITY = 85
+
+
+def prepare_image(data, max_side=MODEL_INPUT_SIZE, image_format="JPEG", quality=JPEG_QUALITY):
+    """
+    Decodes an image once, downscales it and re-encodes it compactly.
+
+    JPEGs are decoded with Pillow's draft mode, which lets the decoder skip
+    most of the full-resolution pixels, and the rest of the reduction uses
+    reduce() before the final resampling.
+
+    Args:
+        data (bytes): The uploaded image file
+        max_side (int): Longest side of the result in pixels
+        image_format (str): "JPEG" or "WEBP"
+        quality (int): Encoder quality
+
+    Returns:
+        dict: image_base64, mime, width, height, original_width and original_height
+    """
+    from PIL import Image, ImageOps
+
+    image = Image.open(io.BytesIO(data))
+    original_size = image.size
+    image.draft("RGB", (max_side, max_side))
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail((max_side, max_side), Image.Resampling.LANCZOS, reducing_gap=2.0)
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+
+    output = io.BytesIO()
+    image.save(output, format=image_format, quality=quality, optimize=True)
+    return {
+        "image_base64": base64.b64encode(output.getvalue()).decode("ascii"),
+        "mime": f"image/{image_format.lower()}",
+        "width": image.width,
+        "height": image.height,
+        "original_width": original_size[0],
+        "original_height": original_size[1]
+    }
+
+
+def get_prepared_image(data, **kwargs):
+    """
+    Returns the prepared version of an image, cached by content hash.
+
+    Args:
+        data (bytes): The uploaded image file
+        **kwargs: Passed on to prepare_image
+
+    Returns:
+        dict: See prepare_image
+    """
+    cache = get_image_cache()
+    cache_key = hashlib.sha256(data).hexdigest() + repr(sorted(kwargs.items()))
+    prepared = cache.get(cache_key)
+    if prepared is None:
+        prepared = prepare_image(data, **kwargs)
+        cache.set(cache_key, prepared)
+    return prepared
+
+
+def to_data_url(prepared):
+    """
+    Builds a data URL that can be sent where the API expects an image URL.
+
+    Args:
+        prepared (dict): Result of prepare_image
+
+    Returns:
+        str: data:<mime>;base64,<data>
+    """
+    return f"data:{prepared['mime']};base64,{prepared['image_base64']}"
+
+
+@st.cache_resource
+def get_image_cache():
+    """
+    Returns the prepared-image cache shared by every Streamlit session.
+
+    Returns:
+        ResponseCache: Cache of prepared images keyed by content hash
+    """
+    return ResponseCache(max_entries=256, max_bytes=64 * 1024 * 1024, ttl=24 * 3600)
+
+
+if __name__ == "__main__":
+    # Payload size, preparation time and end-to-end watermark request latency
+    # for large photos, against a local stub of the watermark API that reads
+    # request bodies at UPLINK_BYTES_PER_SECOND, like a typical upload link
+    import json
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    import numpy as np
+    import requests
+    from PIL import Image
+
+    UPLINK_BYTES_PER_SECOND = 10e6
+
+    class StubWatermarkAPI(BaseHTTPRequestHandler):
+        def do_POST(self):
+            remaining = int(self.headers["Content-Length"])
+            while remaining:
+                chunk = self.rfile.read(min(remaining, 256 * 1024))
+                remaining -= len(chunk)
+                time.sleep(len(chunk) / UPLINK_BYTES_PER_SECOND)
+            body = json.dumps({"has_watermark": False}).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubWatermarkAPI)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    stub_url = f"http://127.0.0.1:{server.server_port}/check_image"
+    http = requests.Session()
+
+    def request_seconds(image_url):
+        started = time.perf_counter()
+        http.post(stub_url, json={"image_url": image_url, "title": "Default Title"}, timeout=120).raise_for_status()
+        return time.perf_counter() - started
+
+    for megapixels in (12, 24, 48):
+        width = int((megapixels * 1e6 * 4 / 3) ** 0.5)
+        height = int(width * 3 / 4)
+        gradient = np.linspace(0, 255, width, dtype=np.uint8)
+        pixels = np.dstack([np.tile(gradient, (height, 1))] * 3)
+        pixels = (pixels + np.random.default_rng(0).integers(0, 32, pixels.shape, dtype=np.uint8))
+        buffer = io.BytesIO()
+        Image.fromarray(pixels).save(buffer, format="JPEG", quality=92)
+        data = buffer.getvalue()
+
+        started = time.perf_counter()
+        naive = base64.b64encode(data)
+        naive_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        prepared = prepare_image(data)
+        prepared_seconds = time.perf_counter() - started
+
+        naive_total = naive_seconds + request_seconds(f"data:image/jpeg;base64,{naive.decode('ascii')}")
+        prepared_total = prepared_seconds + request_seconds(to_data_url(prepared))
+
+        print(
+            f"{megapixels} MP: original payload {len(naive) / 1e6:.1f} MB, {naive_total * 1000:.0f} ms end to end; "
+            f"prepared {len(prepared['image_base64']) / 1e3:.0f} KB in {prepared_seconds * 1000:.0f} ms, "
+            f"{prepared_total * 1000:.0f} ms end to end"
+        )
+    server.shutdown()
@@ -0,0 +1,213 @@
+import codecs
+import hashlib
+import os
+
+import streamlit as st
+
+from app.utils.chunking import PARAGRAPH_BREAK
+from app.utils.response_cache import ResponseCache
+
+SUPPORTED_EXTENSIONS = (".txt", ".docx", ".pdf")
+
+# Upload limits
+MAX_DOCUMENT_BYTES = 20 * 1024 * 1024
+MAX_PDF_PAGES = 200
+
+READ_BLOCK_SIZE = 64 * 1024
+
+BYTE_ORDER_MARKS = [
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+]
+
+
+class DocumentTooLargeError(ValueError):
+    """Raised when a document exceeds the ingestion size limit."""
+
+
+def detect_encoding(sample):
+    """
+    Guesses the text encoding from the first bytes of a file.
+
+    Args:
+        sample (bytes): Leading bytes of the file
+
+    Returns:
+        str: Name of a Python codec
+    """
+    for bom, encoding in BYTE_ORDER_MARKS:
+        if sample.startswith(bom):
+            return encoding
+    try:
+        sample.decode("utf-8")
+        return "utf-8"
+    except UnicodeDecodeError as e:
+        # A multi-byte character cut off at the end of the sample is still UTF-8
+        if e.start >= len(sample) - 3:
+            return "utf-8"
+
+    from charset_normalizer import from_bytes
+    match = from_bytes(sample).best()
+    return match.encoding if match else "latin-1"
+
+
+def _open(file):
+    # Accepts a path or a binary file-like object such as Streamlit's UploadedFile
+    if isinstance(file, (str, os.PathLike)):
+        return open(file, "rb"), os.fspath(file)
+    return file, getattr(file, "name", "")
+
+
+def _file_size(stream):
+    position = stream.tell()
+    stream.seek(0, os.SEEK_END)
+    size = stream.tell()
+    stream.seek(position)
+    return size
+
+
+def file_hash(stream):
+    """
+    Hashes a binary stream block by block without loading it into memory.
+
+    Args:
+        stream: Seekable binary file-like object
+
+    Returns:
+        str: Hex SHA-256 digest of the contents
+    """
+    digest = hashlib.sha256()
+    stream.seek(0)
+    for block in iter(lambda: stream.read(1024 * 1024), b""):
+        digest.update(block)
+    stream.seek(0)
+    return digest.hexdigest()
+
+
+def _split_paragraphs(text):
+    for paragraph in PARAGRAPH_BREAK.split(text):
+        if paragraph.strip():
+            yield paragraph.strip()
+
+
+def _iter_txt(stream):
+    sample = stream.read(READ_BLOCK_SIZE)
+    decoder = codecs.getincrementaldecoder(detect_encoding(sample))(errors="replace")
+
+    # Only the unfinished trailing paragraph is kept between blocks
+    buffer = ""
+    block = sample
+    while block:
+        buffer += decoder.decode(block)
+        *paragraphs, buffer = PARAGRAPH_BREAK.split(buffer)
+        for paragraph in paragraphs:
+            if paragraph.strip():
+                yield paragraph.strip()
+        block = stream.read(READ_BLOCK_SIZE)
+
+    buffer += decoder.decode(b"", final=True)
+    if buffer.strip():
+        yield buffer.strip()
+
+
+def _iter_docx(stream):
+    import docx
+    for paragraph in docx.Document(stream).paragraphs:
+        if paragraph.text.strip():
+            yield paragraph.text.strip()
+
+
+def _iter_pdf(stream, max_pages):
+    from PyPDF2 import PdfReader
+    reader = PdfReader(stream)
+    for page_number, page in enumerate(reader.pages):
+        if page_number >= max_pages:
+            break
+        yield from _split_paragraphs(page.extract_text() or "")
+
+
+def iter_document(file, max_bytes=MAX_DOCUMENT_BYTES, max_pages=MAX_PDF_PAGES, use_cache=True):
+    """
+    Extracts the paragraphs of a .txt, .docx or .pdf document as they are read.
+
+    Text files are decoded incrementally and PDFs page by page, so callers can
+    start processing before the whole document has been extracted. Completed
+    extractions are cached by file hash.
+
+    Args:
+        file: Path or binary file-like object (e.g. a Streamlit UploadedFile)
+        max_bytes (int): Largest accepted file size
+        max_pages (int): Number of PDF pages to read at most
+        use_cache (bool): Whether to use the extracted-text cache
+
+    Yields:
+        str: Non-empty paragraphs in document order
+
+    Raises:
+        DocumentTooLargeError: If the file is larger than max_bytes
+        ValueError: If the file type is not supported
+    """
+    stream, name = _open(file)
+    try:
+        extension = os.path.splitext(name.lower())[1]
+        if extension not in SUPPORTED_EXTENSIONS:
+            raise ValueError(f"Unsupported file type: {extension or name}")
+
+        size = _file_size(stream)
+        if size > max_bytes:
+            raise DocumentTooLargeError(
+                f"File is {size / 1024 / 1024:.1f} MB; the limit is {max_bytes / 1024 / 1024:.0f} MB."
+            )
+
+        cache = get_document_cache() if use_cache else None
+        if cache is not None:
+            cache_key = f"{file_hash(stream)}:{max_pages}"
+            cached = cache.get(cache_key)
+            if cached is not None:
+                yield from cached["paragraphs"]
+                return
+
+        stream.seek(0)
+        if extension == ".txt":
+            paragraphs = _iter_txt(stream)
+        elif extension == ".docx":
+            paragraphs = _iter_docx(stream)
+        else:
+            paragraphs = _iter_pdf(stream, max_pages)
+
+        extracted = []
+        for paragraph in paragraphs:
+            extracted.append(paragraph)
+            yield paragraph
+
+        if cache is not None:
+            cache.set(cache_key, {"paragraphs": extracted})
+    finally:
+        if stream is not file:
+            stream.close()
+
+
+def read_document(file, **kwargs):
+    """
+    Extracts the full text of a document.
+
+    Args:
+        file: Path or binary file-like object
+        **kwargs: Passed on to iter_document
+
+    Returns:
+        str: Paragraphs joined by blank lines
+    """
+    return "\n\n".join(iter_document(file, **kwargs))
+
+
+@st.cache_resource
+def get_document_cache():
+    """
+    Returns the extracted-text cache shared by every Streamlit session.
+
+    Returns:
+        ResponseCache: Cache of extracted paragraphs keyed by file hash
+    """
+    return ResponseCache(max_entries=64, max_bytes=64 * 1024 * 1024, ttl=7 * 24 * 3600)
@@ -0,0 +1,253 @@
+import contextvars
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import streamlit as st
+
+from app.utils.histogram import LatencyHistogram
+
+# Local port serving /metrics in the Prometheus text format; 0 disables it
+METRICS_PORT_ENV_VAR = "RAG_TOOLBOX_METRICS_PORT"
+DEFAULT_METRICS_PORT = 9464
+
+# Bucket bounds in seconds, from sub-millisecond parsing to slow LLM calls
+SPAN_BUCKETS = [0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120]
+
+
+class MetricsRegistry:
+    """Span histograms plus collectors for counters kept elsewhere.
+
+    A histogram is created for every distinct span name and label set. Other
+    components register collectors, functions returning
+    (name, type, help, samples) tuples, so their existing counters are
+    exported without being duplicated here.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}  # (name, labels) -> LatencyHistogram
+        self._collectors = {}
+
+    def observe(self, name, labels, seconds):
+        """
+        Records one span.
+
+        Args:
+            name (str): Span name, e.g. "backend_call"
+            labels (tuple): Sorted (label, value) pairs
+            seconds (float): Duration of the span
+        """
+        key = (name, labels)
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, LatencyHistogram(SPAN_BUCKETS))
+        histogram.record(seconds)
+
+    def register_collector(self, name, collect):
+        """
+        Adds or replaces a collector.
+
+        Args:
+            name (str): Collector name
+            collect (callable): Returns a list of (metric, type, help, samples),
+                where samples is a list of (labels dict, value)
+        """
+        with self._lock:
+            self._collectors[name] = collect
+
+    def summary(self):
+        """
+        Returns count, mean and p95 per span.
+
+        Returns:
+            list: Dicts with "span", the labels, "count", "mean_ms" and "p95_ms"
+        """
+        with self._lock:
+            histograms = dict(self._histograms)
+        rows = []
+        for (name, labels), histogram in sorted(histograms.items()):
+            _, count, total = histogram.snapshot()
+            rows.append(dict(
+                labels, span=name, count=count,
+                mean_ms=round(total / count * 1000, 2) if count else None,
+                p95_ms=histogram.quantile(0.95) * 1000 if count else None
+            ))
+        return rows
+
+    def prometheus_text(self):
+        """
+        Renders every metric in the Prometheus text exposition format.
+
+        Returns:
+            str: The exposition text
+        """
+        with self._lock:
+            histograms = dict(self._histograms)
+            collectors = list(self._collectors.values())
+
+        lines = [
+            "# HELP rag_toolbox_span_seconds Duration of instrumented calls, parse steps and render phases.",
+            "# TYPE rag_toolbox_span_seconds histogram"
+        ]
+        for (name, labels), histogram in sorted(histograms.items()):
+            counts, count, total = histogram.snapshot()
+            base = (("span", name),) + labels
+            cumulative = 0
+            for bound, bucket_count in zip(SPAN_BUCKETS + ["+Inf"], counts):
+                cumulative += bucket_count
+                lines.append(f"rag_toolbox_span_seconds_bucket{_labels(base + (('le', bound),))} {cumulative}")
+            lines.append(f"rag_toolbox_span_seconds_sum{_labels(base)} {total}")
+            lines.append(f"rag_toolbox_span_seconds_count{_labels(base)} {count}")
+
+        for collect in collectors:
+            for metric, kind, help_text, samples in collect():
+                lines.append(f"# HELP {metric} {help_text}")
+                lines.append(f"# TYPE {metric} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{metric}{_labels(tuple(labels.items()))} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(pairs):
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + "}"
+
+
+_registry = MetricsRegistry()
+
+# Callback receiving (name, labels, seconds) for the current session's spans
+_span_sink = contextvars.ContextVar("span_sink", default=None)
+
+
+def get_metrics_registry():
+    """
+    Returns the process-wide metrics registry.
+
+    It is a module global rather than a cached resource so the hot path
+    does not pay for a cache lookup on every span.
+
+    Returns:
+        MetricsRegistry: The shared registry
+    """
+    return _registry
+
+
+class span:
+    """Context manager timing a block and recording it in the span histograms.
+
+    The span is recorded even if the block raises. Label values should come
+    from a small fixed set (endpoints, phases), never from user input. A
+    plain class rather than @contextmanager, since this sits on hot paths.
+
+    Usage:
+        with span("backend_call", endpoint="grammar"):
+            ...
+    """
+
+    __slots__ = ("name", "labels", "started")
+
+    def __init__(self, name, **labels):
+        """
+        Args:
+            name (str): Span name, e.g. "backend_call"
+            **labels: Label values, e.g. endpoint="grammar"
+        """
+        self.name = name
+        self.labels = tuple(sorted(labels.items()))
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        seconds = time.perf_counter() - self.started
+        _registry.observe(self.name, self.labels, seconds)
+        sink = _span_sink.get()
+        if sink is not None:
+            sink(self.name, self.labels, seconds)
+
+
+def capture_spans(sink):
+    """
+    Sends the spans of the current context, and of worker threads that copy
+    it, to a callback as well as to the histograms.
+
+    Streamlit may run later scripts on the same thread, so call it at the
+    start of every run, with None when nothing should be captured.
+
+    Args:
+        sink (callable): Called as sink(name, labels, seconds); None stops capturing
+    """
+    _span_sink.set(sink)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = _registry.prometheus_text().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Scrapes are frequent; keep them out of the Streamlit log
+        pass
+
+
+@st.cache_resource
+def get_metrics_server():
+    """
+    Starts the /metrics endpoint on localhost once per process.
+
+    Returns:
+        ThreadingHTTPServer: The running server, or None if it is disabled or
+        the port is taken (e.g. by another app process)
+    """
+    port = int(os.environ.get(METRICS_PORT_ENV_VAR, DEFAULT_METRICS_PORT))
+    if not port:
+        return None
+    try:
+        server = ThreadingHTTPServer(("127.0.0.1", port), _MetricsHandler)
+    except OSError:
+        return None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    # Cost of a span compared with the work it measures
+    import json
+
+    N = 100000
+    response = json.dumps({
+        "original_text": "i recieve teh letter",
+        "corrected_text": "I receive the letter",
+        "corrections": [{"type": "spelling", "error": "teh", "suggestion": "the", "explanation": "Misspelled."}] * 5
+    })
+
+    started = time.perf_counter()
+    for _ in range(N):
+        with span("benchmark", endpoint="grammar"):
+            pass
+    per_span = (time.perf_counter() - started) / N
+
+    started = time.perf_counter()
+    for _ in range(N // 10):
+        json.loads(response)
+    per_parse = (time.perf_counter() - started) / (N // 10)
+
+    # A grammar check records about five spans around a backend call of
+    # at least 100 ms
+    print(f"span: {per_span * 1e6:.2f} µs")
+    print(f"JSON parse of a grammar response: {per_parse * 1e6:.2f} µs ({per_span / per_parse:.1%} span overhead)")
+    print(f"grammar check with 5 spans and a 100 ms call: {5 * per_span / 0.1:.4%} overhead")
@@ -0,0 +1,162 @@
+import re
+import time
+import uuid
+
+import streamlit as st
+import streamlit.components.v1 as components
+
+from app.utils.history_store import get_history_store
+
+# Messages kept in session memory; older ones are only read from the store
+MAX_MESSAGES_IN_MEMORY = 200
+
+# Browser cookie holding the id the session's history is stored under
+SESSION_COOKIE = "rag_toolbox_sid"
+SESSION_COOKIE_MAX_AGE = 365 * 24 * 3600
+# Query parameter that used to hold the id; removed from the URL on sight
+LEGACY_SESSION_PARAM = "sid"
+
+
+def _remember_session_id(session_id):
+    # Streamlit cannot set cookies itself; the component's script runs on
+    # the app's origin, so the cookie is sent with the next page load
+    components.html(
+        f"""
+        <script>
+            const secure = window.parent.location.protocol === "https:" ? "; Secure" : "";
+            window.parent.document.cookie = "{SESSION_COOKIE}={session_id}; Max-Age={SESSION_COOKIE_MAX_AGE}"
+                + "; Path=/; SameSite=Strict" + secure;
+        </script>
+        """,
+        height=0
+    )
+
+
+def get_session_id():
+    """
+    Returns the id this browser session's history is stored under.
+
+    The id is a random value issued by the server and kept in a cookie of
+    this browser, so a reload or a server restart finds the same history
+    again. It is never put in the URL: a shared or bookmarked link must not
+    hand over the chat history.
+
+    Returns:
+        str: 32-character hex id
+    """
+    if 'chat_history_id' not in st.session_state:
+        session_id = st.context.cookies.get(SESSION_COOKIE)
+        if not isinstance(session_id, str) or not re.fullmatch(r"[0-9a-f]{32}", session_id):
+            session_id = uuid.uuid4().hex
+            _remember_session_id(session_id)
+        st.session_state.chat_history_id = session_id
+    if LEGACY_SESSION_PARAM in st.query_params:
+        del st.query_params[LEGACY_SESSION_PARAM]
+    return st.session_state.chat_history_id
+
+
+def initialize_chat_history():
+    """Initializes the chat history in the session state if it doesn't exist."""
+    session_id = get_session_id()
+    if 'chat_history' not in st.session_state:
+        # Restore the most recent messages of a stored conversation
+        store = get_history_store()
+        total = store.count(session_id, "chat")
+        start = max(0, total - MAX_MESSAGES_IN_MEMORY // 2)
+        st.session_state.chat_history = store.read(session_id, "chat", start) if total else []
+        st.session_state.spilled_messages = start
+
+
+def add_message_to_history(role, content):
+    """
+    Adds a message to the chat history.
+
+    Every message is written to the history store. When the in-memory
+    history grows past MAX_MESSAGES_IN_MEMORY, its older half is dropped
+    from memory and read back from the store when needed.
+
+    Args:
+        role (str): The role of the message sender ('user' or 'assistant')
+        content (str): The text content of the message
+    """
+    message = {"role": role, "content": content, "timestamp": time.time()}
+    get_history_store().append(get_session_id(), "chat", message)
+
+    history = st.session_state.chat_history
+    history.append(message)
+    if len(history) > MAX_MESSAGES_IN_MEMORY:
+        dropped = MAX_MESSAGES_IN_MEMORY // 2
+        del history[:dropped]
+        st.session_state.spilled_messages += dropped
+
+
+def count_messages():
+    """
+    Returns the number of messages in the whole conversation.
+
+    Returns:
+        int: Stored-only plus in-memory messages
+    """
+    return st.session_state.spilled_messages + len(st.session_state.chat_history)
+
+
+def get_chat_history(start=0, end=None):
+    """
+    Returns a slice of the conversation, reading older messages from the store.
+
+    Args:
+        start (int): Index of the first message in the whole conversation
+        end (int, optional): Index after the last message; defaults to the end
+
+    Returns:
+        list: List of message objects
+    """
+    spilled = st.session_state.spilled_messages
+    end = count_messages() if end is None else end
+
+    messages = []
+    if start < spilled:
+        messages = get_history_store().read(get_session_id(), "chat", start, min(end, spilled))
+    messages.extend(st.session_state.chat_history[max(0, start - spilled):max(0, end - spilled)])
+    return messages
+
+
+def clear_chat_history():
+    """Clears the chat history, including the stored messages."""
+    get_history_store().clear(get_session_id(), "chat")
+    st.session_state.chat_history = []
+    st.session_state.spilled_messages = 0
+
+
+def add_challenge_to_history(entry):
+    """
+    Stores a completed writing challenge.
+
+    Args:
+        entry (dict): JSON-serializable challenge record
+    """
+    get_history_store().append(get_session_id(), "challenge", entry)
+
+
+def count_challenges():
+    """
+    Returns the number of completed writing challenges.
+
+    Returns:
+        int: Number of stored challenges
+    """
+    return get_history_store().count(get_session_id(), "challenge")
+
+
+def get_challenge_history(start=0, end=None):
+    """
+    Returns a page of completed writing challenges, oldest first.
+
+    Args:
+        start (int): Index of the first challenge
+        end (int, optional): Index after the last challenge; defaults to the end
+
+    Returns:
+        list: Challenge records
+    """
+    return get_history_store().read(get_session_id(), "challenge", start, end)
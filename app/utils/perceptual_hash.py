@@ -0,0 +1,119 @@
+import io
+
+import numpy as np
+
+HASH_SIZE = 8
+# pHash takes the DCT of a PHASH_SCALE times larger thumbnail
+PHASH_SCALE = 4
+
+
+def _open_grayscale(data, longest_side):
+    # Pillow is only needed once an image is actually hashed
+    from PIL import Image, ImageOps
+
+    image = Image.open(io.BytesIO(data))
+    # JPEG draft mode decodes at a fraction of full size, which is plenty
+    # for a tiny fingerprint
+    image.draft("L", (longest_side * 4, longest_side * 4))
+    return ImageOps.exif_transpose(image).convert("L")
+
+
+def _pixels(image, width, height):
+    from PIL import Image
+
+    image = image.resize((width, height), Image.Resampling.BILINEAR, reducing_gap=2.0)
+    return np.asarray(image, dtype=np.float32)
+
+
+def _pack(bits):
+    return int.from_bytes(np.packbits(bits.ravel()).tobytes(), "big")
+
+
+def _dhash_bits(image, hash_size):
+    pixels = _pixels(image, hash_size + 1, hash_size)
+    return pixels[:, 1:] > pixels[:, :-1]
+
+
+def _dct_matrix(n):
+    # Orthonormal DCT-II basis; the 2-D DCT of X is D @ X @ D.T
+    k = np.arange(n)[:, None]
+    i = np.arange(n)[None, :]
+    matrix = np.cos(np.pi * (2 * i + 1) * k / (2 * n)) * np.sqrt(2.0 / n)
+    matrix[0] /= np.sqrt(2.0)
+    return matrix.astype(np.float32)
+
+
+_DCT = _dct_matrix(HASH_SIZE * PHASH_SCALE)
+
+
+def _phash_bits(image, hash_size):
+    size = hash_size * PHASH_SCALE
+    dct = _DCT if size == _DCT.shape[0] else _dct_matrix(size)
+    coefficients = (dct @ _pixels(image, size, size) @ dct.T)[:hash_size, :hash_size]
+    # The DC term only reflects overall brightness, so it is left out of the median
+    return coefficients > np.median(coefficients.ravel()[1:])
+
+
+def dhash(data, hash_size=HASH_SIZE):
+    """
+    Computes the difference hash of an image.
+
+    Each bit tells whether a pixel is brighter than its right-hand neighbour
+    in a tiny grayscale copy, so re-encoded, resized or slightly recompressed
+    copies of an image get the same or a very close hash.
+
+    Args:
+        data (bytes): Encoded image
+        hash_size (int): Hash is hash_size * hash_size bits
+
+    Returns:
+        int: The hash
+    """
+    return _pack(_dhash_bits(_open_grayscale(data, hash_size + 1), hash_size))
+
+
+def phash(data, hash_size=HASH_SIZE):
+    """
+    Computes the DCT-based perceptual hash of an image.
+
+    Each bit tells whether one of the lowest-frequency DCT coefficients of a
+    small grayscale copy is above their median. It is more tolerant than
+    dHash of small crops, borders and colour adjustments.
+
+    Args:
+        data (bytes): Encoded image
+        hash_size (int): Hash is hash_size * hash_size bits
+
+    Returns:
+        int: The hash
+    """
+    return _pack(_phash_bits(_open_grayscale(data, hash_size * PHASH_SCALE), hash_size))
+
+
+def image_hashes(data, hash_size=HASH_SIZE):
+    """
+    Computes both hashes of an image with a single decode.
+
+    Args:
+        data (bytes): Encoded image
+        hash_size (int): Each hash is hash_size * hash_size bits
+
+    Returns:
+        tuple: (phash, dhash)
+    """
+    image = _open_grayscale(data, hash_size * PHASH_SCALE)
+    return _pack(_phash_bits(image, hash_size)), _pack(_dhash_bits(image, hash_size))
+
+
+def hamming(a, b):
+    """
+    Counts the bits in which two hashes differ.
+
+    Args:
+        a (int): First hash
+        b (int): Second hash
+
+    Returns:
+        int: Hamming distance
+    """
+    return (a ^ b).bit_count()
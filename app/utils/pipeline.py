@@ -0,0 +1,107 @@
+import asyncio
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+
+from app.utils.api_client import request_deadline
+from app.utils.rate_limit import QUEUE_POLL_INTERVAL, deliver_admission_waits
+
+# Seconds each tool may take before its result is given up on
+DEFAULT_DEADLINE = 60
+
+
+@st.cache_resource
+def get_tool_executor():
+    """
+    Returns the thread pool running tool calls, created on first use.
+
+    It is not the event loop's default executor: asyncio.run waits for that
+    one to drain, which would make a timed-out call hold up the whole pipeline.
+
+    Returns:
+        ThreadPoolExecutor: The shared pool
+    """
+    return ThreadPoolExecutor(max_workers=16, thread_name_prefix="tool")
+
+
+def _call_until(func, expires_at):
+    with request_deadline(expires_at):
+        return func()
+
+
+async def _run_tool(name, func, deadline):
+    # The blocking call runs in a worker thread; the shared client keeps its
+    # connection pool, so concurrent calls do not open new connections
+    started = time.perf_counter()
+    loop = asyncio.get_running_loop()
+    try:
+        # run_in_executor does not carry the context over, e.g. the admission_scope.
+        # The tool's requests time out at the deadline too, so they free the worker.
+        call = contextvars.copy_context().run
+        expires_at = time.monotonic() + deadline
+        executor = get_tool_executor()
+        result = await asyncio.wait_for(loop.run_in_executor(executor, call, _call_until, func, expires_at), deadline)
+    except asyncio.TimeoutError:
+        result = {"error": f"No response within {deadline} seconds."}
+    except Exception as e:
+        result = {"error": str(e)}
+    return name, result, time.perf_counter() - started
+
+
+async def iter_tool_results(tools, deadlines=None):
+    """
+    Runs several tools concurrently and yields each result as it lands.
+
+    Args:
+        tools (dict): Tool name -> zero-argument callable
+        deadlines (dict, optional): Tool name -> deadline in seconds
+
+    Yields:
+        tuple: (name, result, elapsed_seconds) in completion order
+    """
+    deadlines = deadlines or {}
+    tasks = [
+        asyncio.create_task(_run_tool(name, func, deadlines.get(name, DEFAULT_DEADLINE)))
+        for name, func in tools.items()
+    ]
+    try:
+        for next_result in asyncio.as_completed(tasks):
+            yield await next_result
+    finally:
+        # Cancel whatever is still pending if the caller stops early
+        for task in tasks:
+            task.cancel()
+
+
+def run_tools(tools, on_result, deadlines=None):
+    """
+    Runs several tools concurrently from synchronous code.
+
+    Args:
+        tools (dict): Tool name -> zero-argument callable
+        on_result (callable): Called with (name, result, elapsed_seconds) as
+            each tool finishes, on the calling thread
+        deadlines (dict, optional): Tool name -> deadline in seconds
+
+    Returns:
+        float: Wall-clock seconds until every tool finished or timed out
+    """
+    async def deliver_waits():
+        # The tools' place in the admission queue is shown from this thread
+        while True:
+            await asyncio.sleep(QUEUE_POLL_INTERVAL)
+            deliver_admission_waits()
+
+    async def main():
+        waits = asyncio.create_task(deliver_waits())
+        try:
+            async for name, result, elapsed in iter_tool_results(tools, deadlines):
+                on_result(name, result, elapsed)
+        finally:
+            waits.cancel()
+
+    started = time.perf_counter()
+    asyncio.run(main())
+    return time.perf_counter() - started
@@ -0,0 +1,294 @@
+import argparse
+import json
+import os
+import re
+import zlib
+
+import numpy as np
+import streamlit as st
+
+from app.utils.ingestion import SUPPORTED_EXTENSIONS, iter_document
+
+# Directory holding a saved index, loaded by the Plagiarism Checker page
+PLAGIARISM_INDEX_ENV_VAR = "RAG_TOOLBOX_PLAGIARISM_INDEX"
+
+WORD_PATTERN = re.compile(r"\w+")
+_UINT64 = np.uint64
+_SHIFT = _UINT64(32)
+
+# Shingles are hashed in blocks to bound the size of the MinHash temporaries
+_BLOCK_SIZE = 4096
+
+
+def _random_uint64(rng, shape, odd=False):
+    values = rng.integers(0, 2 ** 63, size=shape, dtype=np.uint64) * _UINT64(2)
+    return values | _UINT64(1) if odd else values
+
+
+class PlagiarismIndex:
+    """Near-duplicate index over a local document corpus.
+
+    Documents are reduced to word shingles, summarized by MinHash signatures
+    and bucketed with LSH banding. For each band the bucket keys are kept
+    sorted, so candidates are found with a binary search per band instead of
+    comparing against every document. Saved indexes are opened as
+    memory-mapped NumPy arrays.
+    """
+
+    def __init__(self, num_perm=128, bands=32, shingle_size=5, seed=1):
+        """
+        Initializes an empty index.
+
+        Args:
+            num_perm (int): Number of MinHash permutations
+            bands (int): Number of LSH bands; must divide num_perm
+            shingle_size (int): Number of words per shingle
+            seed (int): Seed for the hash functions
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+
+        self.num_perm = num_perm
+        self.bands = bands
+        self.shingle_size = shingle_size
+        self.seed = seed
+
+        rng = np.random.default_rng(seed)
+        self._word_mix = _random_uint64(rng, shingle_size, odd=True)
+        self._perm_a = _random_uint64(rng, (num_perm, 1), odd=True)
+        self._perm_b = _random_uint64(rng, (num_perm, 1))
+        self._band_mix = _random_uint64(rng, num_perm // bands, odd=True)
+
+        self.sources = []
+        self.signatures = np.empty((0, num_perm), dtype=np.uint32)
+        self.band_keys = np.empty((0, bands), dtype=np.uint64)
+        self.sorted_band_keys = np.empty((bands, 0), dtype=np.uint64)
+        self.band_order = np.empty((bands, 0), dtype=np.int64)
+
+    def __len__(self):
+        return len(self.sources)
+
+    def signature(self, text):
+        """
+        Computes the MinHash signature of a text.
+
+        The text may be given in pieces, e.g. the paragraphs of a document as
+        they are extracted; the result is the same as for the pieces joined
+        by blank lines, without the joined text ever being built.
+
+        Args:
+            text (str or iterable): The document text, or an iterable of its pieces
+
+        Returns:
+            numpy.ndarray: uint32 array of length num_perm
+        """
+        pieces = [text] if isinstance(text, str) else text
+        signature = np.full(self.num_perm, np.iinfo(np.uint32).max, dtype=np.uint64)
+
+        # The last shingle_size - 1 words of a piece start shingles with the next one
+        carry = np.empty(0, dtype=np.uint64)
+        hashed_any = False
+        for piece in pieces:
+            words = WORD_PATTERN.findall(piece.lower())
+            word_hashes = np.concatenate([carry, np.fromiter(
+                (zlib.crc32(word.encode("utf-8")) for word in words),
+                dtype=np.uint64, count=len(words)
+            )])
+            if len(word_hashes) < self.shingle_size:
+                carry = word_hashes
+                continue
+            self._update_signature(signature, word_hashes, self.shingle_size)
+            hashed_any = True
+            carry = word_hashes[len(word_hashes) - self.shingle_size + 1:]
+
+        # A text shorter than one shingle is a single shingle of all its words
+        if not hashed_any and len(carry):
+            self._update_signature(signature, carry, len(carry))
+        return signature.astype(np.uint32)
+
+    def _update_signature(self, signature, word_hashes, k):
+        # Combine consecutive word hashes into one 32-bit hash per shingle
+        combined = np.zeros(len(word_hashes) - k + 1, dtype=np.uint64)
+        for j in range(k):
+            combined += word_hashes[j:len(word_hashes) - k + 1 + j] * self._word_mix[j]
+        shingles = np.unique(combined >> _SHIFT)
+
+        # Multiply-shift hashing gives one independent hash function per permutation
+        for start in range(0, len(shingles), _BLOCK_SIZE):
+            block = shingles[start:start + _BLOCK_SIZE][np.newaxis, :]
+            hashed = (self._perm_a * block + self._perm_b) >> _SHIFT
+            np.minimum(signature, hashed.min(axis=1), out=signature)
+
+    def _band_keys(self, signatures):
+        rows = signatures.reshape(len(signatures), self.bands, -1).astype(np.uint64)
+        return (rows * self._band_mix).sum(axis=2, dtype=np.uint64)
+
+    def add_many(self, documents):
+        """
+        Adds documents in bulk and rebuilds the band lookup tables once.
+
+        Args:
+            documents (iterable): (source, text) pairs; source is a file path or URL and
+                text a string or an iterable of its pieces
+        """
+        sources = []
+        signatures = []
+        for source, text in documents:
+            sources.append(source)
+            signatures.append(self.signature(text))
+        if not sources:
+            return
+
+        new_signatures = np.vstack(signatures)
+        self.sources.extend(sources)
+        self.signatures = np.concatenate([self.signatures, new_signatures])
+        self.band_keys = np.concatenate([self.band_keys, self._band_keys(new_signatures)])
+
+        # Sort each band's keys so lookups are a binary search
+        self.band_order = np.argsort(self.band_keys.T, axis=1, kind="stable")
+        self.sorted_band_keys = np.take_along_axis(self.band_keys.T, self.band_order, axis=1)
+
+    def add(self, source, text):
+        """
+        Adds a single document.
+
+        Args:
+            source (str): File path or URL identifying the document
+            text (str): The document text
+        """
+        self.add_many([(source, text)])
+
+    def query(self, text, top_k=5, min_similarity=0.1):
+        """
+        Finds the indexed documents most similar to a text.
+
+        Args:
+            text (str or iterable): The text to check, or an iterable of its pieces
+            top_k (int): Maximum number of matches to return
+            min_similarity (float): Smallest estimated Jaccard similarity to report
+
+        Returns:
+            list: (source, similarity) tuples sorted by decreasing similarity
+        """
+        if not self.sources:
+            return []
+
+        signature = self.signature(text)
+        query_keys = self._band_keys(signature[np.newaxis, :])[0]
+
+        candidates = []
+        for band in range(self.bands):
+            keys = self.sorted_band_keys[band]
+            left = np.searchsorted(keys, query_keys[band], side="left")
+            right = np.searchsorted(keys, query_keys[band], side="right")
+            if right > left:
+                candidates.append(self.band_order[band, left:right])
+        if not candidates:
+            return []
+
+        candidates = np.unique(np.concatenate(candidates))
+        similarities = (self.signatures[candidates] == signature).mean(axis=1)
+        best = np.argsort(-similarities, kind="stable")[:top_k]
+        return [
+            (self.sources[candidates[i]], float(similarities[i]))
+            for i in best if similarities[i] >= min_similarity
+        ]
+
+    def save(self, directory):
+        """
+        Writes the index to a directory.
+
+        Args:
+            directory (str): Target directory, created if missing
+        """
+        os.makedirs(directory, exist_ok=True)
+
+        # Write to temporary files first: the old files may still be memory-mapped
+        arrays = {
+            "signatures.npy": self.signatures,
+            "sorted_band_keys.npy": self.sorted_band_keys,
+            "band_order.npy": self.band_order
+        }
+        for name, array in arrays.items():
+            path = os.path.join(directory, name)
+            with open(path + ".tmp", "wb") as f:
+                np.save(f, array)
+            os.replace(path + ".tmp", path)
+
+        path = os.path.join(directory, "index.json")
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({
+                "num_perm": self.num_perm,
+                "bands": self.bands,
+                "shingle_size": self.shingle_size,
+                "seed": self.seed,
+                "sources": self.sources
+            }, f)
+        os.replace(path + ".tmp", path)
+
+    @classmethod
+    def load(cls, directory):
+        """
+        Opens a saved index with its arrays memory-mapped read-only.
+
+        Args:
+            directory (str): Directory written by save
+
+        Returns:
+            PlagiarismIndex: The loaded index
+        """
+        with open(os.path.join(directory, "index.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+
+        index = cls(meta["num_perm"], meta["bands"], meta["shingle_size"], meta["seed"])
+        index.sources = meta["sources"]
+        index.signatures = np.load(os.path.join(directory, "signatures.npy"), mmap_mode="r")
+        index.sorted_band_keys = np.load(os.path.join(directory, "sorted_band_keys.npy"), mmap_mode="r")
+        index.band_order = np.load(os.path.join(directory, "band_order.npy"), mmap_mode="r")
+        index.band_keys = np.ascontiguousarray(
+            np.take_along_axis(index.sorted_band_keys, np.argsort(index.band_order, axis=1), axis=1).T
+        )
+        return index
+
+
+def iter_corpus(directory):
+    """
+    Yields every supported document below a directory.
+
+    Args:
+        directory (str): Root of the corpus
+
+    Yields:
+        tuple: (path, paragraphs) for each document, the paragraphs read lazily
+    """
+    for root, _, files in os.walk(directory):
+        for name in sorted(files):
+            if name.lower().endswith(SUPPORTED_EXTENSIONS):
+                path = os.path.join(root, name)
+                yield path, iter_document(path, use_cache=False)
+
+
+@st.cache_resource
+def get_plagiarism_index():
+    """
+    Returns the local plagiarism index shared by every Streamlit session.
+
+    Returns:
+        PlagiarismIndex: The saved index, or an empty one if none is configured
+    """
+    directory = os.environ.get(PLAGIARISM_INDEX_ENV_VAR)
+    if directory and os.path.exists(os.path.join(directory, "index.json")):
+        return PlagiarismIndex.load(directory)
+    return PlagiarismIndex()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the local plagiarism index from a folder of documents.")
+    parser.add_argument("corpus", help="Folder containing .txt, .docx and .pdf files")
+    parser.add_argument("output", help="Folder to write the index to")
+    args = parser.parse_args()
+
+    index = PlagiarismIndex.load(args.output) if os.path.exists(os.path.join(args.output, "index.json")) else PlagiarismIndex()
+    index.add_many(iter_corpus(args.corpus))
+    index.save(args.output)
+    print(f"Indexed {len(index)} documents into {args.output}")
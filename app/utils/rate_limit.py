@@ -0,0 +1,486 @@
+import contextvars
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, wait
+from contextlib import contextmanager
+
+# How often queued requests re-check their position, in seconds
+QUEUE_POLL_INTERVAL = 0.25
+
+# Idle sessions' buckets are dropped beyond this many sessions
+MAX_TRACKED_SESSIONS = 10000
+
+
+class TokenBucket:
+    """Thread-safe token bucket.
+
+    Tokens are added at a steady rate up to a burst capacity; each request
+    takes one. Callers that find the bucket empty wait for the next token,
+    so concurrent workers together never exceed the configured rate.
+    """
+
+    def __init__(self, rate, capacity=None):
+        """
+        Initializes a full bucket.
+
+        Args:
+            rate (float): Tokens added per second
+            capacity (float, optional): Largest burst; defaults to one second's worth
+        """
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def available(self):
+        """
+        Returns the tokens in the bucket right now.
+
+        Returns:
+            float: Current tokens
+        """
+        with self._lock:
+            self._refill()
+            return self.tokens
+
+    def try_acquire(self, tokens=1):
+        """
+        Takes tokens if they are available right now.
+
+        Args:
+            tokens (float): Tokens to take
+
+        Returns:
+            float: 0 if the tokens were taken, otherwise seconds until they will be
+        """
+        with self._lock:
+            self._refill()
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return 0.0
+            return (tokens - self.tokens) / self.rate
+
+    def reserve(self, tokens=1, max_wait=math.inf):
+        """
+        Takes tokens ahead of time if they will be available within max_wait.
+
+        The bucket may go negative; later callers then wait for the debt to
+        be refilled too, so reservations are served in order.
+
+        Args:
+            tokens (float): Tokens to take
+            max_wait (float): Longest acceptable wait in seconds
+
+        Returns:
+            float: Seconds to wait before using the tokens; if more than
+            max_wait, nothing was taken
+        """
+        with self._lock:
+            self._refill()
+            wait = max(0.0, (tokens - self.tokens) / self.rate)
+            if wait <= max_wait:
+                self.tokens -= tokens
+            return wait
+
+    def acquire(self, tokens=1):
+        """
+        Takes tokens, waiting until they are available.
+
+        Args:
+            tokens (float): Tokens to take
+        """
+        while True:
+            wait = self.try_acquire(tokens)
+            if not wait:
+                return
+            time.sleep(wait)
+
+
+class AdmissionRejectedError(Exception):
+    """Raised instead of queueing a request that would wait too long."""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class AdmissionScope:
+    """Session and wait callback shared by the requests of one user action.
+
+    Only the action's first request takes a token from the session's
+    bucket. The chunks, hedge backups and parallel tool calls it fans out
+    into are admitted through the global and per-model queue alone, so a
+    long document is not cut short by the per-session limit.
+
+    on_wait is only called on the thread that opened the scope, since only
+    that thread may draw in Streamlit. Waits reported by worker threads are
+    kept until that thread calls deliver(), which wait_first_completed does
+    while it blocks on the workers.
+    """
+
+    def __init__(self, session, on_wait=None):
+        """
+        Initializes a scope whose session token is not yet taken.
+
+        Args:
+            session (str): Session id used for the per-session limit
+            on_wait (callable, optional): Called as on_wait(position, eta_seconds)
+                while a request waits
+        """
+        self.session = session
+        self.on_wait = on_wait
+        self.thread = threading.get_ident()
+        self._lock = threading.Lock()
+        self._charged = False
+        self._rejection = None
+        self._reported = None
+
+    def charge(self, controller):
+        """
+        Takes the action's session token on the first call.
+
+        Concurrent requests wait for the first one's token, and fail with
+        its rejection if it was rejected.
+
+        Args:
+            controller (AdmissionController): Controller holding the session buckets
+
+        Raises:
+            AdmissionRejectedError: If the session is over its rate limit
+        """
+        with self._lock:
+            if not self._charged:
+                self._charged = True
+                try:
+                    controller.charge_session(self.session, self.report)
+                except AdmissionRejectedError as e:
+                    self._rejection = e
+                    raise
+            elif self._rejection is not None:
+                raise AdmissionRejectedError(str(self._rejection), self._rejection.retry_after)
+
+    def report(self, position, eta):
+        """
+        Passes a request's wait to on_wait, or keeps it for deliver() when
+        called from a worker thread.
+
+        Args:
+            position (int): Place in the queue; 0 while waiting for the session's own bucket
+            eta (float): Seconds until the request is expected to be sent
+        """
+        if self.on_wait is None:
+            return
+        if threading.get_ident() == self.thread:
+            self.on_wait(position, eta)
+        else:
+            self._reported = (position, eta)
+
+    def deliver(self):
+        """Passes the latest wait reported by a worker thread to on_wait."""
+        reported, self._reported = self._reported, None
+        if reported is not None and threading.get_ident() == self.thread:
+            self.on_wait(*reported)
+
+
+# AdmissionScope of the requests made in the current context
+_admission_scope = contextvars.ContextVar("admission_scope", default=None)
+
+
+@contextmanager
+def admission_scope(session, on_wait=None):
+    """
+    Attributes the requests made inside the block to one action of a session.
+
+    Thread pools that run work for the block should copy the context
+    (contextvars.copy_context) so their requests are attributed too.
+
+    Args:
+        session (str): Session id used for the per-session limit
+        on_wait (callable, optional): Called as on_wait(position, eta_seconds)
+            on the calling thread while a request waits in the queue
+    """
+    token = _admission_scope.set(AdmissionScope(session, on_wait))
+    try:
+        yield
+    finally:
+        _admission_scope.reset(token)
+
+
+def current_admission_scope():
+    """
+    Returns the scope set by admission_scope.
+
+    Returns:
+        AdmissionScope: The current scope, or None outside admission_scope
+    """
+    return _admission_scope.get()
+
+
+def deliver_admission_waits():
+    """Passes waits reported by worker threads to the current scope's on_wait."""
+    scope = _admission_scope.get()
+    if scope is not None:
+        scope.deliver()
+
+
+def wait_first_completed(futures, timeout=None):
+    """
+    Waits like concurrent.futures.wait(return_when=FIRST_COMPLETED),
+    delivering the admission waits of the workers while it blocks.
+
+    Args:
+        futures (iterable): Futures to wait for
+        timeout (float, optional): Longest wait in seconds; None waits indefinitely
+
+    Returns:
+        tuple: (done, not_done) sets of futures
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while True:
+        remaining = QUEUE_POLL_INTERVAL if deadline is None else min(QUEUE_POLL_INTERVAL, deadline - time.monotonic())
+        done, not_done = wait(futures, max(0.0, remaining), return_when=FIRST_COMPLETED)
+        deliver_admission_waits()
+        if done or not not_done or (deadline is not None and time.monotonic() >= deadline):
+            return done, not_done
+
+
+class AdmissionController:
+    """Global, per-model and per-session rate limits with a bounded wait queue.
+
+    A session over its own rate waits for its next token, or is rejected at
+    once if that is more than max_session_wait away. Requests within their
+    session's rate then join a FIFO queue for the global and per-model
+    buckets; only the head of the queue takes tokens. A request that finds
+    max_queue requests waiting, or that waits longer than max_queue_wait,
+    is rejected, which bounds the latency of every admitted request instead
+    of letting the queue grow without limit under overload.
+    """
+
+    def __init__(self, global_rate, model_rate, session_rate, global_burst=None, model_burst=None,
+                 session_burst=None, max_queue=50, max_queue_wait=15.0, max_session_wait=20.0):
+        """
+        Initializes the controller with full buckets.
+
+        Args:
+            global_rate (float): Requests per second across all sessions
+            model_rate (float): Requests per second to each model
+            session_rate (float): Requests per second from each session
+            global_burst (float, optional): Global bucket capacity
+            model_burst (float, optional): Per-model bucket capacity
+            session_burst (float, optional): Per-session bucket capacity
+            max_queue (int): Requests allowed to wait for the global and model buckets
+            max_queue_wait (float): Seconds a request may wait in the queue
+            max_session_wait (float): Seconds a session may wait for its own bucket
+        """
+        self.global_bucket = TokenBucket(global_rate, global_burst)
+        self.model_rate = model_rate
+        self.model_burst = model_burst
+        self.session_rate = session_rate
+        self.session_burst = session_burst
+        self.max_queue = max_queue
+        self.max_queue_wait = max_queue_wait
+        self.max_session_wait = max_session_wait
+
+        self._model_buckets = {}
+        self._session_buckets = OrderedDict()
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self.admitted = 0
+        self.rejected = 0
+
+    def _model_bucket(self, model):
+        # Caller holds the lock
+        if model not in self._model_buckets:
+            self._model_buckets[model] = TokenBucket(self.model_rate, self.model_burst)
+        return self._model_buckets[model]
+
+    def _session_bucket(self, session):
+        with self._cond:
+            bucket = self._session_buckets.get(session)
+            if bucket is None:
+                bucket = self._session_buckets[session] = TokenBucket(self.session_rate, self.session_burst)
+                if len(self._session_buckets) > MAX_TRACKED_SESSIONS:
+                    self._session_buckets.popitem(last=False)
+            self._session_buckets.move_to_end(session)
+            return bucket
+
+    def _reject(self, message, retry_after):
+        # Caller holds the lock
+        self.rejected += 1
+        return AdmissionRejectedError(message, retry_after)
+
+    def _eta(self, position, model_bucket):
+        # Caller holds the lock; seconds until the request at position gets its tokens
+        return max(0.0, *((position - bucket.available()) / bucket.rate
+                          for bucket in (self.global_bucket, model_bucket)))
+
+    def charge_session(self, session, on_wait=None):
+        """
+        Takes one token from a session's bucket, waiting for it if needed.
+
+        Args:
+            session (str): Session id
+            on_wait (callable, optional): Called as on_wait(0, eta_seconds) before waiting
+
+        Raises:
+            AdmissionRejectedError: If the token is more than max_session_wait away
+        """
+        wait = self._session_bucket(session).reserve(1, self.max_session_wait)
+        if wait > self.max_session_wait:
+            with self._cond:
+                raise self._reject(
+                    f"You are sending requests too quickly. Please try again in {math.ceil(wait)} s.", wait
+                )
+        if wait:
+            if on_wait:
+                on_wait(0, wait)
+            time.sleep(wait)
+
+    def admit(self, session=None, model=None, on_wait=None):
+        """
+        Blocks until a request may be sent.
+
+        Args:
+            session (str, optional): Session id; None skips the per-session limit
+            model (str, optional): Model name for the per-model limit
+            on_wait (callable, optional): Called as on_wait(position, eta_seconds)
+                whenever the request's place in the queue changes
+
+        Raises:
+            AdmissionRejectedError: If the request would wait too long
+        """
+        if session is not None:
+            self.charge_session(session, on_wait)
+
+        ticket = object()
+        with self._cond:
+            model_bucket = self._model_bucket(model)
+            if len(self._queue) >= self.max_queue:
+                eta = self._eta(len(self._queue) + 1, model_bucket)
+                raise self._reject(
+                    f"The service is busy: {len(self._queue)} requests are already waiting. "
+                    f"Please try again in {math.ceil(eta)} s.", eta
+                )
+            self._queue.append(ticket)
+
+        deadline = time.monotonic() + self.max_queue_wait
+        admitted = False
+        reported = None
+        try:
+            while True:
+                with self._cond:
+                    position = self._queue.index(ticket) + 1
+                    eta = self._eta(position, model_bucket)
+                    if position == 1 and eta == 0:
+                        self.global_bucket.try_acquire()
+                        model_bucket.try_acquire()
+                        self._queue.popleft()
+                        self._cond.notify_all()
+                        self.admitted += 1
+                        admitted = True
+                        return
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise self._reject(
+                            "The service is busy and your request timed out in the queue. Please try again.",
+                            eta
+                        )
+                    # Waits too short to notice are not reported
+                    status = (position, math.ceil(eta))
+                    if status == reported or not on_wait or eta < QUEUE_POLL_INTERVAL:
+                        self._cond.wait(min(eta if position == 1 else QUEUE_POLL_INTERVAL,
+                                            QUEUE_POLL_INTERVAL, remaining))
+                        continue
+                reported = status
+                on_wait(position, eta)
+        finally:
+            if not admitted:
+                with self._cond:
+                    if ticket in self._queue:
+                        self._queue.remove(ticket)
+                        self._cond.notify_all()
+
+    def stats(self):
+        """
+        Returns admission counters.
+
+        Returns:
+            dict: Requests admitted, rejected and currently queued
+        """
+        with self._cond:
+            return {"admitted": self.admitted, "rejected": self.rejected, "queued": len(self._queue)}
+
+
+if __name__ == "__main__":
+    # Open-loop load at twice a backend's capacity, with and without admission
+    # control. The backend is simulated (4 workers, 50 ms per request, so 80
+    # requests/s) unless a URL of the local API is given, e.g.
+    #   RAG_TOOLBOX_FAKE_LATENCY=0.05 uvicorn api.main:app --workers 1
+    #   python -m app.utils.rate_limit http://localhost:8000
+    import random
+    import sys
+    from concurrent.futures import ThreadPoolExecutor
+
+    import requests
+
+    CAPACITY = 80.0
+    OFFERED_RATE = 2 * CAPACITY
+    DURATION = 5.0
+    SESSIONS = 50
+
+    base_url = sys.argv[1].rstrip("/") if len(sys.argv) > 1 else None
+    slots = threading.Semaphore(4)
+    http = requests.Session()
+
+    def backend_call():
+        if base_url:
+            http.post(f"{base_url}/grammar/gemini/check_grammar", json={"text": "teh text"}, timeout=60)
+        else:
+            with slots:
+                time.sleep(0.05)
+
+    def run(admission):
+        latencies, rejected = [], []
+
+        def request(session):
+            started = time.perf_counter()
+            try:
+                if admission:
+                    admission.admit(session, "gemini")
+                backend_call()
+                latencies.append(time.perf_counter() - started)
+            except AdmissionRejectedError:
+                rejected.append(time.perf_counter() - started)
+
+        with ThreadPoolExecutor(max_workers=512) as pool:
+            started = time.perf_counter()
+            arrivals = 0
+            while time.perf_counter() - started < DURATION:
+                pool.submit(request, f"s{random.randrange(SESSIONS)}")
+                arrivals += 1
+                time.sleep(random.expovariate(OFFERED_RATE))
+        latencies.sort()
+        p50, p99 = (latencies[min(len(latencies) - 1, int(len(latencies) * q))] * 1000 for q in (0.5, 0.99))
+        reject_ms = max(rejected) * 1000 if rejected else 0.0
+        return arrivals, len(latencies), len(rejected), p50, p99, reject_ms
+
+    print(f"offered {OFFERED_RATE:.0f} req/s for {DURATION:.0f} s against ~{CAPACITY:.0f} req/s of capacity")
+    print(f"{'':<20} {'sent':>5} {'served':>6} {'rejected':>8} {'p50 ms':>7} {'p99 ms':>8} {'slowest reject ms':>17}")
+    configs = {
+        "no admission": None,
+        "admission control": AdmissionController(
+            global_rate=0.9 * CAPACITY, model_rate=CAPACITY, session_rate=5.0, global_burst=4,
+            model_burst=4, session_burst=10, max_queue=20, max_queue_wait=1.0
+        ),
+    }
+    for name, admission in configs.items():
+        sent, served, rejected, p50, p99, reject_ms = run(admission)
+        print(f"{name:<20} {sent:>5} {served:>6} {rejected:>8} {p50:>7.0f} {p99:>8.0f} {reject_ms:>17.1f}")
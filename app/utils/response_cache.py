@@ -0,0 +1,228 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+import streamlit as st
+
+from app.utils.instrumentation import get_metrics_registry
+
+# Optional on-disk tier, enabled by pointing this variable at a SQLite file
+CACHE_DB_ENV_VAR = "RAG_TOOLBOX_CACHE_DB"
+
+
+def normalize_text(text):
+    """
+    Normalizes text so that trivially different submissions share a cache entry.
+
+    Args:
+        text (str): The raw text entered by the user
+
+    Returns:
+        str: Text with unified line endings, Unicode form and inner spacing
+    """
+    text = unicodedata.normalize("NFC", text).replace("\r\n", "\n")
+    text = re.sub(r"[ \t]+", " ", text)
+    return text.strip()
+
+
+def make_cache_key(endpoint, model, text, style=None):
+    """
+    Builds a content-addressed cache key for a backend request.
+
+    Args:
+        endpoint (str): Logical endpoint name, e.g. "grammar"
+        model (str): The selected LLM
+        text (str): The text sent to the backend
+        style (str, optional): Paraphrasing style, if any
+
+    Returns:
+        str: Hex SHA-256 digest identifying the request
+    """
+    raw = json.dumps([endpoint, model, style, normalize_text(text)], ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Two-tier cache for backend responses.
+
+    The first tier is a bounded in-memory LRU. The optional second tier is a
+    SQLite table that survives restarts and is shared between processes.
+    Entries expire after a TTL and both tiers are evicted by total size.
+    """
+
+    def __init__(self, max_entries=512, max_bytes=32 * 1024 * 1024, ttl=24 * 3600,
+                 db_path=None, db_max_bytes=256 * 1024 * 1024):
+        """
+        Initializes the cache.
+
+        Args:
+            max_entries (int): Maximum number of entries kept in memory
+            max_bytes (int): Maximum total size of the in-memory entries
+            ttl (float): Seconds before an entry expires
+            db_path (str, optional): Path of the SQLite file for the disk tier
+            db_max_bytes (int): Maximum total size of the disk tier
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.db_max_bytes = db_max_bytes
+
+        self._entries = OrderedDict()  # key -> (expires_at, size, value)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT, size INTEGER, "
+                "expires_at REAL, accessed_at REAL)"
+            )
+            self._db.commit()
+
+    def get(self, key):
+        """
+        Looks up a cached response.
+
+        Args:
+            key (str): Key built with make_cache_key
+
+        Returns:
+            dict: The cached response, or None on a miss
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self._counters["hits"] += 1
+                    return json.loads(entry[2])
+                self._remove(key)
+
+            value = self._db_get(key, now)
+            if value is not None:
+                self._counters["disk_hits"] += 1
+                self._store(key, value, now)
+                return json.loads(value)
+
+            self._counters["misses"] += 1
+            return None
+
+    def set(self, key, response):
+        """
+        Stores a response in both tiers.
+
+        Args:
+            key (str): Key built with make_cache_key
+            response (dict): JSON-serializable backend response
+        """
+        value = json.dumps(response, ensure_ascii=False)
+        now = time.time()
+        with self._lock:
+            self._store(key, value, now)
+            self._db_set(key, value, now)
+
+    def stats(self):
+        """
+        Returns hit/miss counters and the current memory usage.
+
+        Returns:
+            dict: Counter values plus "entries" and "bytes"
+        """
+        with self._lock:
+            return dict(self._counters, entries=len(self._entries), bytes=self._bytes)
+
+    def clear(self):
+        """Removes every entry from both tiers."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+                self._db.commit()
+
+    def _store(self, key, value, now):
+        if key in self._entries:
+            self._remove(key)
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        self._entries[key] = (now + self.ttl, size, value)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self._counters["evictions"] += 1
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def _db_get(self, key, now):
+        if self._db is None:
+            return None
+        row = self._db.execute(
+            "SELECT value FROM responses WHERE key = ? AND expires_at > ?", (key, now)
+        ).fetchone()
+        if row is None:
+            return None
+        self._db.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+        self._db.commit()
+        return row[0]
+
+    def _db_set(self, key, value, now):
+        if self._db is None:
+            return
+        self._db.execute(
+            "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+            (key, value, len(value.encode("utf-8")), now + self.ttl, now)
+        )
+        self._db.execute("DELETE FROM responses WHERE expires_at <= ?", (now,))
+
+        # Drop the least recently used rows until the table fits its budget
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total > self.db_max_bytes:
+            rows = self._db.execute(
+                "SELECT key, size FROM responses ORDER BY accessed_at"
+            ).fetchall()
+            stale = []
+            for row_key, size in rows:
+                if total <= self.db_max_bytes:
+                    break
+                stale.append((row_key,))
+                total -= size
+            self._db.executemany("DELETE FROM responses WHERE key = ?", stale)
+            self._counters["evictions"] += len(stale)
+        self._db.commit()
+
+
+@st.cache_resource
+def get_response_cache():
+    """
+    Returns the process-wide response cache shared by every Streamlit session.
+
+    Returns:
+        ResponseCache: The shared cache
+    """
+    cache = ResponseCache(db_path=os.environ.get(CACHE_DB_ENV_VAR))
+
+    def collect():
+        stats = cache.stats()
+        return [
+            ("rag_toolbox_response_cache_events_total", "counter", "Response cache lookups and evictions.",
+             [({"event": event}, stats[event]) for event in ("hits", "disk_hits", "misses", "evictions")]),
+            ("rag_toolbox_response_cache_bytes", "gauge", "Size of the in-memory cache entries.",
+             [({}, stats["bytes"])]),
+        ]
+
+    get_metrics_registry().register_collector("response_cache", collect)
+    return cache
@@ -0,0 +1,359 @@
+import os
+import re
+import time
+import zlib
+
+import numpy as np
+import streamlit as st
+
+from app.utils.chunking import pack_paragraphs
+from app.utils.ingestion import file_hash, iter_document
+
+# Set to "google" to embed with Gemini embeddings instead of the local hashing embedder
+EMBEDDER_ENV_VAR = "RAG_TOOLBOX_EMBEDDER"
+
+WORD_PATTERN = re.compile(r"\w+")
+
+# An IVF index is built once the store holds this many chunks
+IVF_MIN_VECTORS = 20000
+EMBED_BATCH_SIZE = 256
+
+
+def _normalize(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class HashingEmbedder:
+    """Deterministic CPU-only embedder based on the hashing trick.
+
+    Each word is hashed to a dimension and a sign, counts are damped with
+    log1p and the vectors are L2-normalized. No model download or network
+    access is needed, which makes it suitable for offline use and tests.
+    """
+
+    def __init__(self, dim=256):
+        """
+        Initializes the embedder.
+
+        Args:
+            dim (int): Number of dimensions of the vectors
+        """
+        self.dim = dim
+
+    def embed(self, texts):
+        """
+        Embeds a batch of texts.
+
+        Args:
+            texts (list): Strings to embed
+
+        Returns:
+            numpy.ndarray: float32 array of shape (len(texts), dim)
+        """
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            words = WORD_PATTERN.findall(text.lower())
+            if not words:
+                continue
+            hashes = np.fromiter(
+                (zlib.crc32(word.encode("utf-8")) for word in words),
+                dtype=np.uint32, count=len(words)
+            )
+            signs = np.where(hashes & 0x80000000, -1.0, 1.0).astype(np.float32)
+            np.add.at(matrix[row], hashes % self.dim, signs)
+        matrix = np.copysign(np.log1p(np.abs(matrix)), matrix)
+        return _normalize(matrix).astype(np.float32)
+
+
+class LangChainEmbedder:
+    """Adapter for any LangChain Embeddings object."""
+
+    def __init__(self, embeddings):
+        """
+        Initializes the adapter.
+
+        Args:
+            embeddings: Object with an embed_documents(texts) method
+        """
+        self.embeddings = embeddings
+
+    def embed(self, texts):
+        """
+        Embeds a batch of texts.
+
+        Args:
+            texts (list): Strings to embed
+
+        Returns:
+            numpy.ndarray: L2-normalized float32 array with one row per text
+        """
+        vectors = np.asarray(self.embeddings.embed_documents(list(texts)), dtype=np.float32)
+        return _normalize(vectors).astype(np.float32)
+
+
+class VectorIndex:
+    """Inner-product index over a contiguous float32 matrix.
+
+    Search is exact by default. After build_ivf, vectors are partitioned
+    around k-means centroids and a query only scores the n_probe closest
+    partitions.
+    """
+
+    def __init__(self, dim, capacity=1024):
+        """
+        Initializes an empty index.
+
+        Args:
+            dim (int): Number of dimensions of the vectors
+            capacity (int): Initial number of rows to allocate
+        """
+        self.dim = dim
+        self.size = 0
+        self._matrix = np.empty((capacity, dim), dtype=np.float32)
+        self.centroids = None
+        self._lists = None
+
+    @property
+    def vectors(self):
+        return self._matrix[:self.size]
+
+    def add(self, vectors):
+        """
+        Appends vectors, doubling the storage when it is full.
+
+        Args:
+            vectors (numpy.ndarray): Array of shape (n, dim)
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        needed = self.size + len(vectors)
+        if needed > len(self._matrix):
+            grown = np.empty((max(needed, 2 * len(self._matrix)), self.dim), dtype=np.float32)
+            grown[:self.size] = self.vectors
+            self._matrix = grown
+        self._matrix[self.size:needed] = vectors
+
+        if self.centroids is not None:
+            assignments = np.argmax(vectors @ self.centroids.T, axis=1)
+            for list_id in np.unique(assignments):
+                new_rows = self.size + np.flatnonzero(assignments == list_id)
+                self._lists[list_id] = np.concatenate([self._lists[list_id], new_rows])
+        self.size = needed
+
+    def build_ivf(self, n_lists=None, iterations=10, sample_size=20000, seed=0):
+        """
+        Partitions the vectors with spherical k-means.
+
+        Args:
+            n_lists (int, optional): Number of partitions; defaults to sqrt(size)
+            iterations (int): Number of k-means iterations
+            sample_size (int): Number of vectors the centroids are trained on
+            seed (int): Seed for sampling and initialization
+        """
+        rng = np.random.default_rng(seed)
+        n_lists = n_lists or max(1, int(np.sqrt(self.size)))
+        sample = self.vectors[rng.choice(self.size, min(sample_size, self.size), replace=False)]
+        centroids = sample[rng.choice(len(sample), n_lists, replace=False)]
+
+        for _ in range(iterations):
+            assignments = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignments, sample)
+            empty = ~sums.any(axis=1)
+            sums[empty] = centroids[empty]
+            centroids = _normalize(sums).astype(np.float32)
+
+        assignments = np.argmax(self.vectors @ centroids.T, axis=1)
+        order = np.argsort(assignments, kind="stable")
+        boundaries = np.searchsorted(assignments[order], np.arange(n_lists + 1))
+        self.centroids = centroids
+        self._lists = [order[boundaries[i]:boundaries[i + 1]] for i in range(n_lists)]
+
+    def search(self, query, k=4, n_probe=16):
+        """
+        Finds the vectors with the highest inner product with a query.
+
+        Args:
+            query (numpy.ndarray): Query vector of length dim
+            k (int): Number of results
+            n_probe (int): Number of IVF partitions to scan, if built
+
+        Returns:
+            list: (row, score) tuples sorted by decreasing score
+        """
+        if self.size == 0:
+            return []
+
+        query = np.asarray(query, dtype=np.float32)
+        if self.centroids is None:
+            rows = None
+            scores = self.vectors @ query
+        else:
+            n_probe = min(n_probe, len(self.centroids))
+            probed = np.argpartition(-(self.centroids @ query), n_probe - 1)[:n_probe]
+            rows = np.concatenate([self._lists[i] for i in probed])
+            scores = self._matrix[rows] @ query
+
+        k = min(k, len(scores))
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        if rows is not None:
+            return [(int(rows[i]), float(scores[i])) for i in top]
+        return [(int(i), float(scores[i])) for i in top]
+
+
+class DocumentStore:
+    """Chunked documents of one chat session with their vector index."""
+
+    def __init__(self, embedder):
+        """
+        Initializes an empty store.
+
+        Args:
+            embedder: Object with an embed(texts) method
+        """
+        self.embedder = embedder
+        self.index = None
+        self.chunks = []  # (source, text) per index row
+        self.file_hashes = set()
+        self._ivf_size = 0
+
+    def add_file(self, file):
+        """
+        Chunks, embeds and indexes an uploaded document once.
+
+        Args:
+            file: Path or binary file-like object accepted by iter_document
+
+        Returns:
+            int: Number of chunks added; 0 if the file was already indexed
+        """
+        digest = file_hash(file) if hasattr(file, "read") else file
+        if digest in self.file_hashes:
+            return 0
+
+        source = getattr(file, "name", str(file))
+        batch = []
+        added = 0
+        for chunk in pack_paragraphs(iter_document(file)):
+            batch.append(chunk)
+            if len(batch) == EMBED_BATCH_SIZE:
+                added += self.add_chunks(source, batch)
+                batch = []
+        if batch:
+            added += self.add_chunks(source, batch)
+
+        self.file_hashes.add(digest)
+        return added
+
+    def add_chunks(self, source, texts):
+        """
+        Embeds and indexes a batch of chunks.
+
+        Args:
+            source (str): Name of the document the chunks come from
+            texts (list): Chunk strings
+
+        Returns:
+            int: Number of chunks added
+        """
+        vectors = self.embedder.embed(texts)
+        if self.index is None:
+            self.index = VectorIndex(vectors.shape[1])
+        self.index.add(vectors)
+        self.chunks.extend((source, text) for text in texts)
+
+        # Rebuild the partitions whenever the store has doubled since the last build
+        if self.index.size >= max(IVF_MIN_VECTORS, 2 * self._ivf_size):
+            self.index.build_ivf()
+            self._ivf_size = self.index.size
+        return len(texts)
+
+    def search(self, query, k=4):
+        """
+        Retrieves the chunks most relevant to a query.
+
+        Args:
+            query (str): The user's question
+            k (int): Number of chunks to return
+
+        Returns:
+            list: (source, text, score) tuples sorted by decreasing score
+        """
+        if self.index is None:
+            return []
+        query_vector = self.embedder.embed([query])[0]
+        return [
+            (*self.chunks[row], score)
+            for row, score in self.index.search(query_vector, k)
+            if score > 0
+        ]
+
+
+def build_rag_message(question, hits):
+    """
+    Prepends retrieved chunks to the user's question.
+
+    Args:
+        question (str): The user's message
+        hits (list): (source, text, score) tuples from DocumentStore.search
+
+    Returns:
+        str: The message to send to the chat backend
+    """
+    if not hits:
+        return question
+    context = "\n\n".join(
+        f"[{i}] ({source})\n{text}" for i, (source, text, _) in enumerate(hits, start=1)
+    )
+    return (
+        "Answer the question using the context below when it is relevant.\n\n"
+        f"Context:\n{context}\n\n"
+        f"Question: {question}"
+    )
+
+
+@st.cache_resource
+def get_embedder():
+    """
+    Returns the embedder shared by every Streamlit session.
+
+    Returns:
+        HashingEmbedder or LangChainEmbedder: The configured embedder
+    """
+    if os.environ.get(EMBEDDER_ENV_VAR) == "google":
+        from langchain_google_genai import GoogleGenerativeAIEmbeddings
+        return LangChainEmbedder(GoogleGenerativeAIEmbeddings(model="models/embedding-001"))
+    return HashingEmbedder()
+
+
+if __name__ == "__main__":
+    # Recall-vs-latency benchmark of exact and IVF search on synthetic data
+    n_vectors, dim, n_queries, k = 100000, 256, 200, 10
+    rng = np.random.default_rng(0)
+    centers = _normalize(rng.standard_normal((2000, dim)))
+    noise = rng.standard_normal((n_vectors, dim)) / np.sqrt(dim)
+    data = _normalize(centers[rng.integers(0, len(centers), n_vectors)] + noise).astype(np.float32)
+    queries = data[rng.choice(n_vectors, n_queries, replace=False)]
+    queries = _normalize(queries + 0.5 * rng.standard_normal((n_queries, dim)) / np.sqrt(dim)).astype(np.float32)
+
+    index = VectorIndex(dim)
+    index.add(data)
+
+    def run(n_probe):
+        results, start = [], time.perf_counter()
+        for query in queries:
+            results.append({row for row, _ in index.search(query, k, n_probe)})
+        return results, (time.perf_counter() - start) / n_queries * 1000
+
+    exact, exact_ms = run(0)
+    print(f"exact        recall@{k}=1.000  {exact_ms:6.2f} ms/query")
+
+    index.build_ivf()
+    for n_probe in (1, 4, 8, 16, 32):
+        found, ms = run(n_probe)
+        recall = np.mean([len(a & b) / k for a, b in zip(found, exact)])
+        print(f"ivf n_probe={n_probe:<3} recall@{k}={recall:.3f}  {ms:6.2f} ms/query")
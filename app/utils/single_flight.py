@@ -0,0 +1,166 @@
+import copy
+import threading
+from concurrent.futures import Future
+
+import streamlit as st
+
+from app.utils.cancellation import RequestCancelledError
+from app.utils.instrumentation import get_metrics_registry
+from app.utils.rate_limit import AdmissionRejectedError
+
+
+class _LeaderAborted(Exception):
+    """Set on a flight whose leader was interrupted or failed for its own reasons."""
+
+
+class SingleFlight:
+    """Collapses concurrent identical calls into one upstream call.
+
+    The first caller for a key (the leader) runs the call; callers that
+    arrive with the same key while it is in flight wait for its result
+    instead of calling upstream themselves. Followers get a deep copy, so
+    sessions cannot modify each other's results. Errors are shared like
+    results, except those listed as private to the caller. If the leader
+    is interrupted (e.g. its Streamlit script was stopped) or fails with a
+    private error, waiting followers retry and one of them becomes the
+    leader.
+    """
+
+    def __init__(self, private_errors=()):
+        """
+        Initializes an empty group.
+
+        Args:
+            private_errors (tuple): Exception types that concern only the
+                leader, e.g. its session's rate limit, and are not shared
+        """
+        self.private_errors = private_errors
+        self._lock = threading.Lock()
+        self._flights = {}  # key -> Future
+        self._counters = {}  # name -> {"requests", "upstream"}
+
+    def do(self, key, func, name="default"):
+        """
+        Calls func, or waits for an identical call already in flight.
+
+        Args:
+            key (hashable): Request fingerprint; equal keys share one call
+            func (callable): Zero-argument function making the upstream call
+            name (str): Metrics label, e.g. the endpoint
+
+        Returns:
+            The call's result
+
+        Raises:
+            Exception: Whatever the shared call raised
+        """
+        while True:
+            with self._lock:
+                counters = self._counters.setdefault(name, {"requests": 0, "upstream": 0})
+                flight = self._flights.get(key)
+                leader = flight is None
+                if leader:
+                    flight = self._flights[key] = Future()
+                    counters["upstream"] += 1
+                counters["requests"] += 1
+
+            if leader:
+                return self._lead(key, flight, func)
+            try:
+                return copy.deepcopy(flight.result())
+            except _LeaderAborted:
+                # Retried as a fresh request
+                with self._lock:
+                    counters["requests"] -= 1
+
+    def _lead(self, key, flight, func):
+        try:
+            result = func()
+        except self.private_errors:
+            self._land(key, flight, exception=_LeaderAborted())
+            raise
+        except Exception as e:
+            self._land(key, flight, exception=e)
+            raise
+        except BaseException:
+            self._land(key, flight, exception=_LeaderAborted())
+            raise
+        self._land(key, flight, result=result)
+        return result
+
+    def _land(self, key, flight, result=None, exception=None):
+        # Later arrivals start a new flight, and by then usually hit the cache
+        with self._lock:
+            del self._flights[key]
+        if exception is not None:
+            flight.set_exception(exception)
+        else:
+            flight.set_result(result)
+
+    def stats(self):
+        """
+        Returns collapse counters per metrics label.
+
+        Returns:
+            dict: Name -> {"requests", "upstream", "collapsed", "collapse_ratio"},
+            where collapse_ratio is the share of requests that did not call upstream
+        """
+        with self._lock:
+            counters = {name: dict(values) for name, values in self._counters.items()}
+        for values in counters.values():
+            values["collapsed"] = values["requests"] - values["upstream"]
+            values["collapse_ratio"] = round(values["collapsed"] / values["requests"], 3) if values["requests"] else 0.0
+        return counters
+
+
+@st.cache_resource
+def get_single_flight():
+    """
+    Returns the single-flight group shared by every Streamlit session.
+
+    Returns:
+        SingleFlight: The shared group
+    """
+    # One session's rate limit rejection, or its cancelled hedge, is not
+    # passed on to other sessions
+    group = SingleFlight(private_errors=(AdmissionRejectedError, RequestCancelledError))
+
+    def collect():
+        stats = group.stats()
+        return [
+            ("rag_toolbox_single_flight_requests_total", "counter", "Requests offered to single-flight.",
+             [({"endpoint": name}, values["requests"]) for name, values in stats.items()]),
+            ("rag_toolbox_single_flight_upstream_total", "counter", "Requests that made the upstream call.",
+             [({"endpoint": name}, values["upstream"]) for name, values in stats.items()]),
+        ]
+
+    get_metrics_registry().register_collector("single_flight", collect)
+    return group
+
+
+if __name__ == "__main__":
+    # A class of 30 students submitting the same paragraph within 100 ms,
+    # against a backend taking 500 ms per call
+    import random
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+
+    group = SingleFlight()
+    upstream_calls = []
+
+    def backend():
+        upstream_calls.append(1)
+        time.sleep(0.5)
+        return {"corrected_text": "The same paragraph."}
+
+    def student(n):
+        time.sleep(random.uniform(0, 0.1))
+        started = time.perf_counter()
+        group.do("sample-paragraph", backend, "grammar")
+        return time.perf_counter() - started
+
+    with ThreadPoolExecutor(max_workers=30) as pool:
+        waits = list(pool.map(student, range(30)))
+    print(f"upstream calls: {len(upstream_calls)} for 30 requests")
+    print(f"longest wait: {max(waits) * 1000:.0f} ms")
+    print(group.stats())
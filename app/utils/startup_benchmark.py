@@ -0,0 +1,115 @@
+import argparse
+import ast
+import glob
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Modules that are slow to import and must stay off a page's startup path
+# (charset_normalizer is not listed: requests imports it)
+HEAVY_MODULES = (
+    "numpy", "pandas", "PIL", "docx", "PyPDF2",
+    "langchain", "langchain_core", "langchain_google_genai", "fastapi", "uvicorn"
+)
+
+# Heavy modules a page is allowed to import at startup
+ALLOWED_HEAVY_MODULES = {
+    # Perceptual hashing for the batch and pre-filter paths
+    "pages/Image_watermark_checking.py": {"numpy"},
+}
+
+# Seconds a page's imports may add on top of importing Streamlit itself
+IMPORT_BUDGET_SECONDS = 0.25
+
+_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import streamlit
+baseline = time.perf_counter() - started
+started = time.perf_counter()
+exec(compile(sys.stdin.read(), "imports", "exec"))
+seconds = time.perf_counter() - started
+heavy = sorted(m for m in {heavy} if m in sys.modules)
+print(json.dumps({{"baseline": baseline, "seconds": seconds, "heavy": heavy}}))
+"""
+
+
+def page_imports(path):
+    """
+    Extracts the module-level import statements of a page script.
+
+    Args:
+        path (str): Path of the page
+
+    Returns:
+        str: The import statements as source code
+    """
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), path)
+    statements = [node for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+    return "\n".join(ast.unparse(node) for node in statements)
+
+
+def measure_page(path, repeat=3):
+    """
+    Times a page's imports in fresh interpreters, as on a cold start.
+
+    Args:
+        path (str): Path of the page relative to the repository root
+        repeat (int): Runs to take the fastest of
+
+    Returns:
+        dict: seconds (import time beyond Streamlit), baseline and heavy modules loaded
+    """
+    probe = _PROBE.format(heavy=repr(HEAVY_MODULES))
+    imports = page_imports(os.path.join(ROOT, path))
+    runs = []
+    for _ in range(repeat):
+        completed = subprocess.run(
+            [sys.executable, "-c", probe], input=imports, capture_output=True,
+            text=True, cwd=ROOT, check=True
+        )
+        runs.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+    return min(runs, key=lambda run: run["seconds"])
+
+
+def check_budget(budget=IMPORT_BUDGET_SECONDS, repeat=3):
+    """
+    Measures every page and reports those over budget.
+
+    Args:
+        budget (float): Seconds a page's imports may add on top of Streamlit
+        repeat (int): Runs per page to take the fastest of
+
+    Returns:
+        list: Descriptions of the violations; empty when every page is within budget
+    """
+    pages = ["AI Chat App.py"] + sorted(
+        os.path.relpath(path, ROOT) for path in glob.glob(os.path.join(ROOT, "pages", "*.py"))
+    )
+    violations = []
+    for page in pages:
+        result = measure_page(page, repeat)
+        unexpected = set(result["heavy"]) - ALLOWED_HEAVY_MODULES.get(page, set())
+        print(f"{page:40s} {result['seconds'] * 1000:7.0f} ms  (streamlit {result['baseline'] * 1000:.0f} ms)"
+              f"  heavy: {', '.join(result['heavy']) or '-'}")
+        if result["seconds"] > budget:
+            violations.append(f"{page}: imports take {result['seconds']:.2f}s, budget is {budget:.2f}s")
+        if unexpected:
+            violations.append(f"{page}: imports {', '.join(sorted(unexpected))} at startup")
+    return violations
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the cold-start import time of every page.")
+    parser.add_argument("--budget", type=float, default=IMPORT_BUDGET_SECONDS)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    violations = check_budget(args.budget, args.repeat)
+    for violation in violations:
+        print(f"FAIL {violation}")
+    sys.exit(1 if violations else 0)
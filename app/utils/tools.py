@@ -0,0 +1,142 @@
+import requests
+
+from app.utils.api_client import API_BASE_URL, PLAGIARISM_API_URL, WATERMARK_API_ENDPOINTS, get_api_client
+from app.utils.ingestion import iter_document, read_document
+from app.utils.instrumentation import span
+from app.utils.response_cache import get_response_cache, make_cache_key
+from app.utils.single_flight import get_single_flight
+
+# Local matches at least this similar are reported without calling the remote API
+LOCAL_DUPLICATE_THRESHOLD = 0.8
+
+
+def check_grammar(text, llm="gemini"):
+    """Send text to the grammar checking API"""
+    # Resubmitted text is answered from the cache without calling the LLM
+    cache = get_response_cache()
+    cache_key = make_cache_key("grammar", llm, text)
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    def call():
+        response = get_api_client().post(
+            f"{API_BASE_URL}/grammar/{llm}/check_grammar",
+            # f"http://localhost:8000/{llm}/check_grammar",
+            {"text": text},
+            endpoint="grammar",
+            model=llm,
+            admit=False
+        )
+        with span("parse", endpoint="grammar"):
+            result = response.json()
+        if response.status_code == 200 and "error" not in result:
+            cache.set(cache_key, result)
+        return result
+
+    try:
+        # Every caller passes its own rate limits; only the upstream call is shared
+        get_api_client().admit("grammar", llm)
+        return get_single_flight().do(cache_key, call, "grammar")
+    except Exception as e:
+        return {"error": str(e)}
+
+
+def paraphrase_text(text, style, llm="gemini"):
+    """Send text to the paraphrasing API"""
+    # Resubmitted text is answered from the cache without calling the LLM
+    cache = get_response_cache()
+    cache_key = make_cache_key("paraphrase", llm, text, style)
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    def call():
+        response = get_api_client().post(
+            f"{API_BASE_URL}/paraphraser/{llm}/paraphrase",
+            {"text": text, "style": style},
+            endpoint="paraphrase",
+            model=llm,
+            admit=False
+        )
+        with span("parse", endpoint="paraphrase"):
+            result = response.json()
+        if response.status_code == 200 and "error" not in result:
+            cache.set(cache_key, result)
+        return result
+
+    try:
+        # Every caller passes its own rate limits; only the upstream call is shared
+        get_api_client().admit("paraphrase", llm)
+        return get_single_flight().do(cache_key, call, "paraphrase")
+    except Exception as e:
+        return {"error": str(e)}
+
+
+def check_plagiarism(text):
+    """Check text against the local index, then the plagiarism checking API if needed"""
+    return _check_plagiarism(text, lambda: text)
+
+
+def check_plagiarism_file(file):
+    """Check an uploaded document against the local index as it is read, then the plagiarism checking API if needed"""
+    # The full text is only put together when the remote API has to be asked;
+    # by then the extracted paragraphs are in the document cache
+    return _check_plagiarism(iter_document(file), lambda: read_document(file))
+
+
+def _check_plagiarism(text, full_text):
+    # The index needs NumPy, so it is loaded on the first check rather than with every page
+    from app.utils.plagiarism_index import get_plagiarism_index
+
+    similar_sources = get_plagiarism_index().query(text)
+    if similar_sources and similar_sources[0][1] >= LOCAL_DUPLICATE_THRESHOLD:
+        source, similarity = similar_sources[0]
+        return {
+            "is_duplicate": True,
+            "message": f"{similarity:.0%} similar to a document in the local corpus.",
+            "url": source if source.startswith("http") else "",
+            "similar_sources": similar_sources
+        }
+
+    result = check_plagiarism_remote(full_text())
+    if "error" not in result:
+        result["similar_sources"] = similar_sources
+    return result
+
+
+def check_plagiarism_remote(text):
+    """Send text to the plagiarism checking API"""
+    try:
+        response = get_api_client().post(
+            PLAGIARISM_API_URL,
+            {"user_description_input": text},
+            endpoint="plagiarism"
+        )
+        with span("parse", endpoint="plagiarism"):
+            return response.json()
+    except Exception as e:
+        return {"error": str(e)}
+
+
+def check_watermark(image_url, title="Default Title", category="Default Category", brand="Non-brand product"):
+    """Send an image URL, or a data URL of a prepared image, to the watermark checking API"""
+    payload = {
+        "image_url": image_url,
+        "title": title,
+        "category": category,
+        "brand": brand
+    }
+    client = get_api_client()
+
+    # Try each endpoint until one works. Both share a host and so a circuit
+    # breaker: once it is open, each attempt fails at once without a request.
+    for endpoint in WATERMARK_API_ENDPOINTS:
+        try:
+            response = client.post(endpoint, payload, endpoint="watermark")
+            if response.status_code == 200:
+                with span("parse", endpoint="watermark"):
+                    return response.json()
+        except (requests.exceptions.RequestException, ValueError):
+            continue
+    return {"error": "Unable to check watermark at this time."}
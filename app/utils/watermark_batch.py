@@ -0,0 +1,378 @@
+import csv
+import io
+import ipaddress
+import json
+import os
+import socket
+import tempfile
+import threading
+import zipfile
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from urllib.parse import urljoin, urlsplit
+
+from app.utils.api_client import get_api_client
+from app.utils.image_utils import prepare_image, to_data_url
+from app.utils.ingestion import file_hash
+from app.utils.perceptual_hash import HASH_SIZE, hamming, image_hashes
+from app.utils.rate_limit import TokenBucket
+from app.utils.tools import check_watermark
+from app.utils.watermark_index import HashMultiIndex, check_with_index, get_watermark_index
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp")
+URL_COLUMNS = ("image_url", "url", "image")
+CHECKPOINT_DIR = os.path.join(tempfile.gettempdir(), "rag_toolbox_batches")
+
+# Hashes at most this many bits apart are treated as the same image, which
+# covers re-encoded and resized copies
+DUPLICATE_DISTANCE = 4
+
+# Images larger than this are rejected instead of being decoded
+MAX_IMAGE_BYTES = 20 * 1024 * 1024
+DOWNLOAD_CHUNK_BYTES = 64 * 1024
+MAX_REDIRECTS = 3
+
+DEFAULT_WORKERS = 4
+# Watermark API calls per second across all workers
+DEFAULT_RATE = 2.0
+
+RESULT_COLUMNS = ["item", "source", "has_watermark", "duplicate_of", "hash", "error"]
+
+
+def _read_urls(text, name):
+    rows = list(csv.reader(io.StringIO(text)))
+    if not rows:
+        return []
+    header = [cell.strip().lower() for cell in rows[0]]
+    column = next((header.index(c) for c in URL_COLUMNS if c in header), None)
+    if column is None:
+        # No recognised header: treat the first column of every row as a URL
+        column, start = 0, 0
+    else:
+        start = 1
+    items = []
+    for line, row in enumerate(rows[start:], start=start + 1):
+        if len(row) > column and row[column].strip().startswith("http"):
+            items.append({"item": f"{name}:{line}", "source": row[column].strip()})
+    return items
+
+
+def load_batch_items(file):
+    """
+    Lists the images of a batch upload.
+
+    A CSV holds one image URL per row, in an image_url/url/image column or
+    in the first column. A ZIP may contain image files and CSVs of URLs.
+    Images inside a ZIP are only read when a worker needs them.
+
+    Args:
+        file: Uploaded .csv or .zip file
+
+    Returns:
+        list: Items, each a dict with "item" (unique name) and "source", plus
+            "load" (callable returning the image bytes) for files
+    """
+    name = file.name
+    if name.lower().endswith(".csv"):
+        return _read_urls(file.getvalue().decode("utf-8-sig"), name)
+
+    archive = zipfile.ZipFile(io.BytesIO(file.getvalue()))
+    lock = threading.Lock()
+
+    def loader(member):
+        def load():
+            # ZipFile reads through one shared file object
+            with lock:
+                return archive.read(member)
+        return load
+
+    items = []
+    for info in archive.infolist():
+        member = info.filename
+        if info.is_dir() or os.path.basename(member).startswith("."):
+            continue
+        if member.lower().endswith(".csv"):
+            items.extend(_read_urls(archive.read(member).decode("utf-8-sig"), member))
+        elif member.lower().endswith(IMAGE_EXTENSIONS):
+            items.append({"item": member, "source": member, "load": loader(member)})
+    return items
+
+
+def batch_id(file):
+    """
+    Identifies a batch upload by its content, so re-uploading it resumes the run.
+
+    Args:
+        file: Uploaded .csv or .zip file
+
+    Returns:
+        str: Hex SHA-256 digest of the upload
+    """
+    return file_hash(file)
+
+
+class BatchCheckpoint:
+    """Append-only JSONL file of finished results for one batch.
+
+    Only successful checks are recorded, so failed items are retried when
+    the batch is run again.
+    """
+
+    def __init__(self, batch_id, directory=CHECKPOINT_DIR):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f"{batch_id}.jsonl")
+        self._lock = threading.Lock()
+
+    def load(self):
+        """
+        Reads the results saved by earlier runs.
+
+        Returns:
+            dict: Item name -> result row
+        """
+        done = {}
+        if not os.path.exists(self.path):
+            return done
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    # A run interrupted mid-write leaves a partial last line
+                    continue
+                done[row["item"]] = row
+        return done
+
+    def append(self, row):
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(row) + "\n")
+
+    def clear(self):
+        with self._lock:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+
+class HashDeduper:
+    """Runs one watermark check per distinct image.
+
+    The first worker to reach an image runs the check; workers holding the
+    same image (a hash within max_distance bits) wait for that result
+    instead of calling the API again.
+    """
+
+    def __init__(self, max_distance=DUPLICATE_DISTANCE):
+        self.max_distance = max_distance
+        self._lock = threading.Lock()
+        self.futures = {}
+        # Near-duplicate lookups stay fast however many images the batch holds
+        self.multi_index = HashMultiIndex(HASH_SIZE * HASH_SIZE, max_distance)
+
+    def _find(self, image_hash):
+        # Caller holds the lock
+        if image_hash in self.futures:
+            return self.futures[image_hash]
+        for known in self.multi_index.candidates(image_hash):
+            if hamming(known, image_hash) <= self.max_distance:
+                return self.futures[known]
+        return None
+
+    def _add(self, image_hash, future):
+        # Caller holds the lock
+        if image_hash not in self.futures:
+            self.futures[image_hash] = future
+            self.multi_index.add(image_hash, image_hash)
+
+    def seed(self, image_hash, item, result):
+        """Registers a result from an earlier run."""
+        future = Future()
+        future.set_result((item, result))
+        with self._lock:
+            self._add(image_hash, future)
+
+    def run(self, image_hash, item, check):
+        """
+        Returns the check result for an image, running the check at most once.
+
+        Args:
+            image_hash (int): Perceptual hash of the image
+            item (str): Name of the item asking
+            check (callable): Zero-argument function running the check
+
+        Returns:
+            tuple: (item that was checked, result)
+        """
+        with self._lock:
+            future = self._find(image_hash)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._add(image_hash, future)
+        if owner:
+            try:
+                future.set_result((item, check()))
+            except Exception as e:
+                future.set_result((item, {"error": str(e)}))
+        return future.result()
+
+
+def check_public_url(url):
+    """
+    Refuses URLs the server should not fetch on a user's behalf.
+
+    Only http(s) URLs whose host resolves to public addresses are allowed,
+    so a batch cannot make the server reach localhost or internal networks.
+
+    Args:
+        url (str): URL from a batch upload
+
+    Raises:
+        ValueError: If the scheme is not http(s) or the host is not public
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise ValueError("Only http and https image URLs are supported.")
+    try:
+        addresses = socket.getaddrinfo(parts.hostname, parts.port or parts.scheme, proto=socket.IPPROTO_TCP)
+    except socket.gaierror:
+        raise ValueError(f"Cannot resolve {parts.hostname}.")
+    for *_, sockaddr in addresses:
+        if not ipaddress.ip_address(sockaddr[0].split("%")[0]).is_global:
+            raise ValueError(f"{parts.hostname} is not a public address.")
+
+
+def download_image(url):
+    """
+    Fetches an image through the shared client.
+
+    The body is read in chunks and the download stops as soon as it passes
+    MAX_IMAGE_BYTES. Redirects are followed by hand so every hop is checked
+    with check_public_url.
+
+    Args:
+        url (str): Image URL
+
+    Returns:
+        bytes: The image file
+
+    Raises:
+        ValueError: If the URL is refused or the image is larger than MAX_IMAGE_BYTES
+        requests.exceptions.RequestException: If the download failed
+    """
+    too_large = ValueError(f"Image is larger than {MAX_IMAGE_BYTES // (1024 * 1024)} MB.")
+    for _ in range(MAX_REDIRECTS + 1):
+        check_public_url(url)
+        response = get_api_client().get(url, endpoint="image_download", stream=True, allow_redirects=False)
+        with response:
+            if response.is_redirect:
+                url = urljoin(url, response.headers["Location"])
+                continue
+            response.raise_for_status()
+            if int(response.headers.get("Content-Length") or 0) > MAX_IMAGE_BYTES:
+                raise too_large
+            data = bytearray()
+            for chunk in response.iter_content(DOWNLOAD_CHUNK_BYTES):
+                data += chunk
+                if len(data) > MAX_IMAGE_BYTES:
+                    raise too_large
+            return bytes(data)
+    raise ValueError("Too many redirects.")
+
+
+def _check_item(item, deduper, limiter, index):
+    row = {column: "" for column in RESULT_COLUMNS}
+    row.update(item=item["item"], source=item["source"], has_watermark=None)
+    try:
+        data = item["load"]() if "load" in item else download_image(item["source"])
+        hashes = image_hashes(data)
+        row["hash"] = f"{hashes[1]:016x}"
+    except Exception as e:
+        row["error"] = f"Could not read image: {e}"
+        return row
+
+    def call_api():
+        limiter.acquire()
+        # The bytes already downloaded are sent, so the API does not fetch
+        # URLs again. Not the shared prepared-image cache: a batch would flush it.
+        prepared = prepare_image(data)
+        return check_watermark(to_data_url(prepared))
+
+    def check():
+        # Images judged before, in this batch or any earlier one, skip the API
+        return check_with_index(data, call_api, source=item["source"], index=index, hashes=hashes)
+
+    checked_item, result = deduper.run(hashes[1], item["item"], check)
+    if checked_item != item["item"]:
+        row["duplicate_of"] = checked_item
+    elif "known_image" in result:
+        row["duplicate_of"] = result["known_image"]
+    if "error" in result:
+        row["error"] = result["error"]
+    else:
+        row["has_watermark"] = bool(result.get("has_watermark"))
+    return row
+
+
+def run_batch(items, checkpoint, max_workers=DEFAULT_WORKERS, rate=DEFAULT_RATE):
+    """
+    Checks a batch of images and yields each result as it finishes.
+
+    Items already in the checkpoint are yielded first without being checked
+    again. The rest run on a bounded worker pool; calls to the watermark API
+    are rate limited across workers, identical images (same perceptual
+    hash) are checked only once, and images already in the watermark index
+    are answered locally.
+
+    Args:
+        items (list): Items from load_batch_items
+        checkpoint (BatchCheckpoint): Where finished results are saved
+        max_workers (int): Concurrent downloads and checks
+        rate (float): Watermark API calls per second
+
+    Yields:
+        dict: One result row per item, with RESULT_COLUMNS keys
+    """
+    done = checkpoint.load()
+    deduper = HashDeduper()
+    for row in done.values():
+        if row.get("hash"):
+            deduper.seed(int(row["hash"], 16), row["duplicate_of"] or row["item"],
+                         {"has_watermark": row["has_watermark"]})
+
+    pending = []
+    for item in items:
+        if item["item"] in done:
+            yield done[item["item"]]
+        else:
+            pending.append(item)
+
+    limiter = TokenBucket(rate)
+    index = get_watermark_index()
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="watermark")
+    try:
+        futures = [executor.submit(_check_item, item, deduper, limiter, index) for item in pending]
+        for future in as_completed(futures):
+            row = future.result()
+            if not row["error"]:
+                checkpoint.append(row)
+            yield row
+    finally:
+        # Stop queued items if the caller stops early; the checkpoint keeps
+        # everything finished so far
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def rows_to_csv(rows):
+    """
+    Writes result rows as CSV.
+
+    Args:
+        rows (list): Result rows from run_batch
+
+    Returns:
+        str: CSV text with a header row
+    """
+    output = io.StringIO()
+    writer = csv.DictWriter(output, fieldnames=RESULT_COLUMNS, extrasaction="ignore")
+    writer.writeheader()
+    writer.writerows(rows)
+    return output.getvalue()
@@ -0,0 +1,241 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+import streamlit as st
+
+from app.utils.perceptual_hash import HASH_SIZE, hamming, image_hashes
+
+# SQLite file holding known verdicts; defaults to the temp directory
+WATERMARK_INDEX_ENV_VAR = "RAG_TOOLBOX_WATERMARK_INDEX"
+DEFAULT_INDEX_PATH = os.path.join(tempfile.gettempdir(), "rag_toolbox_watermark_index.sqlite3")
+
+# An image matches a known one when its pHash is at most MAX_DISTANCE bits
+# away and its dHash at most CONFIRM_DISTANCE bits away. Unrelated images
+# are typically 20 or more bits apart on both.
+MAX_DISTANCE = 6
+CONFIRM_DISTANCE = 10
+
+HASH_BITS = HASH_SIZE * HASH_SIZE
+
+
+def _chunk_layout(bits, max_distance):
+    # Split the hash into max_distance + 1 chunks: two hashes within
+    # max_distance bits must agree exactly on at least one chunk
+    count = max_distance + 1
+    widths = [bits // count + (1 if i < bits % count else 0) for i in range(count)]
+    layout, shift = [], bits
+    for width in widths:
+        shift -= width
+        layout.append((shift, (1 << width) - 1))
+    return layout
+
+
+class HashMultiIndex:
+    """Multi-index hash table over perceptual hashes.
+
+    Each hash is split into max_distance + 1 chunks and each chunk value
+    maps to the entries sharing it, so a search only compares against the
+    few entries that can possibly be within max_distance bits.
+    """
+
+    def __init__(self, bits=HASH_BITS, max_distance=MAX_DISTANCE):
+        """
+        Initializes an empty table.
+
+        Args:
+            bits (int): Hash length in bits
+            max_distance (int): Largest Hamming distance searches must find
+        """
+        self.layout = _chunk_layout(bits, max_distance)
+        self.tables = [{} for _ in self.layout]
+
+    def _chunks(self, value):
+        return [(value >> shift) & mask for shift, mask in self.layout]
+
+    def add(self, value, entry_id):
+        """
+        Adds an entry.
+
+        Args:
+            value (int): The entry's hash
+            entry_id: Identifier returned by candidates
+        """
+        for table, chunk in zip(self.tables, self._chunks(value)):
+            table.setdefault(chunk, []).append(entry_id)
+
+    def candidates(self, value):
+        """
+        Yields the entries that may be within max_distance bits of a hash.
+
+        Args:
+            value (int): The hash searched for
+
+        Yields:
+            Identifiers of entries sharing a chunk with value; an entry may
+            be yielded more than once, and the caller checks the distance
+        """
+        for table, chunk in zip(self.tables, self._chunks(value)):
+            yield from table.get(chunk, ())
+
+
+class WatermarkIndex:
+    """Known watermark verdicts, looked up by perceptual hash.
+
+    Entries live in a HashMultiIndex on the pHash, so a lookup only compares
+    against the few entries that can possibly be within range. Verdicts are
+    written to SQLite and loaded back when the index is created.
+    """
+
+    def __init__(self, db_path=None, max_distance=MAX_DISTANCE, confirm_distance=CONFIRM_DISTANCE):
+        """
+        Initializes the index and loads the verdicts saved in db_path.
+
+        Args:
+            db_path (str, optional): SQLite file to persist verdicts in; in memory only if None
+            max_distance (int): Largest pHash distance of a match
+            confirm_distance (int): Largest dHash distance of a match
+        """
+        self.max_distance = max_distance
+        self.confirm_distance = confirm_distance
+        self.multi_index = HashMultiIndex(HASH_BITS, max_distance)
+        self.entries = []  # (phash, dhash, has_watermark, source)
+        self._lock = threading.Lock()
+        self._counters = {"lookups": 0, "hits": 0}
+
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS verdicts ("
+                "phash TEXT, dhash TEXT, has_watermark INTEGER, source TEXT, created_at REAL)"
+            )
+            self._db.commit()
+            for phash, dhash, has_watermark, source in self._db.execute(
+                "SELECT phash, dhash, has_watermark, source FROM verdicts"
+            ):
+                self._insert(int(phash, 16), int(dhash, 16), bool(has_watermark), source)
+
+    def _insert(self, phash, dhash, has_watermark, source):
+        self.multi_index.add(phash, len(self.entries))
+        self.entries.append((phash, dhash, has_watermark, source))
+
+    def add(self, phash, dhash, has_watermark, source=""):
+        """
+        Records the verdict for an image.
+
+        Args:
+            phash (int): pHash of the image
+            dhash (int): dHash of the image
+            has_watermark (bool): The verdict
+            source (str): Where the image came from, reported on later matches
+        """
+        with self._lock:
+            self._insert(phash, dhash, has_watermark, source)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT INTO verdicts VALUES (?, ?, ?, ?, ?)",
+                    (f"{phash:016x}", f"{dhash:016x}", int(has_watermark), source, time.time())
+                )
+                self._db.commit()
+
+    def lookup(self, phash, dhash):
+        """
+        Finds the closest known image within range.
+
+        Args:
+            phash (int): pHash of the image
+            dhash (int): dHash of the image
+
+        Returns:
+            dict: has_watermark, source and distance of the match, or None
+        """
+        with self._lock:
+            self._counters["lookups"] += 1
+            best = None
+            for entry_id in self.multi_index.candidates(phash):
+                known_phash, known_dhash, has_watermark, source = self.entries[entry_id]
+                distance = (known_phash ^ phash).bit_count()
+                if distance > self.max_distance or (best is not None and distance >= best["distance"]):
+                    continue
+                if hamming(known_dhash, dhash) <= self.confirm_distance:
+                    best = {"has_watermark": has_watermark, "source": source, "distance": distance}
+            if best is not None:
+                self._counters["hits"] += 1
+            return best
+
+    def stats(self):
+        """
+        Returns index counters for display.
+
+        Returns:
+            dict: entries, lookups and hits
+        """
+        with self._lock:
+            return dict(self._counters, entries=len(self.entries))
+
+
+@st.cache_resource
+def get_watermark_index():
+    """
+    Returns the watermark verdict index shared by every Streamlit session.
+
+    Returns:
+        WatermarkIndex: Index persisted at RAG_TOOLBOX_WATERMARK_INDEX
+    """
+    return WatermarkIndex(db_path=os.environ.get(WATERMARK_INDEX_ENV_VAR, DEFAULT_INDEX_PATH))
+
+
+def check_with_index(data, check, source="", index=None, hashes=None):
+    """
+    Answers a watermark check from known verdicts, calling the API only for new images.
+
+    Args:
+        data (bytes): Encoded image
+        check (callable): Zero-argument function calling the watermark API
+        source (str): Name of the image, stored with a new verdict
+        index (WatermarkIndex, optional): Defaults to the shared index
+        hashes (tuple, optional): (phash, dhash) if already computed
+
+    Returns:
+        dict: The API response, or {"has_watermark", "known_image", "distance"}
+            for an image already judged
+    """
+    index = index or get_watermark_index()
+    phash, dhash = hashes or image_hashes(data)
+    known = index.lookup(phash, dhash)
+    if known is not None:
+        return {"has_watermark": known["has_watermark"], "known_image": known["source"],
+                "distance": known["distance"]}
+
+    result = check()
+    if "error" not in result and "has_watermark" in result:
+        index.add(phash, dhash, bool(result["has_watermark"]), source)
+    return result
+
+
+if __name__ == "__main__":
+    # Lookup latency against index size
+    import random
+
+    rng = random.Random(0)
+    for size in (1_000, 10_000, 100_000):
+        index = WatermarkIndex()
+        hashes = [(rng.getrandbits(HASH_BITS), rng.getrandbits(HASH_BITS)) for _ in range(size)]
+        for phash, dhash in hashes:
+            index.add(phash, dhash, rng.random() < 0.1)
+
+        queries = []
+        for phash, dhash in rng.sample(hashes, 500):
+            # Near-duplicates: flip a few bits of a known image
+            for bit in rng.sample(range(HASH_BITS), 3):
+                phash ^= 1 << bit
+            queries.append((phash, dhash))
+        queries += [(rng.getrandbits(HASH_BITS), rng.getrandbits(HASH_BITS)) for _ in range(500)]
+
+        started = time.perf_counter()
+        hits = sum(index.lookup(phash, dhash) is not None for phash, dhash in queries)
+        per_lookup = (time.perf_counter() - started) / len(queries)
+        print(f"{size} entries: {per_lookup * 1e6:.1f} us per lookup, {hits} of 500 near-duplicates found")
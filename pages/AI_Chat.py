@@ -1,11 +1,32 @@
 import streamlit as st
-import requests
 import json
 import time
 
+from app.components.ChatMessage import message_html, render_chat_history
+from app.components.DebugPanel import debug_panel
+from app.components.QueueStatus import queue_status
+from app.styles.chat_styles import apply_chat_styles, create_footer
+from app.utils.api_client import API_BASE_URL, get_api_client
+from app.utils.context_builder import build_conversation_history, get_payload_metrics
+from app.utils.hedging import call_model
+from app.utils.instrumentation import span
+from app.utils.message_utils import (
+    add_message_to_history,
+    clear_chat_history,
+    count_messages,
+    get_chat_history,
+    initialize_chat_history
+)
+
+# Number of messages shown per page of chat history
+HISTORY_PAGE_SIZE = 20
+
 # Initialize session state for chat history
-if 'chat_history' not in st.session_state:
-    st.session_state.chat_history = []
+initialize_chat_history()
+
+# Initialize session state for the number of messages shown
+if 'history_window' not in st.session_state:
+    st.session_state.history_window = HISTORY_PAGE_SIZE
 
 # Initialize session state for LLM selection if not already done
 if 'selected_llm' not in st.session_state:
@@ -15,70 +36,24 @@ if 'selected_llm' not in st.session_state:
 if 'processing_done' not in st.session_state:
     st.session_state.processing_done = True
 
-# Page styling
+# Initialize session state for the uploaded documents used as context; the
+# store (and NumPy with it) is only created once a document is uploaded
+if 'document_store' not in st.session_state:
+    st.session_state.document_store = None
+
+# Initialize session state for streaming responses
+if 'stream_responses' not in st.session_state:
+    st.session_state.stream_responses = True
+
+# Page styling: the shared theme and message bubbles are sent once per
+# session; only this page's colours are sent on every run
+apply_chat_styles("chat")
+debug_panel()
 st.markdown("""
 <style>
-@import url('https://fonts.googleapis.com/css2?family=Archivo:ital,wght@0,100..900;1,100..900&family=Karla:ital,wght@0,200..800;1,200..800&family=Raleway:ital,wght@0,100..900;1,100..900&family=Sofia+Sans:ital,wght@0,1..1000;1,1..1000&display=swap');
-
-html, body, [class*="css"] {
-    font-family: "Raleway", sans-serif;
-    font-family: "Karla", sans-serif;
-    font-family: "Archivo", sans-serif;
-    font-family: "Sofia Sans", sans-serif;
-    color: #333333;
-}
-
-.stApp {
-    font-family: "Raleway", sans-serif;
-    font-family: "Karla", sans-serif;
-    font-family: "Archivo", sans-serif;
-    font-family: "Sofia Sans", sans-serif;
-    background-color: #f8f9fa;
-}
-
-h1, h2, h3, h4, h5, h6 {
-    font-family: "Raleway", sans-serif !important;
-    font-family: "Karla", sans-serif !important;
-    font-family: "Archivo", sans-serif !important;
-    font-family: "Sofia Sans", sans-serif !important;
-    color: #1e3a8a;
-}
-
-.chat-message {
-    padding: 1.5rem;
-    border-radius: 0.5rem;
-    margin-bottom: 1rem;
-    display: flex;
-    box-shadow: 0 2px 5px rgba(0,0,0,0.1);
-}
-
-.chat-message.user {
-    background-color: #f0f2f6;
-    border-left: 5px solid #7c7c7c;
-}
-
-.chat-message.assistant {
-    background-color: #e6f7ff;
-    border-left: 5px solid #2b6cb0;
-}
-
-.chat-message .avatar {
-    width: 20%;
-}
-
-.chat-message .avatar img {
-    max-width: 78px;
-    max-height: 78px;
-    border-radius: 50%;
-    object-fit: cover;
-}
-
-.chat-message .message {
-    width: 80%;
-    padding: 0 1.5rem;
-    color: #333333;
-}
-
+html, body, [class*="css"] { color: #333333; }
+.stApp { background-color: #f8f9fa; }
+h1, h2, h3, h4, h5, h6 { color: #1e3a8a; }
 </style>
 """, unsafe_allow_html=True)
 
@@ -87,35 +62,53 @@ st.title("AI Chat")
 st.write("Chat with our AI assistant powered by state-of-the-art language models")
 
 # Function to call the chat API
-def chat_with_ai(message, model="gemini"):
+def chat_with_ai(message, model="gemini", conversation_history=None):
     try:
         # API endpoint
-        url = f"https://langchain-grammar-check-api.onrender.com/chat/{model}/chat"
+        url = f"{API_BASE_URL}/chat/{model}/chat"
         
         # Prepare the request payload
         payload = {
             "message": message,
-            "conversation_history": []
+            "conversation_history": conversation_history or []
         }
+        get_payload_metrics().record(payload)
         
         # Make the API request
-        response = requests.post(url, json=payload)
+        response = get_api_client().post(url, payload, endpoint="chat", model=model)
         
         # Check if the request was successful
         if response.status_code == 200:
-            return response.json()["response"]
+            with span("parse", endpoint="chat"):
+                return response.json()["response"]
         else:
             return f"Error: {response.status_code} - {response.text}"
     except Exception as e:
         return f"Error: {str(e)}"
 
-# Display chat messages
-for message in st.session_state.chat_history:
-    with st.container():
-        if message["role"] == "user":
-            st.markdown(f"<div class='chat-message user'><div class='message'>🧑‍💻 <b>You:</b> {message['content']}</div></div>", unsafe_allow_html=True)
-        else:
-            st.markdown(f"<div class='chat-message assistant'><div class='message'>🤖 <b>AI:</b> {message['content']}</div></div>", unsafe_allow_html=True)
+# Function to stream the chat API response piece by piece
+def stream_chat_with_ai(message, model="gemini", conversation_history=None):
+    url = f"{API_BASE_URL}/chat/{model}/chat"
+    payload = {
+        "message": message,
+        "conversation_history": conversation_history or []
+    }
+    get_payload_metrics().record(payload)
+
+    try:
+        # Falls back to the full response when the backend does not stream
+        yield from get_api_client().stream_post(url, payload, endpoint="chat", model=model)
+    except Exception as e:
+        yield f"Error: {str(e)}"
+
+# Display the most recent chat messages; older ones are loaded on demand
+total_messages = count_messages()
+window_start = max(0, total_messages - st.session_state.history_window)
+if window_start > 0:
+    if st.button(f"Show earlier messages ({window_start} hidden)", key="earlier_button"):
+        st.session_state.history_window += HISTORY_PAGE_SIZE
+        st.rerun()
+render_chat_history(get_chat_history(window_start))
 
 # Chat input
 user_input = st.text_input("Type your message here...", key="user_message")
@@ -125,15 +118,36 @@ if st.button("Send", key="send_button"):
     if user_input and st.session_state.processing_done:  # Only process if there's input and not already processing
         st.session_state.processing_done = False  # Set processing flag
         
+        # Build the token-budgeted history before adding the new message
+        history = build_conversation_history(st.session_state.chat_history, st.session_state.selected_llm)
+
         # Add user message to chat history
-        st.session_state.chat_history.append({"role": "user", "content": user_input})
+        add_message_to_history("user", user_input)
         
+        # Add the most relevant chunks of the uploaded documents to the message
+        message = user_input
+        if st.session_state.document_store is not None:
+            from app.utils.retrieval import build_rag_message
+            hits = st.session_state.document_store.search(user_input)
+            message = build_rag_message(user_input, hits)
+
         # Get AI response
-        with st.spinner("AI is thinking..."):
-            ai_response = chat_with_ai(user_input, st.session_state.selected_llm)
+        if st.session_state.stream_responses:
+            st.markdown(message_html("user", user_input), unsafe_allow_html=True)
+            st.markdown("🤖 **AI:**")
+            with queue_status():
+                ai_response = st.write_stream(stream_chat_with_ai(message, st.session_state.selected_llm, history))
+        else:
+            with queue_status("AI is thinking..."):
+                _, ai_response = call_model(
+                    lambda llm: chat_with_ai(message, llm, history),
+                    st.session_state.selected_llm,
+                    "chat",
+                    is_good=lambda response: not response.startswith("Error:")
+                )
         
         # Add AI response to chat history
-        st.session_state.chat_history.append({"role": "assistant", "content": ai_response})
+        add_message_to_history("assistant", ai_response)
         
         # Reset processing flag
         st.session_state.processing_done = True
@@ -143,26 +157,38 @@ if st.button("Send", key="send_button"):
 
 # Add a button to clear the chat history
 if st.button("Clear Chat", key="clear_button"):
-    st.session_state.chat_history = []
+    clear_chat_history()
+    st.session_state.history_window = HISTORY_PAGE_SIZE
     st.rerun()
 
 # Display current model information
 st.sidebar.write(f"Current model: {st.session_state.selected_llm.capitalize()}")
+st.sidebar.toggle("Stream responses", key="stream_responses")
+
+payload_metrics = get_payload_metrics().snapshot()
+if payload_metrics["requests"]:
+    st.sidebar.caption(
+        f"Request size: last {payload_metrics['last_bytes'] / 1024:.1f} KB, "
+        f"mean {payload_metrics['mean_bytes'] / 1024:.1f} KB, "
+        f"max {payload_metrics['max_bytes'] / 1024:.1f} KB"
+    )
+
+# Documents the AI can answer questions about
+uploaded_documents = st.sidebar.file_uploader(
+    "Chat with your documents",
+    type=["txt", "docx", "pdf"],
+    accept_multiple_files=True
+)
+for uploaded_document in uploaded_documents or []:
+    try:
+        if st.session_state.document_store is None:
+            from app.utils.retrieval import DocumentStore, get_embedder
+            st.session_state.document_store = DocumentStore(get_embedder())
+        added = st.session_state.document_store.add_file(uploaded_document)
+        if added:
+            st.sidebar.success(f"Indexed {added} passages from '{uploaded_document.name}'.")
+    except Exception as e:
+        st.sidebar.error(f"Error reading '{uploaded_document.name}': {str(e)}")
 
 # Footer
-footer = """
-<div style="
-    position: fixed;
-    left: 0;
-    bottom: 0;
-    width: 100%;
-    color: #888;
-    padding: 10px;
-    text-align: right;
-    font-size: 14px;
-    z-index: 999;
-">
-    AI Chat | Created with ⚡ by Subodh Chandra Shil
-</div>
-"""
-st.markdown(footer, unsafe_allow_html=True)
\ No newline at end of file
+create_footer("AI Chat | Created with ⚡ by Subodh Chandra Shil")
@@ -1,39 +1,76 @@
 import streamlit as st
-import requests
 import json
 
+from app.components.DebugPanel import debug_panel
+from app.components.QueueStatus import queue_status
+from app.styles.chat_styles import apply_chat_styles
+from app.utils.chunking import map_chunks, merge_grammar_results, split_text
+from app.utils.hedging import call_model
+from app.utils.instrumentation import span
+from app.utils.tools import check_grammar
+
+# Shared theme, sent to the browser once per session
+apply_chat_styles()
+debug_panel()
+
 st.title("Grammar Check")
 st.write("Improve your writing with our AI-powered grammar checker")
 
 user_text = st.text_area("Enter your text here:", height=150)
 
-def check_grammar(text, llm="gemini"):
-    try:
-        response = requests.post(
-            f"https://langchain-grammar-check-api.onrender.com/grammar/{llm}/check_grammar",
-            # f"http://localhost:8000/{llm}/check_grammar",
-            json={"text": text}
-        )
-        return response.json()
-    except Exception as e:
-        return {"error": str(e)}
+# Texts longer than this are always checked paragraph by paragraph
+LONG_TEXT_CHARS = 4000
+
+long_document = st.checkbox(
+    "Long document mode",
+    help="Check paragraphs in parallel and show results as they arrive. "
+         "Only edited paragraphs are sent again when you resubmit."
+)
+
+def check_grammar_chunked(text, llm="gemini"):
+    # Unchanged paragraphs are answered by the response cache in check_grammar
+    chunks = split_text(text)
+    results = {}
+    progress = st.progress(0.0, text=f"Checked 0 of {len(chunks)} paragraphs")
+    preview = st.empty()
+
+    for index, result in map_chunks(chunks, lambda chunk: check_grammar(chunk, llm)):
+        results[index] = result
+        progress.progress(len(results) / len(chunks), text=f"Checked {len(results)} of {len(chunks)} paragraphs")
+        preview.success(merge_grammar_results(text, chunks, results).get("corrected_text", text))
+
+    progress.empty()
+    preview.empty()
+    return merge_grammar_results(text, chunks, results)
 
 
 if st.button("Find Grammatical Mistakes"):
     if user_text:
-        with st.spinner("Checking grammar..."):
+        with queue_status("Checking grammar..."):
 
             # Initialize session state for LLM selection
             if 'selected_llm' not in st.session_state:
                 st.session_state.selected_llm = 'gemini'
 
-            fixed_grammar = check_grammar(user_text, st.session_state.selected_llm)
+            answered_by = st.session_state.selected_llm
+            if long_document or len(user_text) > LONG_TEXT_CHARS:
+                fixed_grammar = check_grammar_chunked(user_text, st.session_state.selected_llm)
+            else:
+                answered_by, fixed_grammar = call_model(
+                    lambda llm: check_grammar(user_text, llm), st.session_state.selected_llm, "grammar"
+                )
 
             if "error" in fixed_grammar:
                 st.error(f"Error: {fixed_grammar['error']}")
             else:
                 st.subheader("Results:")
 
+                if answered_by != st.session_state.selected_llm:
+                    st.caption(f"Answered by {answered_by.capitalize()} because {st.session_state.selected_llm.capitalize()} was slow.")
+
+                if fixed_grammar.get("failed_chunks"):
+                    st.warning(f"{fixed_grammar['failed_chunks']} paragraph(s) could not be checked and were left unchanged.")
+
                 # Original vs Corrected Text
                 col1, col2 = st.columns(2)
                 
@@ -49,37 +86,38 @@ if st.button("Find Grammatical Mistakes"):
                 if fixed_grammar["corrections"]:
                     st.markdown("### Corrections")
                     
-                    for i, correction in enumerate(fixed_grammar["corrections"]):
-                        with st.expander(f"Correction {i+1}: {correction['type'].title()}"):
-                            cols = st.columns([1, 1])
-                            with cols[0]:
-                                st.markdown("**Error:**")
-                                st.markdown(f"<span style='color:red'>{correction['error']}</span>", unsafe_allow_html=True)
+                    with span("render", phase="grammar_corrections"):
+                        for i, correction in enumerate(fixed_grammar["corrections"]):
+                            with st.expander(f"Correction {i+1}: {correction['type'].title()}"):
+                                cols = st.columns([1, 1])
+                                with cols[0]:
+                                    st.markdown("**Error:**")
+                                    st.markdown(f"<span style='color:red'>{correction['error']}</span>", unsafe_allow_html=True)
                             
-                            with cols[1]:
-                                st.markdown("**Suggestion:**")
-                                st.markdown(f"<span style='color:green'>{correction['suggestion']}</span>", unsafe_allow_html=True)
+                                with cols[1]:
+                                    st.markdown("**Suggestion:**")
+                                    st.markdown(f"<span style='color:green'>{correction['suggestion']}</span>", unsafe_allow_html=True)
                             
-                            st.markdown("**Explanation:**")
-                            st.markdown(f"_{correction['explanation']}_")
+                                st.markdown("**Explanation:**")
+                                st.markdown(f"_{correction['explanation']}_")
                             
-                            # Add Grammar Rule section if available
-                            if 'grammar_rule' in correction and correction['grammar_rule']:
-                                # Instead of nesting an expander, display the grammar rule directly
-                                st.markdown("**Grammar Rule:**")
-                                rule = correction['grammar_rule']
-                                st.markdown(f"**{rule['rule_name']}**")
-                                st.markdown(rule['description'])
+                                # Add Grammar Rule section if available
+                                if 'grammar_rule' in correction and correction['grammar_rule']:
+                                    # Instead of nesting an expander, display the grammar rule directly
+                                    st.markdown("**Grammar Rule:**")
+                                    rule = correction['grammar_rule']
+                                    st.markdown(f"**{rule['rule_name']}**")
+                                    st.markdown(rule['description'])
                                 
-                                # Display correct examples
-                                st.markdown("**Correct Examples:**")
-                                for example in rule['correct_examples']:
-                                    st.markdown(f"- ✅ *{example}*")
+                                    # Display correct examples
+                                    st.markdown("**Correct Examples:**")
+                                    for example in rule['correct_examples']:
+                                        st.markdown(f"- ✅ *{example}*")
                                 
-                                # Display incorrect examples
-                                st.markdown("**Incorrect Examples:**")
-                                for example in rule['incorrect_examples']:
-                                    st.markdown(f"- ❌ *{example}*")
+                                    # Display incorrect examples
+                                    st.markdown("**Incorrect Examples:**")
+                                    for example in rule['incorrect_examples']:
+                                        st.markdown(f"- ❌ *{example}*")
                             
                     # Summary
                     st.success(f"Found {len(fixed_grammar['corrections'])} grammar issues to fix.")
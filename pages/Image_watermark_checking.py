@@ -1,13 +1,23 @@
 import streamlit as st
-import requests
-from PIL import Image
-import io
+import base64
+
+from app.components.DebugPanel import debug_panel
+from app.styles.chat_styles import apply_chat_styles
+from app.utils.image_utils import get_prepared_image, to_data_url
+from app.utils.tools import check_watermark
+from app.utils.watermark_index import check_with_index
+from app.utils.watermark_batch import (DEFAULT_RATE, DEFAULT_WORKERS, BatchCheckpoint, batch_id,
+                                       load_batch_items, rows_to_csv, run_batch)
+
+# Shared theme, sent to the browser once per session
+apply_chat_styles()
+debug_panel()
 
 st.title("Image Watermark Checking")
 st.write("Check if images contain watermarks or brand elements with our AI-powered tool")
 
-# Create tabs for URL input and file upload
-tab1, tab2 = st.tabs(["Image URL", "Upload Image"])
+# Create tabs for URL input, file upload and batch screening
+tab1, tab2, tab3 = st.tabs(["Image URL", "Upload Image", "Batch"])
 
 with tab1:
     image_url = st.text_input("Image URL", placeholder="Enter the URL of the image to check for watermarks")
@@ -18,6 +28,49 @@ with tab2:
     uploaded_file = st.file_uploader("Upload an image", type=["jpg", "jpeg", "png"])
     file_submit = st.button("Check Watermark", key="file_check")
 
+with tab3:
+    st.caption("Upload a CSV with one image URL per row, or a ZIP of images and/or URL CSVs. "
+               "Re-uploading the same file resumes where the last run stopped.")
+    batch_file = st.file_uploader("Upload a batch", type=["csv", "zip"], key="batch_file")
+    col1, col2 = st.columns(2)
+    with col1:
+        batch_workers = st.slider("Concurrent workers", 1, 16, DEFAULT_WORKERS)
+    with col2:
+        batch_rate = st.number_input("API calls per second", 0.1, 20.0, DEFAULT_RATE, step=0.5)
+    restart = st.checkbox("Start over (discard saved progress)")
+    batch_submit = st.button("Check Batch", key="batch_check")
+
+    if batch_submit and batch_file is not None:
+        items = load_batch_items(batch_file)
+        checkpoint = BatchCheckpoint(batch_id(batch_file))
+        if restart:
+            checkpoint.clear()
+
+        if not items:
+            st.warning("No image URLs or image files found in the upload.")
+        else:
+            progress = st.progress(0.0, text=f"Checking {len(items)} images...")
+            table = st.empty()
+            rows = []
+            for row in run_batch(items, checkpoint, max_workers=batch_workers, rate=batch_rate):
+                rows.append(row)
+                progress.progress(len(rows) / len(items), text=f"Checked {len(rows)} of {len(items)} images")
+                # Redrawing the table costs more than a check, so refresh it in steps
+                if len(rows) % 10 == 0 or len(rows) == len(items):
+                    table.dataframe(rows, use_container_width=True)
+
+            st.session_state.batch_results_csv = rows_to_csv(rows)
+            flagged = sum(1 for row in rows if row["has_watermark"])
+            duplicates = sum(1 for row in rows if row["duplicate_of"])
+            failed = sum(1 for row in rows if row["error"])
+            st.success(f"{flagged} with watermarks, {duplicates} duplicates checked once, {failed} failed.")
+    elif batch_submit:
+        st.warning("Please upload a CSV or ZIP file.")
+
+    if "batch_results_csv" in st.session_state:
+        st.download_button("Download results", st.session_state.batch_results_csv,
+                           file_name="watermark_results.csv", mime="text/csv")
+
 # Process URL input
 if url_submit and image_url:
     image_source = "url"
@@ -35,50 +88,26 @@ if image_source:
         st.image(image_url, caption="Uploaded Image", use_container_width=True)
         image_for_api = image_url
     else:  # image_source == "upload"
-        # Display uploaded image
-        image = Image.open(uploaded_file)
-        st.image(image, caption="Uploaded Image", use_container_width=True)
-        # For API, we need to convert the uploaded file to bytes
-        # In a real app, you would upload this to a server and get a URL
-        # For demo purposes, we'll just use a placeholder URL
-        image_for_api = "https://example.com/placeholder.jpg"  # Placeholder
-    
-    # Set default values for required fields
-    title = "Default Title"
-    category = "Default Category"
-    brand = "Non-brand product"
+        # Decode once, downscale to the model's input size and re-encode;
+        # the same compact image is displayed and sent to the API
+        prepared = get_prepared_image(uploaded_file.getvalue())
+        st.image(base64.b64decode(prepared["image_base64"]), caption="Uploaded Image", use_container_width=True)
+        image_for_api = to_data_url(prepared)
     
     # Try both API endpoints
-    api_endpoints = [
-        "http://128.199.144.145:8002/api/v1/ai/image_title_relevancy/check_image",
-        "http://128.199.144.145:8002/api/v1/ai/image_health_check/check_image"
-    ]
-    
-    # Start with the first endpoint
-    api_url = api_endpoints[0]
-    payload = {
-        "image_url": image_for_api,
-        "title": title,
-        "category": category,
-        "brand": brand
-    }
-    success = False
-    
-    # Try each endpoint until one works
-    for endpoint in api_endpoints:
-        try:
-            # Make API request without showing debug info
-            response = requests.post(endpoint, json=payload)
-            
-            if response.status_code == 200:
-                success = True
-                break
-        except requests.exceptions.RequestException:
-            # Silently continue to next endpoint
-            continue
+    if image_source == "upload":
+        # Uploads already judged, or near-identical copies of them, are
+        # answered from the local index without calling the API
+        data = check_with_index(
+            uploaded_file.getvalue(),
+            lambda: check_watermark(image_for_api),
+            source=uploaded_file.name
+        )
+    else:
+        data = check_watermark(image_for_api)
+    success = "error" not in data
     
     if success:
-        data = response.json()
         st.success("Watermark check successful!")
         
         # Display watermark status with prominent styling
@@ -87,6 +116,8 @@ if image_source:
             st.error("⚠️ **WATERMARK DETECTED** ⚠️")
         else:
             st.success("✅ **NO WATERMARK DETECTED** ✅")
+        if data.get("known_image"):
+            st.caption(f"Matched a previously checked image ({data['known_image']}).")
         
         # No additional information displayed
     else:
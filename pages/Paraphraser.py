@@ -1,7 +1,16 @@
 import streamlit as st
-import requests
 import json
 
+from app.components.DebugPanel import debug_panel
+from app.components.QueueStatus import queue_status
+from app.styles.chat_styles import apply_chat_styles
+from app.utils.hedging import call_model
+from app.utils.tools import paraphrase_text
+
+# Shared theme, sent to the browser once per session
+apply_chat_styles()
+debug_panel()
+
 st.title("Text Paraphraser")
 st.write("Transform your text with our AI-powered paraphrasing tool")
 
@@ -28,31 +37,25 @@ style_descriptions = {
 # Display the description of the selected style
 st.info(style_descriptions[style])
 
-def paraphrase_text(text, style, llm="gemini"):
-    try:
-        response = requests.post(
-            f"https://langchain-grammar-check-api.onrender.com/paraphraser/{llm}/paraphrase",
-            json={"text": text, "style": style}
-        )
-        return response.json()
-    except Exception as e:
-        return {"error": str(e)}
-
-
 if st.button("Paraphrase Text"):
     if user_text:
-        with st.spinner(f"Paraphrasing in {style} style..."):
+        with queue_status(f"Paraphrasing in {style} style..."):
             # Initialize session state for LLM selection if not already done
             if 'selected_llm' not in st.session_state:
                 st.session_state.selected_llm = 'gemini'
 
-            paraphrased = paraphrase_text(user_text, style, st.session_state.selected_llm)
+            answered_by, paraphrased = call_model(
+                lambda llm: paraphrase_text(user_text, style, llm), st.session_state.selected_llm, "paraphrase"
+            )
 
             if "error" in paraphrased:
                 st.error(f"Error: {paraphrased['error']}")
             else:
                 st.subheader("Results:")
 
+                if answered_by != st.session_state.selected_llm:
+                    st.caption(f"Answered by {answered_by.capitalize()} because {st.session_state.selected_llm.capitalize()} was slow.")
+
                 # Original vs Paraphrased Text
                 col1, col2 = st.columns(2)
                 
@@ -1,10 +1,19 @@
 import streamlit as st
-import requests
 import json
 import re
 
+from app.components.DebugPanel import debug_panel
+from app.styles.chat_styles import apply_chat_styles
+from app.utils.ingestion import DocumentTooLargeError
+from app.utils.instrumentation import span
+from app.utils.tools import check_plagiarism, check_plagiarism_file
+
 
 def plagiarism_checker_page():
+    # Shared theme, sent to the browser once per session
+    apply_chat_styles()
+    debug_panel()
+
     st.title("Plagiarism Checker")
     st.write("Check your content for plagiarism with our AI-powered tool.")
     
@@ -15,49 +24,36 @@ def plagiarism_checker_page():
         text_to_check = st.text_area("Paste the content you want to check for plagiarism:", height=200)
     
     with tab2:
-        uploaded_file = st.file_uploader("Upload a .txt or .docx file", type=["txt", "docx"])
+        # Read when checked, paragraph by paragraph, so the local pre-screen
+        # starts before the whole document has been extracted
+        uploaded_file = st.file_uploader("Upload a .txt, .docx or .pdf file", type=["txt", "docx", "pdf"])
         if uploaded_file is not None:
-            # Handle different file types
-            if uploaded_file.name.endswith('.txt'):
-                text_to_check = uploaded_file.read().decode("utf-8")
-                st.success(f"File '{uploaded_file.name}' loaded successfully!")
-            elif uploaded_file.name.endswith('.docx'):
-                try:
-                    import docx
-                    doc = docx.Document(uploaded_file)
-                    text_to_check = "\n".join([para.text for para in doc.paragraphs])
-                    st.success(f"File '{uploaded_file.name}' loaded successfully!")
-                except Exception as e:
-                    st.error(f"Error reading .docx file: {str(e)}")
-                    st.info("Please make sure you have the python-docx package installed.")
-                    text_to_check = ""
+            st.success(f"File '{uploaded_file.name}' uploaded successfully!")
     
     if st.button("Check for Plagiarism"):
-        if 'text_to_check' in locals() and text_to_check:
+        if uploaded_file is not None or text_to_check:
             with st.spinner("Analyzing text for potential plagiarism..."):
                 # Call the plagiarism checking API
-                result = check_plagiarism(text_to_check)
-                
-                if "error" in result:
-                    st.error(f"Error: {result['error']}")
+                try:
+                    if uploaded_file is not None:
+                        result = check_plagiarism_file(uploaded_file)
+                    else:
+                        result = check_plagiarism(text_to_check)
+                except DocumentTooLargeError as e:
+                    st.error(f"File too large: {str(e)}")
+                except Exception as e:
+                    st.error(f"Error reading file: {str(e)}")
                 else:
-                    # Display the results
-                    display_plagiarism_results(result, text_to_check)
+                    if "error" in result:
+                        st.error(f"Error: {result['error']}")
+                    else:
+                        # Display the results
+                        with span("render", phase="plagiarism_results"):
+                            display_plagiarism_results(result)
         else:
             st.warning("Please enter some text or upload a file to check for plagiarism.")
 
-def check_plagiarism(text):
-    """Send text to the plagiarism checking API"""
-    try:
-        response = requests.post(
-            "https://bdstall-duplicate-content-checking-api.onrender.com/api/v1/ai/moderation/content-duplication-check",
-            json={"user_description_input": text}
-        )
-        return response.json()
-    except Exception as e:
-        return {"error": str(e)}
-
-def display_plagiarism_results(result, original_text):
+def display_plagiarism_results(result):
     """Display the plagiarism check results in a user-friendly way"""
     is_duplicate = result.get("is_duplicate", False)
     message = result.get("message", "")
@@ -70,5 +66,11 @@ def display_plagiarism_results(result, original_text):
     else:
         st.success("No plagiarism detected.")
 
+    similar_sources = result.get("similar_sources", [])
+    if similar_sources:
+        st.markdown("**Similar documents in the local corpus:**")
+        for source, similarity in similar_sources:
+            st.markdown(f"- `{source}` — {similarity:.0%} estimated overlap")
+
 if __name__ == "__main__":
     plagiarism_checker_page()
\ No newline at end of file
@@ -0,0 +1,94 @@
+import streamlit as st
+
+from app.components.DebugPanel import debug_panel
+from app.components.QueueStatus import queue_status
+from app.styles.chat_styles import apply_chat_styles
+from app.utils.api_client import ENDPOINT_TIMEOUTS
+from app.utils.ingestion import DocumentTooLargeError, read_document
+from app.utils.pipeline import run_tools
+from app.utils.tools import check_grammar, check_plagiarism, paraphrase_text
+
+# Shared theme, sent to the browser once per session
+apply_chat_styles()
+debug_panel()
+
+st.title("Run All Tools")
+st.write("Check grammar, paraphrase and scan for plagiarism in one go")
+
+# Initialize session state for LLM selection
+if 'selected_llm' not in st.session_state:
+    st.session_state.selected_llm = 'gemini'
+
+tab1, tab2 = st.tabs(["Text Input", "File Upload"])
+
+with tab1:
+    user_text = st.text_area("Enter your text here:", height=200)
+
+with tab2:
+    uploaded_file = st.file_uploader("Upload a .txt, .docx or .pdf file", type=["txt", "docx", "pdf"])
+    if uploaded_file is not None:
+        try:
+            user_text = read_document(uploaded_file)
+            st.success(f"File '{uploaded_file.name}' loaded successfully!")
+        except DocumentTooLargeError as e:
+            st.error(f"File too large: {str(e)}")
+        except Exception as e:
+            st.error(f"Error reading file: {str(e)}")
+
+style = st.selectbox(
+    "Paraphrasing style:",
+    ["Fluency", "Humanize", "Formal", "Academic", "Simple", "Creative", "Shorten"],
+    index=0
+)
+
+
+def display_result(name, result, elapsed):
+    # Each result is written into its own column as soon as it arrives
+    with columns[name]:
+        st.caption(f"Finished in {elapsed:.1f}s")
+        if "error" in result:
+            st.error(f"Error: {result['error']}")
+        elif name == "grammar":
+            st.success(result["corrected_text"])
+            st.write(f"Found {len(result.get('corrections') or [])} grammar issues.")
+        elif name == "paraphrase":
+            st.success(result["paraphrased_text"])
+        elif result.get("is_duplicate"):
+            st.error(f"Plagiarism Detected: {result.get('message', '')}")
+            if result.get("url"):
+                st.markdown(f"Source: [{result['url']}]({result['url']})")
+        else:
+            st.success("No plagiarism detected.")
+        placeholders[name].empty()
+
+
+if st.button("Run All Tools"):
+    if user_text:
+        llm = st.session_state.selected_llm
+        tools = {
+            "grammar": lambda: check_grammar(user_text, llm),
+            "paraphrase": lambda: paraphrase_text(user_text, style, llm),
+            "plagiarism": lambda: check_plagiarism(user_text),
+        }
+        deadlines = {name: ENDPOINT_TIMEOUTS[name][1] for name in tools}
+
+        titles = {"grammar": "Grammar", "paraphrase": f"Paraphrase ({style})", "plagiarism": "Plagiarism"}
+        columns = dict(zip(tools, st.columns(len(tools))))
+        placeholders = {}
+        for name, column in columns.items():
+            with column:
+                st.markdown(f"### {titles[name]}")
+                placeholders[name] = st.empty()
+                placeholders[name].info("Running...")
+
+        with queue_status():
+            wall_time = run_tools(tools, display_result, deadlines)
+        st.caption(f"All tools finished in {wall_time:.1f}s")
+    else:
+        st.warning("Please enter some text or upload a file.")
+
+# Add a footer
+st.markdown("""
+---
+*Powered by Gemini AI*
+""")
@@ -1,12 +1,20 @@
 import streamlit as st
 import random
-import time
 import json
+import time
 from datetime import datetime, timedelta
-import requests
+
+from app.components.CountdownTimer import countdown_timer
+from app.components.DebugPanel import debug_panel
+from app.styles.chat_styles import apply_chat_styles
+from app.utils.essay_scoring import load_essays, score_essay, score_essays
+from app.utils.message_utils import add_challenge_to_history, count_challenges, get_challenge_history
 
 # --- Configuration --- #
-API_BASE_URL = "https://langchain-grammar-check-api.onrender.com" # Replace with your actual API endpoint
+CHALLENGE_HISTORY_PAGE_SIZE = 10
+# Text that reaches the server this long after the deadline is still on time,
+# to allow for the round trip of the last edit
+SUBMISSION_GRACE = timedelta(seconds=5)
 
 # --- Session State Initialization --- #
 if 'writing_challenge_data' not in st.session_state:
@@ -15,9 +23,10 @@ if 'writing_challenge_data' not in st.session_state:
         "start_time": None,
         "end_time": None,
         "user_response": "",
+        "on_time_response": "",
+        "late_submission": False,
         "feedback": None,
-        "band_score": None,
-        "history": []
+        "band_score": None
     }
 
 if 'challenge_active' not in st.session_state:
@@ -57,32 +66,12 @@ def evaluate_response_with_ai(llm_model, prompt, user_response):
     # Local implementation instead of API call
     # This is a simplified evaluation - in a real app, you would use an LLM for this
     
-    # Basic metrics
-    word_count = len(user_response.split())
-    sentence_count = len([s for s in user_response.split('.') if s.strip()])
-    avg_words_per_sentence = word_count / max(1, sentence_count)
-    
-    # Simple scoring logic
-    if word_count < 100:
-        band_score = 4.0
-    elif word_count < 150:
-        band_score = 5.0
-    elif word_count < 200:
-        band_score = 6.0
-    elif word_count < 250:
-        band_score = 7.0
-    else:
-        band_score = 7.5
-    
-    # Adjust based on average sentence length (very simple heuristic)
-    if avg_words_per_sentence < 8:
-        band_score -= 0.5
-    elif avg_words_per_sentence > 25:
-        band_score -= 0.5
-    
-    # Random slight variation to make it seem more realistic
-    band_score += random.uniform(-0.5, 0.5)
-    band_score = round(max(4.0, min(9.0, band_score)) * 2) / 2  # Round to nearest 0.5
+    # Basic metrics and band score
+    scores = score_essay(user_response)
+    word_count = scores["word_count"]
+    sentence_count = scores["sentence_count"]
+    avg_words_per_sentence = scores["avg_words_per_sentence"]
+    band_score = scores["band_score"]
     
     # Generate feedback
     feedback = {
@@ -110,6 +99,8 @@ def start_challenge():
     st.session_state.writing_challenge_data["start_time"] = datetime.now()
     st.session_state.writing_challenge_data["end_time"] = st.session_state.writing_challenge_data["start_time"] + timedelta(minutes=20) # 20-minute timer
     st.session_state.writing_challenge_data["user_response"] = ""
+    st.session_state.writing_challenge_data["on_time_response"] = ""
+    st.session_state.writing_challenge_data["late_submission"] = False
     st.session_state.writing_challenge_data["feedback"] = None
     st.session_state.writing_challenge_data["band_score"] = None
     st.session_state.time_left_seconds = 20 * 60
@@ -117,6 +108,11 @@ def start_challenge():
 def submit_response():
     st.session_state.challenge_active = False
     data = st.session_state.writing_challenge_data
+    # The countdown only runs in the browser; text sent after the deadline
+    # is not graded, the last version received in time is
+    if datetime.now() > data["end_time"] + SUBMISSION_GRACE and data["user_response"] != data["on_time_response"]:
+        data["user_response"] = data["on_time_response"]
+        data["late_submission"] = True
     if data["user_response"]:
         with st.spinner("Evaluating your response..."):
             evaluation_result = evaluate_response_with_ai(
@@ -127,7 +123,7 @@ def submit_response():
             if "error" not in evaluation_result:
                 data["feedback"] = evaluation_result.get("feedback")
                 data["band_score"] = evaluation_result.get("overall_band_score")
-                data["history"].append({
+                add_challenge_to_history({
                     "timestamp": datetime.now().isoformat(),
                     "prompt": data["prompt"],
                     "user_response": data["user_response"],
@@ -142,14 +138,24 @@ def submit_response():
 
 # --- UI Layout --- #
 st.set_page_config(page_title="Writing Challenge", layout="wide")
+
+# Shared theme, sent to the browser once per session
+apply_chat_styles()
+debug_panel()
+
 st.title("✍️ IELTS Writing Challenge")
 st.write("Practice your writing skills with AI-generated prompts and get instant feedback!")
 
 # Sidebar for history
 st.sidebar.header("Challenge History")
-if st.session_state.writing_challenge_data["history"]:
-    for i, entry in enumerate(reversed(st.session_state.writing_challenge_data["history"])):
-        with st.sidebar.expander(f"Challenge {len(st.session_state.writing_challenge_data['history']) - i} (Score: {entry['band_score']})"):
+total_challenges = count_challenges()
+if total_challenges:
+    # Only the most recent page of the stored history is read
+    recent = get_challenge_history(max(0, total_challenges - CHALLENGE_HISTORY_PAGE_SIZE))
+    if total_challenges > len(recent):
+        st.sidebar.caption(f"Showing the {len(recent)} most recent of {total_challenges} challenges.")
+    for i, entry in enumerate(reversed(recent)):
+        with st.sidebar.expander(f"Challenge {total_challenges - i} (Score: {entry['band_score']})"):
             st.markdown(f"**Prompt:** {entry['prompt']}")
             st.markdown(f"**Your Response:** {entry['user_response'][:100]}...")
             st.markdown(f"**Feedback:** {entry['feedback'].get('overall_summary', 'N/A')}")
@@ -169,6 +175,8 @@ if not st.session_state.challenge_active:
         st.markdown(f"**Prompt:** {data['prompt']}")
         st.markdown(f"**Your Response:**")
         st.info(data['user_response'])
+        if data.get("late_submission"):
+            st.warning("Time was up when you submitted, so only the text received before the deadline was graded.")
         
         if data["band_score"]:
             st.markdown(f"### Overall Band Score: <span style='color:#4CAF50; font-size: 2em;'>{data['band_score']}</span>", unsafe_allow_html=True)
@@ -198,8 +206,10 @@ else: # Challenge is active
     st.markdown("### Writing Prompt:")
     st.warning(data["prompt"])
     
-    # Timer display
+    # Timer display: the countdown runs in the browser, the server only
+    # recomputes the remaining time from end_time when the user acts
     timer_placeholder = st.empty()
+    st.session_state.time_left_seconds = max(0, int((data["end_time"] - datetime.now()).total_seconds()))
     
     # Text area for user response
     user_input_disabled = False
@@ -207,9 +217,8 @@ else: # Challenge is active
         user_input_disabled = True
         timer_placeholder.error("Time's Up!")
     else:
-        minutes = st.session_state.time_left_seconds // 60
-        seconds = st.session_state.time_left_seconds % 60
-        timer_placeholder.markdown(f"### Time Left: {minutes:02d}:{seconds:02d}")
+        with timer_placeholder:
+            countdown_timer(st.session_state.time_left_seconds)
     
     # Display text area for user response
     st.session_state.writing_challenge_data["user_response"] = st.text_area(
@@ -219,11 +228,13 @@ else: # Challenge is active
         disabled=user_input_disabled,
         help="Write your response here. The input will be disabled when the timer runs out."
     )
+    if datetime.now() <= data["end_time"] + SUBMISSION_GRACE:
+        data["on_time_response"] = data["user_response"]
 
-    # Display submit and end buttons
+    # Display submit and end buttons; what was written in time can still be submitted
     col1, col2 = st.columns(2)
     with col1:
-        if st.button("Submit Response", disabled=user_input_disabled):
+        if st.button("Submit Response"):
             submit_response()
             st.rerun()
     
@@ -233,12 +244,29 @@ else: # Challenge is active
             st.session_state.time_left_seconds = 0
             st.warning("Challenge ended early.")
             st.rerun()
-    
-    # Update timer (after rendering all UI elements)
-    if not user_input_disabled:
-        time.sleep(1)  # Simulate countdown
-        st.session_state.time_left_seconds -= 1
-        st.rerun()  # Rerun to update timer
+
+
+# Batch grading for a whole class
+with st.expander("Grade a Class"):
+    st.write("Upload a CSV or JSONL file with one essay per row (column `essay`, `response` or `text`).")
+    essays_file = st.file_uploader("Essays file", type=["csv", "jsonl"], key="essays_file")
+    seed = st.number_input("Random seed", value=0, step=1, help="Scores are reproducible for the same seed.")
+    if essays_file is not None and st.button("Grade Essays"):
+        try:
+            essays = load_essays(essays_file)
+            started = time.perf_counter()
+            scores = essays.join(score_essays(essays["essay"], seed=int(seed)))
+            elapsed = time.perf_counter() - started
+            st.caption(f"Graded {len(scores)} essays in {elapsed:.2f}s ({len(scores) / max(elapsed, 1e-9):,.0f} essays/s)")
+            st.dataframe(scores.drop(columns=["essay"]), use_container_width=True)
+            st.download_button(
+                label="Download Scores",
+                data=scores.to_csv(index=False),
+                file_name="essay_scores.csv",
+                mime="text/csv"
+            )
+        except Exception as e:
+            st.error(f"Could not grade essays: {str(e)}")
 
 # Ensure LLM is selected for API calls
 if 'selected_llm' not in st.session_state: